@@ -8,7 +8,9 @@ https://dadosabertos.rfb.gov.br/CNPJ/
 http://200.152.38.155/CNPJ/
 """
 from bs4 import BeautifulSoup
-import requests, wget, os, sys, time, glob, parfive
+import requests, os, sys, time, glob, logging, argparse
+
+import download_retomavel
 
 #url = 'http://200.152.38.155/CNPJ/dados_abertos_cnpj/2024-08/' #padrão a partir de agosto/2024
 #url_dados_abertos = 'https://dadosabertos.rfb.gov.br/CNPJ/dados_abertos_cnpj/'
@@ -19,6 +21,8 @@ url_dados_abertos = 'https://arquivos.receitafederal.gov.br/dados/cnpj/dados_abe
 pasta_zip = r"dados-publicos-zip" #local dos arquivos zipados da Receita
 pasta_cnpj = 'dados-publicos'
 
+headers = {'User-Agent': "Mozilla/5.0 (Windows NT 10.0; Windows; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/103.0.5060.114 Safari/537.36", "Accept": "*/*"}
+
 def requisitos():
     #se pastas não existirem, cria automaticamente
     if not os.path.isdir(pasta_cnpj):
@@ -28,92 +32,80 @@ def requisitos():
         
     arquivos_existentes = list(glob.glob(pasta_cnpj +'/*.*')) + list(glob.glob(pasta_zip + '/*.*'))
     if len(arquivos_existentes):
-        #eg.msgbox("Este programa baixa arquivos csv.zip de dados abertos da Receita Federal e converte para uso na RedeCNPJ aplicativo.\nIMPORTANTE: Para prosseguir, as pastas 'dados-publicos' e 'dados-publicos-zip', devem estar vazias, senão poderá haver inconsistências (juntar dados de meses distintos).\n",'Criar Bases RedeCNPJ')
-        #if eg.ynbox('Deseja apagar os arquivos das pastas ' + pasta_cnpj + ' e ' + pasta_zip + '?\nNÃO SERÁ POSSÍVEL REVERTER!!!!\n' + '\n'.join(arquivos_existentes) + '\nATENÇÃO: SE FOR EXECUTAR APENAS ALGUMA PARTE DO PROGRAMA, NÃO SELECIONE ESTA OPÇÃO, APAGUE MANUALMENTE.','Criar Bases RedeCNPJ', ['SIM-APAGAR', 'NÃO']):
-        r = input('Deseja apagar os arquivos das pastas ' + pasta_cnpj + ' e ' + pasta_zip + '?\n' + '\n'.join(arquivos_existentes) + '\nATENÇÃO: SE FOR EXECUTAR APENAS ALGUMA PARTE DO PROGRAMA, NÃO SELECIONE ESTA OPÇÃO, APAGUE MANUALMENTE. \nNÃO SERÁ POSSÍVEL REVERTER!!!!\nDeseja prosseguir e apagar os arquivos (y/n)??')
+        #downloads parciais (.part) e arquivos já baixados do mesmo mês são retomados/pulados, não é preciso apagar
+        r = input('Deseja apagar os arquivos das pastas ' + pasta_cnpj + ' e ' + pasta_zip + '?\n' + '\n'.join(arquivos_existentes) + '\nATENÇÃO: SE FOR EXECUTAR APENAS ALGUMA PARTE DO PROGRAMA, NÃO SELECIONE ESTA OPÇÃO, APAGUE MANUALMENTE. \nNÃO SERÁ POSSÍVEL REVERTER!!!!\nDigite Y para apagar os arquivos, C para continuar um download interrompido (arquivos completos e inalterados são pulados), ou outra tecla para parar (y/c/n)??')
         if r and r.upper()=='Y':
-            for arq in arquivos_existentes:
+            for arq in arquivos_existentes + list(glob.glob(pasta_zip + '/.*.download.json')):
                     print('Apagando arquivo ' + arq)
                     os.remove(arq)
+        elif r and r.upper()=='C':
+            print('Continuando download, arquivos existentes serão verificados')
         else:
             print('Parando... Apague os arquivos ' + pasta_cnpj + ' e ' + pasta_zip +' e tente novamente')
             input('Pressione Enter')
             sys.exit(1)
-    # else:
-    #     eg.msgbox("Este programa baixa arquivos csv.zip de dados abertos da Receita Federal e converte para uso na RedeCNPJ aplicativo.",'Criar Bases RedeCNPJ')
-
-    # if len(glob.glob(os.path.join(pasta_zip,'*.zip'))):
-    #     print(f'Há arquivos zip na pasta {pasta_zip}. Apague ou mova esses arquivos zip e tente novamente')
-    #     input('Pressione Enter')
-    #     sys.exit(1)
-requisitos()
-
-print(time.asctime(), f'Início de {sys.argv[0]}:')
-
-soup_pagina_dados_abertos = BeautifulSoup(requests.get(url_dados_abertos).text, features="lxml")
-try:
-    ultima_referencia = sorted([link.get('href') for link in soup_pagina_dados_abertos.find_all('a') if link.get('href').startswith('20')])[-1]
-except:
-    print('Não encontrou pastas em ' + url_dados_abertos)
-    r = input('Pressione Enter.')
-    sys.exit(1)
-
-
-url = url_dados_abertos + ultima_referencia
-# page = requests.get(url)    
-# data = page.text
-soup = BeautifulSoup(requests.get(url).text, features="lxml")
-lista = []
-print('Relação de Arquivos em ' + url)
-for link in soup.find_all('a'):
-    if str(link.get('href')).endswith('.zip'): 
-        cam = link.get('href')
-        if not cam.startswith('http'):
-            print(url+cam)
-            lista.append(url+cam)
-        else:
-            print(cam)
-            lista.append(cam)
 
-if __name__ == '__main__':        
+def listar_arquivos(url_dados_abertos):
+    """Retorna a lista de URLs dos arquivos zip da última referência publicada"""
+    soup_pagina_dados_abertos = BeautifulSoup(requests.get(url_dados_abertos, headers=headers).text, features="lxml")
+    try:
+        ultima_referencia = sorted([link.get('href') for link in soup_pagina_dados_abertos.find_all('a') if link.get('href') and link.get('href').startswith('20')])[-1]
+    except IndexError:
+        print('Não encontrou pastas em ' + url_dados_abertos)
+        r = input('Pressione Enter.')
+        sys.exit(1)
+
+    url = url_dados_abertos + ultima_referencia
+    soup = BeautifulSoup(requests.get(url, headers=headers).text, features="lxml")
+    lista = []
+    print('Relação de Arquivos em ' + url)
+    for link in soup.find_all('a'):
+        if str(link.get('href')).endswith('.zip'): 
+            cam = link.get('href')
+            if not cam.startswith('http'):
+                print(url+cam)
+                lista.append(url+cam)
+            else:
+                print(cam)
+                lista.append(cam)
+    return lista
+
+def main():
+    parser = argparse.ArgumentParser(description='Baixa os arquivos de dados públicos do CNPJ, retomando downloads interrompidos')
+    parser.add_argument('--url', default=url_dados_abertos, help='Página de dados abertos da Receita (padrão: %(default)s)')
+    parser.add_argument('--conexoes', type=int, default=5, help='Arquivos baixados ao mesmo tempo (padrão: 5)')
+    parser.add_argument('--segmentos', type=int, default=1, help='Segmentos paralelos por arquivo grande, cada um com sua conexão (padrão: 1)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    requisitos()
+
+    print(time.asctime(), f'Início de {sys.argv[0]}:')
+    lista = listar_arquivos(args.url)
+
     resp = input(f'Deseja baixar os arquivos acima para a pasta {pasta_zip} (y/n)?')
     if resp.lower()!='y' and resp.lower()!='s':
         sys.exit()
-        
 
+    print(time.asctime(), 'Início do Download dos arquivos...')
 
-print(time.asctime(), 'Início do Download dos arquivos...')
-
-if True: #baixa usando parfive, download em paralelo
-    #downloader = parfive.Downloader()
-    headers = {'User-Agent': "Mozilla/5.0 (Windows NT 10.0; Windows; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/103.0.5060.114 Safari/537.36", "Accept": "*/*"}
-    downloader = parfive.Downloader(max_conn=5, max_splits=1, config=parfive.SessionConfig(headers=headers))
-    for url in lista:
-        downloader.enqueue_file(url, path=pasta_zip, filename=os.path.split(url)[1])
-    downloader.download()
-else: #baixar sequencial, rotina antiga
-    def bar_progress(current, total, width=80):
-        if total>=2**20:
-            tbytes='Megabytes'
-            unidade = 2**20
-        else:
-            tbytes='kbytes'
-            unidade = 2**10
-        progress_message = f"Baixando: %d%% [%d / %d] {tbytes}" % (current / total * 100, current//unidade, total//unidade)
-        # Don't use print() as it will print in new line every time.
-        sys.stdout.write("\r" + progress_message)
-        sys.stdout.flush()
-      
-    for k, url in enumerate(lista):
-        print('\n' + time.asctime() + f' - item {k}: ' + url)
-        wget.download(url, out=os.path.join(pasta_zip, os.path.split(url)[1]), bar=bar_progress)
+    #download em paralelo, com retomada via Range e estado por arquivo em .<arquivo>.download.json
+    sessao = requests.Session()
+    sessao.headers.update(headers)
+    baixados, com_erro = download_retomavel.baixar_arquivos(lista, pasta_zip, sessao=sessao, conexoes=args.conexoes, segmentos=args.segmentos)
 
-        
-print('\n\n'+ time.asctime(), f' Finalizou {sys.argv[0]}!!!')
-print(f"Baixou {len(glob.glob(os.path.join(pasta_zip,'*.zip')))} arquivos.")
-if __name__ == '__main__':
+    print('\n\n'+ time.asctime(), f' Finalizou {sys.argv[0]}!!!')
+    print(f"Baixou {len(glob.glob(os.path.join(pasta_zip,'*.zip')))} arquivos.")
+    if com_erro:
+        print(f'{com_erro} arquivos com erro. Execute novamente e escolha C para retomar.')
+        input('Pressione Enter')
+        sys.exit(1)
     input('Pressione Enter')
 
+if __name__ == '__main__':
+    main()
+
 #lista dos arquivos (até julho/2024)
 '''
 http://200.152.38.155/CNPJ/Cnaes.zip
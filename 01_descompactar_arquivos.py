@@ -6,6 +6,15 @@ Script 1: Descompactação de Arquivos CNPJ
 Este script é responsável por descompactar os arquivos ZIP da base de dados CNPJ.
 Ele verifica se os arquivos já foram descompactados para evitar reprocessamento.
 
+Para cada ZIP é gravado em dados-publicos/ um índice lateral (.<arquivo>.zip.json)
+com o CRC32 e o tamanho de cada membro extraído, lidos do diretório central do
+ZIP. Assim a verificação é exata e instantânea: membros de um novo mês (mesmo
+nome, outro CRC) ou truncados por uma execução interrompida são extraídos de
+novo, e os demais são pulados sem reler os arquivos extraídos.
+
+Com --jobs N, os ZIPs são descompactados em paralelo por N processos, começando
+pelos maiores (Estabelecimentos*) para que os pequenos não formem uma cauda longa.
+
 @author: rictom
 https://github.com/rictom/cnpj-mysql
 """
@@ -13,9 +22,14 @@ https://github.com/rictom/cnpj-mysql
 import os
 import sys
 import glob
+import json
+import time
+import shutil
 import zipfile
 import logging
+import argparse
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Configurar logging detalhado
 def configurar_logging():
@@ -68,36 +82,87 @@ def verificar_arquivos_zip(pasta_compactados):
     
     return arquivos_zip
 
+def caminho_indice(pasta_saida, arquivo_zip):
+    """Retorna o caminho do índice lateral de um ZIP (ex.: .Estabelecimentos0.zip.json)"""
+    return os.path.join(pasta_saida, f'.{os.path.basename(arquivo_zip)}.json')
+
+def carregar_indice(pasta_saida, arquivo_zip):
+    """Carrega o índice lateral de um ZIP: {membro: {'crc': ..., 'tamanho': ...}}"""
+    try:
+        with open(caminho_indice(pasta_saida, arquivo_zip), 'r', encoding='utf-8') as f:
+            return json.load(f).get('membros', {})
+    except (OSError, ValueError):
+        return {}
+
+def salvar_indice(pasta_saida, arquivo_zip, membros):
+    """Grava o índice lateral de um ZIP de forma atômica"""
+    caminho = caminho_indice(pasta_saida, arquivo_zip)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump({'zip': os.path.basename(arquivo_zip), 'membros': membros}, f, indent=2)
+    os.replace(temporario, caminho)
+
+def membro_extraido(pasta_saida, info, registro):
+    """Indica se um membro já foi extraído por completo a partir deste mesmo conteúdo.
+    
+    Compara CRC32 e tamanho do diretório central do ZIP com os do índice lateral, e
+    o tamanho do arquivo em disco com o esperado (pega extrações truncadas), sem
+    reler o arquivo extraído.
+    """
+    if not registro or registro.get('crc') != info.CRC or registro.get('tamanho') != info.file_size:
+        return False
+    try:
+        return os.path.getsize(os.path.join(pasta_saida, info.filename)) == info.file_size
+    except OSError:
+        return False
+
+def listar_membros_pendentes(pasta_saida, zip_ref, indice):
+    """Retorna os membros (ZipInfo) de um ZIP que ainda precisam ser extraídos"""
+    return [
+        info for info in zip_ref.infolist()
+        if not info.is_dir() and not membro_extraido(pasta_saida, info, indice.get(info.filename))
+    ]
+
 def verificar_arquivos_existentes(pasta_saida, arquivo_zip):
-    """Verifica se os arquivos de um ZIP já foram descompactados"""
+    """Verifica se os arquivos de um ZIP já foram descompactados, pelo índice lateral (CRC32 e tamanho)"""
     try:
         with zipfile.ZipFile(arquivo_zip, 'r') as zip_ref:
-            files_to_extract = zip_ref.namelist()
-            
-            # Verificar se todos os arquivos já existem
-            files_already_exist = all(
-                os.path.exists(os.path.join(pasta_saida, file)) 
-                for file in files_to_extract
-            )
+            total_membros = sum(1 for info in zip_ref.infolist() if not info.is_dir())
+            pendentes = listar_membros_pendentes(pasta_saida, zip_ref, carregar_indice(pasta_saida, arquivo_zip))
             
-            if files_already_exist:
+            if not pendentes:
                 logger.info(f"Todos os arquivos de {os.path.basename(arquivo_zip)} já foram descompactados")
                 return True
             else:
-                # Verificar quantos arquivos já existem
-                existing_files = sum(
-                    1 for file in files_to_extract 
-                    if os.path.exists(os.path.join(pasta_saida, file))
-                )
-                logger.info(f"Arquivo {os.path.basename(arquivo_zip)}: {existing_files}/{len(files_to_extract)} arquivos já existem")
+                logger.info(f"Arquivo {os.path.basename(arquivo_zip)}: {total_membros - len(pendentes)}/{total_membros} arquivos já extraídos")
+                for info in pendentes:
+                    logger.debug(f"  Pendente (novo, alterado ou incompleto): {info.filename}")
                 return False
                 
     except Exception as e:
         logger.error(f"Erro ao verificar arquivo {arquivo_zip}: {str(e)}")
         return False
 
+def extrair_membro(zip_ref, info, pasta_saida):
+    """Extrai um membro para um arquivo temporário e o renomeia ao final.
+    
+    O CRC32 é conferido pelo zipfile durante a leitura, e um arquivo com o nome
+    final nunca fica truncado se a extração for interrompida.
+    """
+    destino = os.path.join(pasta_saida, info.filename)
+    pasta_destino = os.path.dirname(destino)
+    os.makedirs(pasta_destino, exist_ok=True)
+    # Oculto, para não casar com os padrões de extensão da carga (ex.: *.SIMPLES.CSV.*)
+    temporario = os.path.join(pasta_destino, f'.{os.path.basename(destino)}.parcial')
+    with zip_ref.open(info, 'r') as origem, open(temporario, 'wb') as saida:
+        shutil.copyfileobj(origem, saida, 16 * 1024 * 1024)
+    os.replace(temporario, destino)
+
 def descompactar_arquivo(arquivo_zip, pasta_saida):
-    """Descompacta um arquivo ZIP específico"""
+    """Descompacta os membros novos, alterados ou incompletos de um arquivo ZIP.
+    
+    Retorna os bytes extraídos (0 se tudo já estava extraído), ou None em caso de erro.
+    """
     try:
         logger.info(f"Iniciando descompactação de: {os.path.basename(arquivo_zip)}")
         
@@ -108,8 +173,14 @@ def descompactar_arquivo(arquivo_zip, pasta_saida):
             for file in files_to_extract:
                 logger.debug(f"  - {file}")
             
+            # Apenas os membros que não batem com o índice lateral
+            indice = carregar_indice(pasta_saida, arquivo_zip)
+            pendentes = listar_membros_pendentes(pasta_saida, zip_ref, indice)
+            if len(pendentes) < len(files_to_extract):
+                logger.info(f"{len(files_to_extract) - len(pendentes)} arquivos já extraídos, extraindo {len(pendentes)}")
+            
             # Verificar espaço em disco
-            total_size = sum(zip_ref.getinfo(file).file_size for file in files_to_extract)
+            total_size = sum(info.file_size for info in pendentes)
             available_space = os.statvfs(pasta_saida).f_frsize * os.statvfs(pasta_saida).f_bavail
             
             if total_size > available_space:
@@ -117,9 +188,12 @@ def descompactar_arquivo(arquivo_zip, pasta_saida):
             
             logger.info(f"Espaço em disco suficiente. Tamanho total: {total_size / (1024**3):.2f} GB")
             
-            # Descompactar
+            # Descompactar, registrando cada membro no índice assim que concluído
             start_time = datetime.now()
-            zip_ref.extractall(pasta_saida)
+            for info in pendentes:
+                extrair_membro(zip_ref, info, pasta_saida)
+                indice[info.filename] = {'crc': info.CRC, 'tamanho': info.file_size}
+                salvar_indice(pasta_saida, arquivo_zip, indice)
             end_time = datetime.now()
             
             # Verificar se todos os arquivos foram extraídos
@@ -140,16 +214,75 @@ def descompactar_arquivo(arquivo_zip, pasta_saida):
                 missing_files = set(files_to_extract) - set(extracted_files)
                 logger.warning(f"Arquivos não extraídos: {missing_files}")
             
-            return True
+            return total_size
             
     except Exception as e:
         logger.error(f"Erro ao descompactar {arquivo_zip}: {str(e)}")
-        return False
+        return None
+
+def tamanho_pendente(pasta_saida, arquivo_zip):
+    """Retorna o tamanho descompactado dos membros de um ZIP que ainda precisam ser extraídos"""
+    with zipfile.ZipFile(arquivo_zip, 'r') as zip_ref:
+        pendentes = listar_membros_pendentes(pasta_saida, zip_ref, carregar_indice(pasta_saida, arquivo_zip))
+        return sum(info.file_size for info in pendentes)
+
+def descompactar_arquivo_worker(arquivo_zip, pasta_saida):
+    """Descompacta um ZIP em um processo do pool e retorna (arquivo, bytes extraídos ou None, duração)"""
+    start_time = time.time()
+    extraidos = descompactar_arquivo(arquivo_zip, pasta_saida)
+    return arquivo_zip, extraidos, time.time() - start_time
+
+def descompactar_em_paralelo(arquivos_zip, pasta_saida, jobs):
+    """Descompacta os ZIPs em paralelo, maiores primeiro.
+    
+    Retorna (arquivos processados, arquivos com erro).
+    """
+    # Maiores primeiro (longest-job-first), pelo que falta extrair de cada ZIP
+    tamanhos = {arquivo_zip: tamanho_pendente(pasta_saida, arquivo_zip) for arquivo_zip in arquivos_zip}
+    arquivos_zip = sorted(arquivos_zip, key=lambda arquivo_zip: tamanhos[arquivo_zip], reverse=True)
+    
+    # Verificar espaço em disco para os membros pendentes de todos os ZIPs de uma vez
+    total_size = sum(tamanhos.values())
+    available_space = os.statvfs(pasta_saida).f_frsize * os.statvfs(pasta_saida).f_bavail
+    if total_size > available_space:
+        raise OSError(f"Espaço insuficiente em disco. Necessário: {total_size / (1024**3):.2f} GB, Disponível: {available_space / (1024**3):.2f} GB")
+    
+    logger.info(f"Descompactando {len(arquivos_zip)} arquivos com {jobs} processos ({total_size / (1024**3):.2f} GB)")
+    
+    arquivos_processados = 0
+    arquivos_com_erro = 0
+    bytes_extraidos = 0
+    start_time = time.time()
+    
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futuros = [executor.submit(descompactar_arquivo_worker, arquivo_zip, pasta_saida) for arquivo_zip in arquivos_zip]
+        
+        for concluidos, futuro in enumerate(as_completed(futuros), 1):
+            arquivo_zip, tamanho, duracao = futuro.result()
+            
+            if tamanho is not None:
+                arquivos_processados += 1
+                bytes_extraidos += tamanho
+                logger.info(f"✓ [{concluidos}/{len(arquivos_zip)}] {os.path.basename(arquivo_zip)}: "
+                            f"{tamanho / (1024**2):.2f} MB em {duracao:.2f}s ({tamanho / (1024**2) / max(duracao, 1e-9):.1f} MB/s)")
+            else:
+                arquivos_com_erro += 1
+                logger.error(f"✗ [{concluidos}/{len(arquivos_zip)}] Erro ao processar arquivo {os.path.basename(arquivo_zip)}")
+            
+            decorrido = time.time() - start_time
+            logger.info(f"  Progresso: {bytes_extraidos / (1024**3):.2f}/{total_size / (1024**3):.2f} GB, "
+                        f"{bytes_extraidos / (1024**2) / max(decorrido, 1e-9):.1f} MB/s agregado")
+    
+    return arquivos_processados, arquivos_com_erro
 
 def main():
     """Função principal do script"""
     global logger
     
+    parser = argparse.ArgumentParser(description='Descompacta os arquivos ZIP da base CNPJ')
+    parser.add_argument('--jobs', type=int, default=1, help='Quantidade de ZIPs descompactados em paralelo (padrão: 1)')
+    args = parser.parse_args()
+    
     try:
         logger = configurar_logging()
         logger.info("=" * 60)
@@ -175,24 +308,34 @@ def main():
         arquivos_processados = 0
         arquivos_com_erro = 0
         
-        for i, arquivo_zip in enumerate(arquivos_zip, 1):
-            logger.info(f"\n{'='*50}")
-            logger.info(f"Processando arquivo {i}/{total_arquivos}: {os.path.basename(arquivo_zip)}")
-            logger.info(f"{'='*50}")
-            
+        pendentes = []
+        for arquivo_zip in arquivos_zip:
             # Verificar se já foi descompactado
             if verificar_arquivos_existentes(pasta_saida, arquivo_zip):
                 logger.info(f"Arquivo {os.path.basename(arquivo_zip)} já foi processado, pulando...")
                 arquivos_processados += 1
-                continue
-            
-            # Descompactar arquivo
-            if descompactar_arquivo(arquivo_zip, pasta_saida):
-                arquivos_processados += 1
-                logger.info(f"✓ Arquivo {os.path.basename(arquivo_zip)} processado com sucesso")
             else:
-                arquivos_com_erro += 1
-                logger.error(f"✗ Erro ao processar arquivo {os.path.basename(arquivo_zip)}")
+                pendentes.append(arquivo_zip)
+        
+        if args.jobs > 1:
+            # Descompactar em paralelo
+            if pendentes:
+                processados, com_erro = descompactar_em_paralelo(pendentes, pasta_saida, args.jobs)
+                arquivos_processados += processados
+                arquivos_com_erro += com_erro
+        else:
+            for i, arquivo_zip in enumerate(pendentes, 1):
+                logger.info(f"\n{'='*50}")
+                logger.info(f"Processando arquivo {i}/{len(pendentes)}: {os.path.basename(arquivo_zip)}")
+                logger.info(f"{'='*50}")
+                
+                # Descompactar arquivo
+                if descompactar_arquivo(arquivo_zip, pasta_saida) is not None:
+                    arquivos_processados += 1
+                    logger.info(f"✓ Arquivo {os.path.basename(arquivo_zip)} processado com sucesso")
+                else:
+                    arquivos_com_erro += 1
+                    logger.error(f"✗ Erro ao processar arquivo {os.path.basename(arquivo_zip)}")
         
         # Resumo final
         logger.info("\n" + "="*60)
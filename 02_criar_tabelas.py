@@ -6,6 +6,9 @@ Script 2: Criação de Tabelas CNPJ
 Este script é responsável por criar todas as tabelas necessárias para a base de dados CNPJ.
 Ele inclui verificação de conexão, criação de tabelas e índices básicos.
 
+Com schema_publicado no cnpj_config.json, as tabelas são criadas em um schema de
+carga (ex.: cnpj_202409) e as tabelas publicadas não são tocadas (ver schema_carga.py).
+
 @author: rictom
 https://github.com/rictom/cnpj-mysql
 """
@@ -18,6 +21,12 @@ import sqlalchemy
 from sqlalchemy import text
 from datetime import datetime
 
+import schema_carga
+import carga_unlogged
+import particionamento_cnpj
+import schema_tipado
+import banco_embarcado
+
 # Configurar logging detalhado
 def configurar_logging():
     """Configura o sistema de logging com arquivo e console"""
@@ -112,7 +121,7 @@ def testar_conexao(config):
         logger.info("Criando engine PostgreSQL...")
         
         try:
-            engine_ = sqlalchemy.create_engine(engine_url)
+            engine_ = sqlalchemy.create_engine(engine_url, connect_args=schema_carga.opcoes_conexao(config))
             logger.info("Engine criado com sucesso")
             
             # Testar conexão
@@ -193,7 +202,7 @@ def testar_conexao(config):
                 
                 # Agora tentar conectar novamente com o usuário criado
                 logger.info("Tentando conectar com o usuário recém-criado...")
-                engine_ = sqlalchemy.create_engine(engine_url)
+                engine_ = sqlalchemy.create_engine(engine_url, connect_args=schema_carga.opcoes_conexao(config))
                 
                 with engine_.connect() as conn:
                     result = conn.execute(text("SELECT 1 as test"))
@@ -207,8 +216,14 @@ def testar_conexao(config):
         logger.error(f"✗ Erro ao conectar com o banco: {str(e)}")
         raise
 
-def obter_sql_criacao_tabelas():
-    """Retorna o SQL para criação das tabelas PostgreSQL"""
+def obter_sql_criacao_tabelas(comando_criar='CREATE TABLE', particoes=0, tipado=False):
+    """Retorna o SQL para criação das tabelas PostgreSQL.
+    
+    comando_criar pode ser 'CREATE UNLOGGED TABLE' (ver carga_unlogged.py).
+    Com particoes, as tabelas principais são particionadas por HASH (cnpj_basico)
+    (ver particionamento_cnpj.py). Com tipado, datas, códigos e CNPJ usam tipos
+    nativos (ver schema_tipado.py).
+    """
     
     sql_completo = '''
     DROP TABLE IF EXISTS cnae;
@@ -223,7 +238,7 @@ def obter_sql_criacao_tabelas():
         razao_social VARCHAR(200),
         natureza_juridica VARCHAR(4),
         qualificacao_responsavel VARCHAR(2),
-        capital_social_str VARCHAR(20),
+        capital_social NUMERIC(18,2),
         porte_empresa VARCHAR(2),
         ente_federativo_responsavel VARCHAR(50)
     );
@@ -259,7 +274,14 @@ def obter_sql_criacao_tabelas():
         fax VARCHAR(8),
         correio_eletronico VARCHAR(200),
         situacao_especial VARCHAR(200),
-        data_situacao_especial VARCHAR(8)
+        data_situacao_especial VARCHAR(8),
+        cnpj VARCHAR(14)
+    );
+    
+    DROP TABLE IF EXISTS estabelecimento_cnae_secundaria;
+    CREATE TABLE estabelecimento_cnae_secundaria (
+        cnpj VARCHAR(14),
+        cnae VARCHAR(7)
     );
     
     DROP TABLE IF EXISTS motivo;
@@ -318,10 +340,14 @@ def obter_sql_criacao_tabelas():
         faixa_etaria VARCHAR(1)
     );
     
+    -- Manifesto da carga anterior (recriado pelo 03_inserir_dados.py)
+    DROP TABLE IF EXISTS _carga_manifest;
+    
     -- Comentários nas tabelas para documentação
     COMMENT ON TABLE cnae IS 'Classificação Nacional de Atividades Econômicas';
     COMMENT ON TABLE empresas IS 'Dados das empresas matrizes';
     COMMENT ON TABLE estabelecimento IS 'Dados dos estabelecimentos (matrizes e filiais)';
+    COMMENT ON TABLE estabelecimento_cnae_secundaria IS 'CNAEs secundários dos estabelecimentos, um por linha';
     COMMENT ON TABLE motivo IS 'Motivos da situação cadastral';
     COMMENT ON TABLE municipio IS 'Municípios brasileiros';
     COMMENT ON TABLE natureza_juridica IS 'Naturezas jurídicas das empresas';
@@ -331,6 +357,11 @@ def obter_sql_criacao_tabelas():
     COMMENT ON TABLE socios_original IS 'Dados originais dos sócios';
     '''
     
+    if tipado:
+        sql_completo = schema_tipado.tipar_ddl(sql_completo)
+    sql_completo = sql_completo.replace('CREATE TABLE ', f'{comando_criar} ')
+    if particoes:
+        sql_completo = particionamento_cnpj.particionar_ddl(sql_completo, particoes, comando_criar)
     return sql_completo
 
 def executar_sql_por_partes(engine, sql_completo, descricao):
@@ -379,7 +410,7 @@ def verificar_tabelas_criadas(engine):
     logger.info("Verificando tabelas criadas...")
     
     tabelas_esperadas = [
-        'cnae', 'empresas', 'estabelecimento', 'motivo', 'municipio',
+        'cnae', 'empresas', 'estabelecimento', 'estabelecimento_cnae_secundaria', 'motivo', 'municipio',
         'natureza_juridica', 'pais', 'qualificacao_socio', 'simples', 'socios_original'
     ]
     
@@ -389,7 +420,7 @@ def verificar_tabelas_criadas(engine):
     for tabela in tabelas_esperadas:
         try:
             with engine.connect() as conn:
-                result = conn.execute(text(f"SELECT tablename FROM pg_tables WHERE tablename = '{tabela}'"))
+                result = conn.execute(text(f"SELECT tablename FROM pg_tables WHERE tablename = '{tabela}' AND schemaname = current_schema()"))
                 
                 if result.fetchone():
                     tabelas_criadas.append(tabela)
@@ -409,6 +440,15 @@ def verificar_tabelas_criadas(engine):
     
     return tabelas_criadas, tabelas_faltando
 
+def carregar_configuracao_existente():
+    """Retorna o cnpj_config.json atual (ou {}), para manter as chaves opcionais ao salvar"""
+    try:
+        import json
+        with open('cnpj_config.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
 def main():
     """Função principal do script"""
     global logger
@@ -419,8 +459,20 @@ def main():
         logger.info("INICIANDO SCRIPT DE CRIAÇÃO DE TABELAS CNPJ")
         logger.info("=" * 60)
         
+        # Banco embarcado (DuckDB/SQLite): um arquivo local, sem servidor nem usuário (ver banco_embarcado.py)
+        config_existente = carregar_configuracao_existente()
+        if banco_embarcado.embarcado_ativo(config_existente):
+            logger.info(f"Banco embarcado: {config_existente['tipo_banco']} em {banco_embarcado.caminho_banco(config_existente)}")
+            _, comandos_com_erro = banco_embarcado.criar_tabelas(
+                config_existente, obter_sql_criacao_tabelas(tipado=schema_tipado.tipado_ativo(config_existente)))
+            if comandos_com_erro:
+                sys.exit(1)
+            logger.info("\n✓ CRIAÇÃO DE TABELAS CONCLUÍDA COM SUCESSO!")
+            return
+        
         # Obter configuração do banco
         config = obter_configuracao_banco()
+        config = {**config_existente, **config}
         logger.info(f"Configuração: tipo_banco={config['tipo_banco']}, dbname={config['dbname']}, username={config['username']}, host={config['host']}")
         
         if config['criar_usuario']:
@@ -436,6 +488,14 @@ def main():
             print(f"no servidor {config['tipo_banco']} {config['host']}")
             print(f"usando o usuário existente '{config['username']}'")
         
+        # Modo blue/green: criar as tabelas no schema de carga, sem tocar no publicado
+        schema = None
+        if schema_carga.blue_green_ativo(config):
+            schema = schema_carga.nome_schema_carga(config)
+            schema_carga.usar_schema(config, schema)
+            logger.info(f"Modo blue/green: tabelas serão criadas no schema de carga {schema}")
+            print(f"As tabelas serão criadas no schema {schema}; o schema publicado {config['schema_publicado']} não será alterado")
+        
         resp = input("Deseja prosseguir? (S/N): ")
         if not resp or resp.upper() != 'S':
             logger.info("Execução cancelada pelo usuário")
@@ -445,7 +505,18 @@ def main():
         engine, engine_url = testar_conexao(config)
         
         # Obter SQL de criação
-        sql_criacao = obter_sql_criacao_tabelas()
+        sql_criacao = obter_sql_criacao_tabelas(carga_unlogged.comando_criar_tabela(config),
+                                                particionamento_cnpj.quantidade_particoes(config),
+                                                schema_tipado.tipado_ativo(config))
+        if schema_tipado.tipado_ativo(config):
+            logger.info("Schema tipado: datas como DATE, códigos como SMALLINT/INTEGER e cnpj como BIGINT")
+        if particionamento_cnpj.quantidade_particoes(config):
+            logger.info(f"Tabelas {', '.join(particionamento_cnpj.TABELAS_PARTICIONADAS)} particionadas por HASH (cnpj_basico) "
+                        f"em {particionamento_cnpj.quantidade_particoes(config)} partições")
+        if carga_unlogged.unlogged_ativo(config):
+            logger.info("Modo UNLOGGED: tabelas criadas sem WAL, passadas para LOGGED ao final do 03_inserir_dados.py")
+        if schema:
+            sql_criacao = f"CREATE SCHEMA IF NOT EXISTS {schema};\n" + sql_criacao
         
         # Executar criação das tabelas
         comandos_executados, comandos_com_erro = executar_sql_por_partes(
@@ -466,8 +537,9 @@ def main():
                 'criar_usuario': config['criar_usuario']
             }
             
+            # Chaves opcionais (e a senha, se já estava no arquivo) são mantidas
             with open('cnpj_config.json', 'w', encoding='utf-8') as f:
-                json.dump(config_para_salvar, f, indent=2, ensure_ascii=False)
+                json.dump({**config_existente, **config_para_salvar}, f, indent=2, ensure_ascii=False)
             
             logger.info("Configuração salva em 'cnpj_config.json' para uso no próximo script")
         except Exception as e:
@@ -5,6 +5,13 @@ Script 3: Inserção de Dados CNPJ
 
 Este script é responsável por inserir todos os dados da base CNPJ nas tabelas criadas.
 Ele inclui carregamento de tabelas de códigos, dados principais e verificação de integridade.
+As tabelas principais são carregadas via COPY (ver carga_copy.py), com os arquivos
+de cada tabela em paralelo (ver carga_paralela.py) ou, com carga_pipeline, em um pipeline
+leitura -> transformação -> escrita (ver pipeline_carga.py). O andamento de cada arquivo fica
+no _carga_manifest, permitindo retomar uma carga interrompida (ver manifesto_carga.py).
+Com fonte_dados = "zip" no cnpj_config.json, os dados são lidos diretamente dos ZIPs.
+Com schema_publicado, a carga é feita no schema de carga criado pelo 02_criar_tabelas.py
+e publicado ao final em uma troca atômica de schemas (ver schema_carga.py).
 
 @author: rictom
 https://github.com/rictom/cnpj-mysql
@@ -13,14 +20,27 @@ https://github.com/rictom/cnpj-mysql
 import os
 import sys
 import time
-import glob
 import logging
 import pandas as pd
-import dask.dataframe as dd
 import sqlalchemy
 from sqlalchemy import text
 from datetime import datetime
 
+import carga_copy
+import fontes_dados
+import carga_paralela
+import pipeline_carga
+import indices_cnpj
+import manifesto_carga
+import schema_carga
+import carga_unlogged
+import socios_cnpj
+import schema_tipado
+import busca_cnpj
+import cnpj_completo
+import banco_embarcado
+from layout_cnpj import TABELAS_PRINCIPAIS, TABELAS_CODIGO
+
 # Configurar logging detalhado
 def configurar_logging():
     """Configura o sistema de logging com arquivo e console"""
@@ -62,6 +82,8 @@ def obter_configuracao_banco():
         
         # Validar campos obrigatórios
         campos_obrigatorios = ['tipo_banco', 'dbname', 'username', 'password', 'host']
+        if banco_embarcado.embarcado_ativo(config_anterior):
+            campos_obrigatorios = ['tipo_banco', 'dbname']
         campos_faltando = [campo for campo in campos_obrigatorios if campo not in config_anterior or not config_anterior[campo]]
         
         if campos_faltando:
@@ -87,19 +109,23 @@ def obter_configuracao_banco():
         print("Execute novamente o script 02_criar_tabelas.py para corrigir a configuração.")
         sys.exit(1)
 
-def verificar_pasta_dados():
-    """Verifica se a pasta de dados descompactados existe"""
-    pasta_saida = r"dados-publicos"
+def verificar_pasta_dados(config):
+    """Verifica se a pasta de dados existe e lista os arquivos a processar.
+    
+    Com fonte_dados = "zip" no cnpj_config.json, os dados são lidos diretamente
+    dos ZIPs em dados-publicos-zip, sem descompactar em disco.
+    """
+    pasta_saida = fontes_dados.pasta_dados(config)
     
     if not os.path.exists(pasta_saida):
         raise FileNotFoundError(f"Pasta de dados não encontrada: {pasta_saida}")
     
-    # Verificar se há arquivos CSV
+    # Verificar se há arquivos CSV (soltos ou dentro dos ZIPs)
     arquivos_csv = []
-    extensoes = ['.EMPRECSV', '.ESTABELE', '.SOCIOCSV', '.CNAECSV', '.MOTICSV', '.MUNICCSV', '.NATJUCSV', '.PAISCSV', '.QUALSCSV', '.SIMPLES.CSV']
+    extensoes = [layout.extensao for layout in TABELAS_PRINCIPAIS.values()] + list(TABELAS_CODIGO.values())
     
     for extensao in extensoes:
-        arquivos = glob.glob(os.path.join(pasta_saida, f'*{extensao}'))
+        arquivos = fontes_dados.listar_fontes(pasta_saida, extensao)
         arquivos_csv.extend(arquivos)
     
     if not arquivos_csv:
@@ -107,8 +133,8 @@ def verificar_pasta_dados():
     
     logger.info(f"Encontrados {len(arquivos_csv)} arquivos CSV para processar:")
     for arquivo in arquivos_csv:
-        tamanho = os.path.getsize(arquivo) / (1024 * 1024)  # MB
-        logger.info(f"  - {os.path.basename(arquivo)} ({tamanho:.2f} MB)")
+        nome_arquivo, tamanho, _ = fontes_dados.identificar_fonte(arquivo)
+        logger.info(f"  - {nome_arquivo} ({tamanho / (1024 * 1024):.2f} MB)")
     
     return pasta_saida, arquivos_csv
 
@@ -121,7 +147,7 @@ def conectar_banco(config):
         engine_url = f"postgresql://{config['username']}:{config['password']}@{config['host']}:{port}/{config['dbname']}"
         logger.info("Criando engine PostgreSQL...")
         
-        engine_ = sqlalchemy.create_engine(engine_url)
+        engine_ = sqlalchemy.create_engine(engine_url, connect_args=schema_carga.opcoes_conexao(config))
         logger.info("Engine criado com sucesso")
         
         # Testar conexão
@@ -135,20 +161,39 @@ def conectar_banco(config):
         logger.error(f"✗ Erro ao conectar com o banco: {str(e)}")
         raise
 
-def carregar_tabela_codigo(engine, pasta_saida, extensao_arquivo, nome_tabela):
+def perguntar(mensagem, padrao='N'):
+    """Pergunta ao usuário; sem terminal (PM2, orquestrador.py) assume a resposta padrão"""
+    if not sys.stdin.isatty():
+        logger.warning(f"{mensagem}{padrao} (sem terminal, resposta padrão)")
+        return padrao
+    return input(mensagem).strip()
+
+def carregar_tabela_codigo(engine, config, pasta_saida, extensao_arquivo, nome_tabela):
     """Carrega uma tabela de códigos (CNAE, motivo, município, etc.)"""
     try:
-        arquivo = list(glob.glob(os.path.join(pasta_saida, f'*{extensao_arquivo}')))[0]
-        logger.info(f"Carregando tabela {nome_tabela} do arquivo: {os.path.basename(arquivo)}")
+        arquivo = fontes_dados.listar_fontes(pasta_saida, extensao_arquivo)[0]
+        nome_arquivo, tamanho_arquivo, mtime = fontes_dados.identificar_fonte(arquivo)
+        logger.info(f"Carregando tabela {nome_tabela} do arquivo: {nome_arquivo}")
+        
+        # Arquivo já carregado por inteiro (ex.: pelo orquestrador.py), registrado no manifesto
+        conn = engine.raw_connection()
+        try:
+            manifesto_carga.criar_manifesto(conn, carga_unlogged.unlogged_ativo(config))
+            registro = manifesto_carga.listar_concluidos(conn, nome_tabela).get(nome_arquivo)
+        finally:
+            conn.close()
+        if registro and registro[:2] == (tamanho_arquivo, mtime):
+            logger.info(f"✓ {nome_arquivo} já carregado em {nome_tabela} ({registro[2]} registros), pulando...")
+            return True
         
         # Verificar tamanho do arquivo
-        tamanho_arquivo = os.path.getsize(arquivo) / (1024 * 1024)  # MB
-        logger.info(f"Tamanho do arquivo: {tamanho_arquivo:.2f} MB")
+        logger.info(f"Tamanho do arquivo: {tamanho_arquivo / (1024 * 1024):.2f} MB")
         
         # Ler CSV
         logger.info("Lendo arquivo CSV...")
         start_time = time.time()
-        dtab = pd.read_csv(arquivo, dtype=str, sep=';', encoding='latin1', header=None, names=['codigo', 'descricao'])
+        with fontes_dados.abrir_fonte(arquivo) as f:
+            dtab = pd.read_csv(f, dtype=str, sep=';', encoding='latin1', header=None, names=['codigo', 'descricao'])
         end_time = time.time()
         
         logger.info(f"CSV lido com sucesso em {end_time - start_time:.2f}s. Linhas: {len(dtab)}")
@@ -175,11 +220,12 @@ def carregar_tabela_codigo(engine, pasta_saida, extensao_arquivo, nome_tabela):
                 
                 result = conn.execute(text(f"SELECT codigo FROM {nome_tabela} ORDER BY codigo LIMIT 1"))
                 primeiro_existente = result.fetchone()
-                primeiro_existente = primeiro_existente[0] if primeiro_existente else None
+                # No schema tipado o código volta como número, sem os zeros à esquerda
+                primeiro_existente = str(primeiro_existente[0]).zfill(len(primeiro_codigo)) if primeiro_existente else None
                 
                 result = conn.execute(text(f"SELECT codigo FROM {nome_tabela} ORDER BY codigo DESC LIMIT 1"))
                 ultimo_existente = result.fetchone()
-                ultimo_existente = ultimo_existente[0] if ultimo_existente else None
+                ultimo_existente = str(ultimo_existente[0]).zfill(len(ultimo_codigo)) if ultimo_existente else None
                 
                 # Verificar se o número de registros é adequado
                 if total_existente >= len(dtab):
@@ -199,10 +245,10 @@ def carregar_tabela_codigo(engine, pasta_saida, extensao_arquivo, nome_tabela):
                         if diferenca_percentual > 50:  # Mais de 50% de diferença
                             logger.error(f"❌ Diferença muito grande detectada: {diferenca_percentual:.1f}% a mais!")
                             logger.error(f"  Isso pode indicar dados corrompidos ou múltiplas execuções")
-                            resp = input(f"Tabela {nome_tabela} tem {diferenca_percentual:.1f}% mais registros. Continuar inserindo? (S/N) [N]: ").strip()
+                            resp = perguntar(f"Tabela {nome_tabela} tem {diferenca_percentual:.1f}% mais registros. Continuar inserindo? (S/N) [N]: ")
                         else:
                             logger.warning(f"  Diferença moderada: {diferenca_percentual:.1f}% a mais")
-                            resp = input(f"Tabela {nome_tabela} tem mais registros que o esperado. Continuar inserindo? (S/N) [N]: ").strip()
+                            resp = perguntar(f"Tabela {nome_tabela} tem mais registros que o esperado. Continuar inserindo? (S/N) [N]: ")
                         
                         if resp.upper() != 'S':
                             logger.info(f"Pulando inserção na tabela {nome_tabela} por decisão do usuário")
@@ -222,28 +268,15 @@ def carregar_tabela_codigo(engine, pasta_saida, extensao_arquivo, nome_tabela):
         
         logger.info(f"Dados inseridos com sucesso em {end_time - start_time:.2f}s")
         
-        # Criar índice (verificar se já existe)
-        logger.info(f"Verificando/criando índice na tabela {nome_tabela}...")
-        start_time = time.time()
-        with engine.connect() as conn:
-            try:
-                # Verificar se o índice já existe
-                result = conn.execute(text(f"SELECT indexname FROM pg_indexes WHERE tablename = '{nome_tabela}' AND indexname = 'idx_{nome_tabela}'"))
-                
-                if result.fetchone():
-                    logger.info(f"Índice idx_{nome_tabela} já existe, pulando...")
-                else:
-                    # Criar índice se não existir
-                    conn.execute(text(f'CREATE INDEX idx_{nome_tabela} ON {nome_tabela}(codigo);'))
-                    conn.commit()
-                    logger.info(f"Índice idx_{nome_tabela} criado com sucesso")
-                    
-            except Exception as e:
-                logger.warning(f"Erro ao verificar/criar índice: {str(e)}")
-                logger.info("Continuando sem criar índice...")
-                
-        end_time = time.time()
-        logger.info(f"Processamento de índice concluído em {end_time - start_time:.2f}s")
+        conn = engine.raw_connection()
+        try:
+            with conn.cursor() as cursor:
+                manifesto_carga.registrar_concluido(cursor, nome_tabela, nome_arquivo, tamanho_arquivo, mtime, len(dtab))
+            conn.commit()
+        finally:
+            conn.close()
+        
+        # O índice idx_{nome_tabela} é criado junto com os demais ao final (ver indices_cnpj.py)
         
         # Verificar dados inseridos
         with engine.connect() as conn:
@@ -264,96 +297,56 @@ def carregar_tabela_codigo(engine, pasta_saida, extensao_arquivo, nome_tabela):
         logger.error(f"Erro ao carregar tabela {nome_tabela}: {str(e)}")
         raise
 
-def carregar_tabela_principal(engine, engine_url, pasta_saida, nome_tabela, extensao, colunas):
-    """Carrega uma tabela principal usando Dask para melhor performance"""
+def carregar_tabela_principal(engine, config, pasta_saida, nome_tabela, layout):
+    """Carrega uma tabela principal via COPY, com os arquivos em paralelo"""
     try:
-        arquivos = list(glob.glob(os.path.join(pasta_saida, f'*{extensao}')))
+        arquivos = fontes_dados.listar_fontes(pasta_saida, layout.extensao)
         logger.info(f"Encontrados {len(arquivos)} arquivos para tabela {nome_tabela}")
         
-        total_registros = 0
+        for arquivo in arquivos:
+            nome_arquivo, tamanho_arquivo, _ = fontes_dados.identificar_fonte(arquivo)
+            logger.info(f"  - {nome_arquivo} ({tamanho_arquivo / (1024 * 1024):.2f} MB)")
         
-        for i, arquivo in enumerate(arquivos, 1):
-            logger.info(f"Processando arquivo {i}/{len(arquivos)}: {os.path.basename(arquivo)}")
-            
-            # Verificar tamanho do arquivo
-            tamanho_arquivo = os.path.getsize(arquivo) / (1024 * 1024)  # MB
-            logger.info(f"Tamanho do arquivo: {tamanho_arquivo:.2f} MB")
-            
-            # Ler CSV com Dask
-            logger.info("Lendo CSV com Dask...")
-            start_time = time.time()
-            ddf = dd.read_csv(
-                arquivo, 
-                sep=';', 
-                header=None, 
-                names=colunas, 
-                encoding='latin1', 
-                dtype=str, 
-                na_filter=None
-            )
-            end_time = time.time()
-            
-            logger.info(f"CSV lido com Dask em {end_time - start_time:.2f}s")
-            
-            # Verificar estrutura
-            logger.info(f"Estrutura do DataFrame: {ddf.shape}")
-            logger.info(f"Colunas: {list(ddf.columns)}")
-            
-            # Verificar se já existem dados na tabela e se estão completos
-            with engine.connect() as conn:
-                result = conn.execute(text(f'SELECT COUNT(*) as total FROM {nome_tabela}'))
-                total_existente = result.fetchone()[0]
-                
-                if total_existente > 0:
-                    # VERIFICAR SE A TABELA ESTÁ COMPLETA
-                    logger.info(f"Verificando se tabela {nome_tabela} está completa...")
-                    
-                    # Contar registros esperados do arquivo CSV
-                    registros_esperados = ddf.shape[0].compute()
-                    logger.info(f"Registros esperados do arquivo: {registros_esperados}")
-                    logger.info(f"Registros existentes no banco: {total_existente}")
-                    
-                    if total_existente >= registros_esperados:
-                        logger.info(f"✓ Tabela {nome_tabela} já está completa ({total_existente}/{registros_esperados}), pulando inserção...")
-                        continue
-                    else:
-                        logger.info(f"⚠ Tabela {nome_tabela} incompleta ({total_existente}/{registros_esperados}), inserindo dados faltantes...")
-                        # Continuar para inserir apenas o que falta
+        # Verificar no manifesto os arquivos já concluídos (retomada de execução anterior)
+        conn = engine.raw_connection()
+        try:
+            manifesto_carga.criar_manifesto(conn, carga_unlogged.unlogged_ativo(config))
+            concluidos = manifesto_carga.listar_concluidos(conn, nome_tabela)
+        finally:
+            conn.close()
+        
+        pendentes = []
+        linhas_concluidas = 0
+        for arquivo in arquivos:
+            nome_arquivo, tamanho, mtime = fontes_dados.identificar_fonte(arquivo)
+            registro = concluidos.get(nome_arquivo)
+            if registro and registro[:2] == (tamanho, mtime):
+                logger.info(f"✓ {nome_arquivo} já carregado ({registro[2]} registros), pulando...")
+                linhas_concluidas += registro[2]
+            else:
+                pendentes.append(arquivo)
         
-        # Inserir dados
-        logger.info("Inserindo dados no banco...")
-        start_time = time.time()
-        ddf.to_sql(
-            nome_tabela, 
-            engine_url, 
-            index=None, 
-            if_exists='append',
-            dtype=sqlalchemy.sql.sqltypes.String
-        )
-        end_time = time.time()
+        if not pendentes:
+            logger.info(f"✓ Tabela {nome_tabela} já está completa ({linhas_concluidas} registros), pulando inserção...")
+            return linhas_concluidas
         
-        logger.info(f"Dados inseridos em {end_time - start_time:.2f}s")
+        # Inserir dados via COPY, um processo por arquivo (arquivos parciais continuam do último bloco)
+        # ou em pipeline leitura -> transformação -> escrita
+        logger.info(f"Inserindo {len(pendentes)} arquivo(s) no banco via COPY...")
+        if pipeline_carga.pipeline_ativo(config):
+            total_inserido = linhas_concluidas + pipeline_carga.carregar_arquivos_pipeline(config, pendentes, nome_tabela, layout)
+        else:
+            total_inserido = linhas_concluidas + carga_paralela.carregar_arquivos_paralelo(config, pendentes, nome_tabela, layout)
         
-        # Verificar registros inseridos e comparar com esperado
+        # Verificar registros inseridos
         with engine.connect() as conn:
             result = conn.execute(text(f'SELECT COUNT(*) as total FROM {nome_tabela}'))
-            total_atual = result.fetchone()[0]
-        
-        registros_arquivo = total_atual - total_registros
-        total_registros = total_atual
-        
-        # Contar registros esperados do arquivo para comparação
-        registros_esperados = ddf.shape[0].compute()
-        
-        logger.info(f"Registros inseridos deste arquivo: {registros_arquivo}")
-        logger.info(f"Total acumulado na tabela {nome_tabela}: {total_registros}")
-        logger.info(f"Registros esperados do arquivo: {registros_esperados}")
+            total_registros = result.fetchone()[0]
         
-        # Verificar se há diferença (similar às tabelas de códigos)
-        if total_registros != registros_esperados:
-            logger.warning(f"⚠ Diferença no número de registros: esperado {registros_esperados}, inserido {total_registros}")
+        if total_registros != total_inserido:
+            logger.warning(f"⚠ Diferença no número de registros: esperado {total_inserido}, encontrado {total_registros}")
         else:
-            logger.info(f"✓ Contagem de registros confere: {total_registros}/{registros_esperados}")
+            logger.info(f"✓ Contagem de registros confere: {total_registros}")
         
         logger.info(f"✓ Tabela {nome_tabela} carregada com sucesso. Total: {total_registros} registros")
         return total_registros
@@ -362,58 +355,20 @@ def carregar_tabela_principal(engine, engine_url, pasta_saida, nome_tabela, exte
         logger.error(f"Erro ao carregar tabela {nome_tabela}: {str(e)}")
         raise
 
-def executar_sqls_finais(engine):
-    """Executa os SQLs finais para otimização e criação de índices"""
-    logger.info("Executando SQLs finais de otimização...")
-    
-    sqls = '''
-    ALTER TABLE empresas ADD COLUMN capital_social DECIMAL(18,2);
-    UPDATE empresas SET capital_social = CAST(REPLACE(capital_social_str,',', '.') AS DECIMAL(18,2));
-    ALTER TABLE empresas DROP COLUMN capital_social_str;
-    
-    ALTER TABLE estabelecimento ADD COLUMN cnpj VARCHAR(14);
-    UPDATE estabelecimento SET cnpj = CONCAT(cnpj_basico, cnpj_ordem, cnpj_dv);
-    
-    CREATE INDEX idx_estabelecimento_cnpj ON estabelecimento (cnpj);
-    CREATE INDEX idx_empresas_cnpj_basico ON empresas (cnpj_basico);
-    CREATE INDEX idx_empresas_razao_social ON empresas (razao_social);
-    CREATE INDEX idx_estabelecimento_cnpj_basico ON estabelecimento (cnpj_basico);
-    
-    CREATE INDEX idx_socios_original_cnpj_basico ON socios_original(cnpj_basico);
-    
-    DROP TABLE IF EXISTS socios;
-    CREATE TABLE socios AS 
-    SELECT te.cnpj as cnpj, ts.*
-    FROM socios_original ts
-    LEFT JOIN estabelecimento te ON te.cnpj_basico = ts.cnpj_basico
-    WHERE te.matriz_filial='1';
-    
-    DROP TABLE IF EXISTS socios_original;
-    
-    CREATE INDEX idx_socios_cnpj ON socios(cnpj);
-    CREATE INDEX idx_socios_cnpj_basico ON socios(cnpj_basico);
-    CREATE INDEX idx_socios_cnpj_cpf_socio ON socios(cnpj_cpf_socio);
-    CREATE INDEX idx_socios_nome_socio ON socios(nome_socio);
-    
-    CREATE INDEX idx_simples_cnpj_basico ON simples(cnpj_basico);
-    
-    DROP TABLE IF EXISTS _referencia;
-    CREATE TABLE _referencia (
-        referencia VARCHAR(100),
-        valor VARCHAR(100)
-    );
-    '''
+def executar_comandos_sql(engine, sqls, descricao):
+    """Executa uma sequência de comandos SQL separados por ';', um por conexão.
     
-    # Executar comandos SQL
+    Retorna (executados, com erro, interrompido pelo usuário).
+    """
     comandos = [cmd.strip() for cmd in sqls.split(';') if cmd.strip()]
-    logger.info(f"Total de comandos SQL finais: {len(comandos)}")
+    logger.info(f"Total de comandos SQL ({descricao}): {len(comandos)}")
     
     comandos_executados = 0
     comandos_com_erro = 0
     
     for i, comando in enumerate(comandos, 1):
         try:
-            logger.info(f"Executando comando final {i}/{len(comandos)}")
+            logger.info(f"Executando comando {i}/{len(comandos)} ({descricao})")
             logger.debug(f"SQL: {comando[:100]}...")
             
             start_time = time.time()
@@ -432,10 +387,68 @@ def executar_sqls_finais(engine):
             comandos_com_erro += 1
             
             # Perguntar se deve continuar
-            resp = input(f"Erro no comando {i}. Deseja continuar? (S/N): ")
+            resp = perguntar(f"Erro no comando {i}. Deseja continuar? (S/N): ")
             if resp.upper() != 'S':
                 logger.error("Execução interrompida pelo usuário")
-                break
+                return comandos_executados, comandos_com_erro, True
+    
+    return comandos_executados, comandos_com_erro, False
+
+def executar_sqls_finais(engine, config):
+    """Monta a tabela socios e constrói os índices em paralelo.
+    
+    As colunas derivadas (estabelecimento.cnpj e empresas.capital_social) já são
+    calculadas durante a carga (ver layout_cnpj.py).
+    """
+    logger.info("Executando SQLs finais de otimização...")
+    
+    sqls_referencia = '''
+    DROP TABLE IF EXISTS _referencia;
+    CREATE TABLE _referencia (
+        referencia VARCHAR(100),
+        valor VARCHAR(100)
+    );
+    '''
+    
+    comandos_executados = 0
+    comandos_com_erro = 0
+    
+    # Índices de busca por trecho de nome (ver busca_cnpj.py), junto com os demais
+    indices_busca = []
+    if busca_cnpj.busca_ativa(config):
+        try:
+            schema_trgm = busca_cnpj.preparar_busca(config)
+            indices_busca = busca_cnpj.indices_busca(schema_trgm, {'empresas', 'estabelecimento', 'socios'})
+        except Exception as e:
+            comandos_com_erro += 1
+            logger.error(f"✗ Erro ao preparar a busca textual (pg_trgm/unaccent): {str(e)}")
+    
+    # Etapas em ordem: cada uma depende da anterior. Os índices de cada etapa são
+    # independentes entre si e construídos em paralelo.
+    etapas = [
+        ('indices', indices_cnpj.INDICES_CODIGO + indices_cnpj.INDICES_CARGA
+                    + [indice for indice in indices_busca if indice.tabela != 'socios'], 'índices das tabelas carregadas'),
+        ('socios', None, 'tabela socios'),
+        ('indices', indices_cnpj.INDICES_SOCIOS
+                    + [indice for indice in indices_busca if indice.tabela == 'socios'], 'índices da tabela socios'),
+        ('sql', sqls_referencia, 'tabela de referência'),
+    ]
+    
+    for tipo, conteudo, descricao in etapas:
+        if tipo == 'indices':
+            executados, com_erro = indices_cnpj.construir_indices(config, conteudo, descricao)
+            interrompido = False
+        elif tipo == 'socios':
+            # Em faixas de cnpj_basico, em paralelo (ver socios_cnpj.py)
+            executados, com_erro = socios_cnpj.construir_socios(config)
+            interrompido = False
+        else:
+            executados, com_erro, interrompido = executar_comandos_sql(engine, conteudo, descricao)
+        
+        comandos_executados += executados
+        comandos_com_erro += com_erro
+        if interrompido:
+            break
     
     logger.info(f"SQLs finais: {comandos_executados} executados, {comandos_com_erro} com erro")
     return comandos_executados, comandos_com_erro
@@ -446,17 +459,7 @@ def inserir_dados_referencia(engine, pasta_saida):
         logger.info("Inserindo dados de referência...")
         
         # Determinar data de referência
-        arquivos_empresas = glob.glob(os.path.join(pasta_saida, '*.EMPRECSV'))
-        if arquivos_empresas:
-            nome_arquivo = os.path.basename(arquivos_empresas[0])
-            data_referencia = nome_arquivo.split('.')[2]  # formato DAMMDD
-            
-            if len(data_referencia) == len('D30610') and data_referencia.startswith('D'):
-                data_referencia = data_referencia[4:6] + '/' + data_referencia[2:4] + '/202' + data_referencia[1]
-            else:
-                data_referencia = 'dd/mm/2025'
-        else:
-            data_referencia = 'dd/mm/2025'
+        data_referencia = fontes_dados.obter_data_referencia(pasta_saida)
         
         logger.info(f"Data de referência: {data_referencia}")
         
@@ -488,7 +491,7 @@ def verificar_integridade_dados(engine):
             # Contar registros em cada tabela (incluindo tabelas finais)
             tabelas = [
                 # Tabelas principais
-                'empresas', 'estabelecimento', 'simples',
+                'empresas', 'estabelecimento', 'estabelecimento_cnae_secundaria', 'simples',
                 # Tabelas de códigos
                 'cnae', 'motivo', 'municipio', 'natureza_juridica', 'pais', 'qualificacao_socio',
                 # Tabelas finais (criadas durante otimização)
@@ -541,30 +544,58 @@ def main():
         logger.info("INICIANDO SCRIPT DE INSERÇÃO DE DADOS CNPJ")
         logger.info("=" * 60)
         
-        # Verificar pasta de dados
-        pasta_saida, arquivos_csv = verificar_pasta_dados()
-        
         # Obter configuração do banco
         config = obter_configuracao_banco()
-        logger.info(f"Configuração: tipo_banco={config['tipo_banco']}, dbname={config['dbname']}, username={config['username']}, host={config['host']}")
+        logger.info(f"Configuração: tipo_banco={config['tipo_banco']}, dbname={config['dbname']}, username={config.get('username')}, host={config.get('host')}")
+        
+        # Verificar pasta de dados
+        pasta_saida, arquivos_csv = verificar_pasta_dados(config)
         
         # Confirmar execução
         print(f"\nEste script irá INSERIR DADOS nas tabelas do banco {config['dbname'].upper()}")
-        print(f"no servidor {config['tipo_banco']} {config['host']}")
+        print(f"no servidor {config['tipo_banco']} {config.get('host', '')}")
         print(f"Arquivos a processar: {len(arquivos_csv)}")
         print("✅ Prosseguindo automaticamente...")
         
-        # Conectar ao banco
-        engine, engine_url = conectar_banco(config)
+        # Banco embarcado (DuckDB/SQLite): carga em massa no arquivo local (ver banco_embarcado.py)
+        if banco_embarcado.embarcado_ativo(config):
+            data_referencia, totais, comandos_com_erro = banco_embarcado.carregar(config, pasta_saida)
+            logger.info("\n" + "="*60)
+            logger.info("RESUMO DA INSERÇÃO DE DADOS")
+            logger.info("="*60)
+            logger.info(f"Tipo de banco: {config['tipo_banco']} ({banco_embarcado.caminho_banco(config)})")
+            logger.info(f"Data de referência: {data_referencia}")
+            for tabela, total in totais.items():
+                logger.info(f"  ✓ {tabela}: {total} registros")
+            if comandos_com_erro:
+                logger.warning(f"\n⚠ INSERÇÃO CONCLUÍDA COM {comandos_com_erro} ERRO(S)")
+            else:
+                logger.info("\n✓ INSERÇÃO DE DADOS CONCLUÍDA COM SUCESSO!")
+            return
         
-        # Definir colunas das tabelas
-        colunas_estabelecimento = ['cnpj_basico','cnpj_ordem', 'cnpj_dv','matriz_filial', 'nome_fantasia', 'situacao_cadastral','data_situacao_cadastral', 'motivo_situacao_cadastral', 'nome_cidade_exterior', 'pais', 'data_inicio_atividades', 'cnae_fiscal', 'cnae_fiscal_secundaria', 'tipo_logradouro', 'logradouro', 'numero', 'complemento','bairro', 'cep','uf','municipio', 'ddd1', 'telefone1', 'ddd2', 'telefone2', 'ddd_fax', 'fax', 'correio_eletronico', 'situacao_especial', 'data_situacao_especial']
+        # Modo blue/green: carregar no schema de carga criado pelo 02_criar_tabelas.py
+        schema = None
+        if schema_carga.blue_green_ativo(config):
+            schema = schema_carga.nome_schema_carga(config)
+            schema_carga.usar_schema(config, schema)
+            logger.info(f"Modo blue/green: carga no schema {schema}, publicado ao final como {config['schema_publicado']}")
         
-        colunas_empresas = ['cnpj_basico', 'razao_social', 'natureza_juridica', 'qualificacao_responsavel', 'capital_social_str', 'porte_empresa', 'ente_federativo_responsavel']
+        # Conectar ao banco
+        engine, engine_url = conectar_banco(config)
         
-        colunas_socios = ['cnpj_basico', 'identificador_de_socio', 'nome_socio', 'cnpj_cpf_socio', 'qualificacao_socio', 'data_entrada_sociedade', 'pais', 'representante_legal', 'nome_representante', 'qualificacao_representante_legal', 'faixa_etaria']
+        if schema:
+            with engine.connect() as conn:
+                if not conn.execute(text("SELECT 1 FROM pg_namespace WHERE nspname = :schema"), {'schema': schema}).fetchone():
+                    raise RuntimeError(f"Schema de carga {schema} não existe. Execute primeiro o script 02_criar_tabelas.py")
         
-        colunas_simples = ['cnpj_basico', 'opcao_simples', 'data_opcao_simples', 'data_exclusao_simples', 'opcao_mei', 'data_opcao_mei', 'data_exclusao_mei']
+        # Modo UNLOGGED: posição do WAL no início, para informar o WAL gerado pela carga
+        wal_inicio = None
+        if carga_unlogged.unlogged_ativo(config):
+            conn = engine.raw_connection()
+            try:
+                wal_inicio = carga_unlogged.posicao_wal(conn)
+            finally:
+                conn.close()
         
         # Verificar estado atual das tabelas antes de começar
         logger.info("\n" + "="*50)
@@ -623,29 +654,32 @@ def main():
         logger.info("CARREGANDO TABELAS DE CÓDIGOS")
         logger.info("="*50)
         
-        carregar_tabela_codigo(engine, pasta_saida, '.CNAECSV', 'cnae')
-        carregar_tabela_codigo(engine, pasta_saida, '.MOTICSV', 'motivo')
-        carregar_tabela_codigo(engine, pasta_saida, '.MUNICCSV', 'municipio')
-        carregar_tabela_codigo(engine, pasta_saida, '.NATJUCSV', 'natureza_juridica')
-        carregar_tabela_codigo(engine, pasta_saida, '.PAISCSV', 'pais')
-        carregar_tabela_codigo(engine, pasta_saida, '.QUALSCSV', 'qualificacao_socio')
+        for nome_tabela, extensao in TABELAS_CODIGO.items():
+            carregar_tabela_codigo(engine, config, pasta_saida, extensao, nome_tabela)
         
         # Carregar tabelas principais
         logger.info("\n" + "="*50)
         logger.info("CARREGANDO TABELAS PRINCIPAIS")
         logger.info("="*50)
         
-        carregar_tabela_principal(engine, engine_url, pasta_saida, 'estabelecimento', '.ESTABELE', colunas_estabelecimento)
-        carregar_tabela_principal(engine, engine_url, pasta_saida, 'socios_original', '.SOCIOCSV', colunas_socios)
-        carregar_tabela_principal(engine, engine_url, pasta_saida, 'empresas', '.EMPRECSV', colunas_empresas)
-        carregar_tabela_principal(engine, engine_url, pasta_saida, 'simples', '.SIMPLES.CSV.*', colunas_simples)
+        for nome_tabela, layout in schema_tipado.obter_layouts(config).items():
+            carregar_tabela_principal(engine, config, pasta_saida, nome_tabela, layout)
         
         # Executar SQLs finais
         logger.info("\n" + "="*50)
         logger.info("EXECUTANDO OTIMIZAÇÕES FINAIS")
         logger.info("="*50)
         
-        comandos_executados, comandos_com_erro = executar_sqls_finais(engine)
+        comandos_executados, comandos_com_erro = executar_sqls_finais(engine, config)
+        
+        # Visão materializada cnpj_completo (ver cnpj_completo.py)
+        if cnpj_completo.visao_ativa(config):
+            logger.info("\n" + "="*50)
+            logger.info("CRIANDO VISÃO cnpj_completo")
+            logger.info("="*50)
+            executados, com_erro = cnpj_completo.criar_visao(config)
+            comandos_executados += executados
+            comandos_com_erro += com_erro
         
         # Inserir dados de referência
         logger.info("\n" + "="*50)
@@ -661,6 +695,31 @@ def main():
         
         verificacoes = verificar_integridade_dados(engine)
         
+        # Modo UNLOGGED: relatório de WAL e SET LOGGED (antes de publicar)
+        if carga_unlogged.unlogged_ativo(config):
+            logger.info("\n" + "="*50)
+            logger.info("FINALIZANDO TABELAS UNLOGGED")
+            logger.info("="*50)
+            comandos_com_erro += carga_unlogged.finalizar_carga(config, wal_inicio)
+        
+        # Publicar o schema de carga (troca atômica com o schema publicado)
+        if schema:
+            logger.info("\n" + "="*50)
+            logger.info("PUBLICANDO SCHEMA DE CARGA")
+            logger.info("="*50)
+            
+            if comandos_com_erro == 0:
+                conn = carga_copy.conectar_psycopg2(config)
+                try:
+                    schema_carga.publicar_schema(conn, config, schema)
+                except ValueError as e:
+                    logger.warning(f"⚠ {str(e)}")
+                finally:
+                    conn.close()
+            else:
+                logger.warning(f"⚠ Schema {schema} não publicado por causa dos erros acima. "
+                               f"Após corrigir, publique com: python schema_carga.py --publicar")
+        
         # Resumo final
         logger.info("\n" + "="*60)
         logger.info("RESUMO DA INSERÇÃO DE DADOS")
@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""
+Banco Embarcado: DuckDB ou SQLite
+=================================
+
+Com tipo_banco "duckdb" ou "sqlite" no cnpj_config.json, o 02_criar_tabelas.py
+e o 03_inserir_dados.py usam um arquivo de banco local em vez de um servidor
+PostgreSQL, para ambientes sem servidor (máquinas de borda, CI, notebooks):
+
+    {"tipo_banco": "duckdb", "dbname": "cnpjbr"}      ->  cnpjbr.duckdb
+
+As tabelas são as mesmas do 02_criar_tabelas.py (inclusive com schema_tipado),
+assim como a tabela socios, a estabelecimento_cnae_secundaria, a _referencia e
+os índices de indices_cnpj.py. A carga usa o caminho em massa de cada banco:
+
+    - DuckDB: INSERT ... SELECT FROM read_csv(...) com todas as colunas como
+      VARCHAR e as conversões (cnpj, capital_social, datas e códigos do schema
+      tipado) em SQL. Os arquivos de uma tabela são lidos em um único comando,
+      em paralelo pelo próprio DuckDB. Membros de ZIP são descompactados antes
+      em um arquivo temporário, um de cada vez.
+    - SQLite: leitura em fluxo (carga_copy.LeitorRegistros) com a transformação
+      do layout e executemany em blocos de LINHAS_POR_BLOCO linhas, uma
+      transação por arquivo, com journal_mode=OFF e synchronous=OFF. Uma queda
+      no meio da carga pode corromper o arquivo: basta recriá-lo.
+
+No SQLite as datas do schema tipado são gravadas como 'AAAA-MM-DD', o formato
+das funções de data do SQLite.
+
+Particionamento, UNLOGGED, blue/green, busca textual e cnpj_completo são
+recursos do PostgreSQL e são ignorados aqui. O benchmark_embarcado.py compara a
+carga nos dois bancos com uma amostra dos arquivos.
+
+Uso direto (cria as tabelas e carrega, sem passar pelos scripts 02 e 03):
+    python banco_embarcado.py
+
+Requer o pacote duckdb para tipo_banco "duckdb" (opcional; sqlite3 faz parte do Python).
+
+Configurações opcionais no cnpj_config.json:
+    arquivo_banco: caminho do arquivo do banco (padrão: <dbname>.duckdb ou <dbname>.sqlite)
+    embarcado_memoria_mb: memory_limit do DuckDB / cache do SQLite (padrão: 25% da memória disponível)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import logging
+import tempfile
+import argparse
+import importlib
+from contextlib import contextmanager
+
+import psutil
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+import carga_copy
+import fontes_dados
+import indices_cnpj
+import schema_tipado
+import socios_cnpj
+from layout_cnpj import TABELAS_PRINCIPAIS, TABELAS_CODIGO
+
+logger = logging.getLogger(__name__)
+
+TIPOS_EMBARCADOS = ('duckdb', 'sqlite')
+
+# Colunas calculadas na carga, equivalentes às transformações de layout_cnpj.py
+EXPRESSOES_DUCKDB = {
+    ('estabelecimento', 'cnpj'): "cnpj_basico || cnpj_ordem || cnpj_dv",
+    ('empresas', 'capital_social'): "CAST(NULLIF(replace(capital_social_str, ',', '.'), '') AS DECIMAL(18,2))",
+}
+
+SQL_CNAE_SECUNDARIA_DUCKDB = '''
+    INSERT INTO estabelecimento_cnae_secundaria (cnpj, cnae)
+    SELECT DISTINCT cnpj, cnae FROM (
+        SELECT cnpj, unnest(string_split(cnae_fiscal_secundaria, ',')) AS cnae FROM estabelecimento
+    ) WHERE regexp_full_match(cnae, '[0-9]+')
+'''
+
+def embarcado_ativo(config):
+    """Indica se a configuração usa um banco embarcado (DuckDB ou SQLite)"""
+    return config.get('tipo_banco') in TIPOS_EMBARCADOS
+
+def caminho_banco(config):
+    return config.get('arquivo_banco') or f"{config.get('dbname', 'cnpjbr')}.{config['tipo_banco']}"
+
+def memoria_mb(config):
+    return config.get('embarcado_memoria_mb') or max(256, int(psutil.virtual_memory().available * 0.25 / (1024 * 1024)))
+
+def conectar(config):
+    """Abre o arquivo do banco embarcado, configurado para carga em massa"""
+    caminho = caminho_banco(config)
+    if config['tipo_banco'] == 'duckdb':
+        if duckdb is None:
+            raise RuntimeError("duckdb não instalado: pip install duckdb")
+        conn = duckdb.connect(caminho)
+        conn.execute(f"SET memory_limit = '{memoria_mb(config)}MB'")
+        # Sem manter a ordem de inserção, o INSERT ... SELECT usa menos memória
+        conn.execute("SET preserve_insertion_order = false")
+        return conn
+
+    conn = sqlite3.connect(caminho)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute(f"PRAGMA cache_size = -{memoria_mb(config) * 1024}")
+    return conn
+
+def comandos_ddl(sql_criacao):
+    """Comandos do DDL do 02_criar_tabelas.py aceitos pelos bancos embarcados (sem COMMENT ON)"""
+    sql = re.sub(r'--[^\n]*', '', sql_criacao)
+    return [comando.strip() for comando in sql.split(';')
+            if comando.strip() and not comando.strip().startswith('COMMENT ON')]
+
+def criar_tabelas(config, sql_criacao):
+    """Cria (ou recria) as tabelas no banco embarcado. Retorna (comandos executados, comandos com erro)"""
+    executados = com_erro = 0
+    conn = conectar(config)
+    try:
+        for comando in comandos_ddl(sql_criacao):
+            try:
+                conn.execute(comando)
+                executados += 1
+            except Exception as e:
+                com_erro += 1
+                logger.error(f"✗ Erro no comando {comando.splitlines()[0]}: {str(e)}")
+        conn.commit()
+    finally:
+        conn.close()
+    logger.info(f"✓ Tabelas criadas em {caminho_banco(config)} ({config['tipo_banco']}): "
+                f"{executados} comandos, {com_erro} com erro")
+    return executados, com_erro
+
+def contar(conn, tabela):
+    return conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+
+def carregar_tabela_codigo(conn, config, pasta, extensao, nome_tabela):
+    """Carrega uma tabela de códigos (poucos milhares de linhas) com executemany"""
+    converter = schema_tipado.CONVERSORES.get(schema_tipado.tipo_coluna(config, nome_tabela, 'codigo', None))
+    with fontes_dados.abrir_fonte(fontes_dados.listar_fontes(pasta, extensao)[0]) as arquivo_bin:
+        linhas = [
+            (converter(codigo) if converter else codigo, descricao)
+            for codigo, descricao in carga_copy.LeitorRegistros(arquivo_bin)
+        ]
+    conn.execute(f"DELETE FROM {nome_tabela}")
+    conn.executemany(f"INSERT INTO {nome_tabela} (codigo, descricao) VALUES (?, ?)", linhas)
+    conn.commit()
+    return len(linhas)
+
+def expressao_duckdb(config, nome_tabela, coluna):
+    """Expressão SQL que calcula e converte uma coluna de destino a partir das colunas VARCHAR do arquivo"""
+    expressao = EXPRESSOES_DUCKDB.get((nome_tabela, coluna), coluna)
+    tipo = schema_tipado.tipo_coluna(config, nome_tabela, coluna, None)
+    if tipo is None:
+        return expressao
+    if tipo == 'DATE':
+        return f"TRY_STRPTIME({expressao}, '%Y%m%d')::DATE"
+    return f"TRY_CAST({expressao} AS {tipo})"
+
+@contextmanager
+def arquivo_local(fonte):
+    """Caminho em disco da fonte (membros de ZIP são descompactados em um arquivo temporário)"""
+    if not fontes_dados.e_membro_zip(fonte):
+        yield fonte
+        return
+    fd, caminho = tempfile.mkstemp(suffix='.csv')
+    try:
+        with fontes_dados.abrir_fonte(fonte) as origem, os.fdopen(fd, 'wb') as destino:
+            shutil.copyfileobj(origem, destino, 16 * 1024 * 1024)
+        yield caminho
+    finally:
+        os.remove(caminho)
+
+def inserir_csv_duckdb(conn, config, arquivos, nome_tabela, layout):
+    """INSERT ... SELECT FROM read_csv de uma lista de arquivos em disco"""
+    lista = ', '.join("'" + arquivo.replace("'", "''") + "'" for arquivo in arquivos)
+    colunas = ', '.join(f"'{coluna}': 'VARCHAR'" for coluna in layout.colunas)
+    conn.execute(f'''
+        INSERT INTO {nome_tabela} ({', '.join(layout.colunas_destino)})
+        SELECT {', '.join(expressao_duckdb(config, nome_tabela, coluna) for coluna in layout.colunas_destino)}
+        FROM read_csv([{lista}], delim = ';', quote = '"', escape = '"', header = false,
+                      encoding = 'latin-1', columns = {{{colunas}}}, allow_quoted_nulls = false)
+    ''')
+
+def carregar_tabela_duckdb(conn, config, fontes, nome_tabela, layout):
+    """Carrega os arquivos de uma tabela no DuckDB: os soltos em um só comando, os de ZIP um a um"""
+    soltos = [fonte for fonte in fontes if not fontes_dados.e_membro_zip(fonte)]
+    if soltos:
+        inserir_csv_duckdb(conn, config, soltos, nome_tabela, layout)
+    for fonte in fontes:
+        if fontes_dados.e_membro_zip(fonte):
+            with arquivo_local(fonte) as caminho:
+                inserir_csv_duckdb(conn, config, [caminho], nome_tabela, layout)
+    if layout.filhas:
+        conn.execute(SQL_CNAE_SECUNDARIA_DUCKDB)
+
+def sql_insert(nome_tabela, colunas):
+    return f"INSERT INTO {nome_tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})"
+
+def carregar_arquivo_sqlite(conn, fonte, nome_tabela, layout, indices_datas):
+    """Carrega um arquivo no SQLite em blocos de executemany, em uma única transação"""
+    sql = sql_insert(nome_tabela, layout.colunas_destino)
+    sqls_filhas = [sql_insert(filha.nome, filha.colunas) for filha in layout.filhas]
+    bloco = []
+    blocos_filhas = [[] for _ in layout.filhas]
+
+    def gravar():
+        conn.executemany(sql, bloco)
+        for sql_filha, linhas in zip(sqls_filhas, blocos_filhas):
+            conn.executemany(sql_filha, linhas)
+            linhas.clear()
+        bloco.clear()
+
+    with fontes_dados.abrir_fonte(fonte) as arquivo_bin:
+        for campos in carga_copy.LeitorRegistros(arquivo_bin):
+            campos = layout.transformar(campos)
+            for filha, linhas in zip(layout.filhas, blocos_filhas):
+                linhas.extend(filha.extrair(campos))
+            for indice in indices_datas:
+                if campos[indice]:
+                    data = campos[indice]
+                    campos[indice] = f'{data[:4]}-{data[4:6]}-{data[6:]}'
+            bloco.append(campos)
+            if len(bloco) >= carga_copy.LINHAS_POR_BLOCO:
+                gravar()
+    gravar()
+    conn.commit()
+
+def carregar_tabela_sqlite(conn, config, fontes, nome_tabela, layout):
+    tipos = schema_tipado.TIPOS_COLUNAS.get(nome_tabela, {}) if schema_tipado.tipado_ativo(config) else {}
+    indices_datas = [indice for indice, coluna in enumerate(layout.colunas_destino) if tipos.get(coluna) == 'DATE']
+    for fonte in fontes:
+        start_time = time.time()
+        carregar_arquivo_sqlite(conn, fonte, nome_tabela, layout, indices_datas)
+        logger.info(f"✓ {fontes_dados.nome_fonte(fonte)} carregado em {time.time() - start_time:.2f}s")
+
+def construir_indices(conn):
+    """Cria os índices btree de indices_cnpj.py (os demais métodos são do PostgreSQL)"""
+    executados = com_erro = 0
+    for indice in indices_cnpj.INDICES_CODIGO + indices_cnpj.INDICES_CARGA:
+        if indice.metodo != 'btree':
+            continue
+        start_time = time.time()
+        try:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {indice.nome} ON {indice.tabela} ({indice.expressao})")
+            conn.commit()
+            executados += 1
+            logger.info(f"✓ Índice {indice.nome} criado em {time.time() - start_time:.2f}s")
+        except Exception as e:
+            com_erro += 1
+            logger.error(f"✗ Erro ao criar o índice {indice.nome}: {str(e)}")
+    return executados, com_erro
+
+def montar_socios(conn):
+    """Monta a tabela socios (cnpj da matriz + socios_original) e remove a socios_original"""
+    conn.execute("DROP TABLE IF EXISTS socios")
+    conn.execute(f"CREATE TABLE socios AS {socios_cnpj.SQL_SELECT_SOCIOS}")
+    conn.execute("DROP TABLE socios_original")
+    conn.commit()
+
+def carregar(config, pasta):
+    """Carrega os arquivos da pasta nas tabelas criadas pelo 02_criar_tabelas.py.
+
+    Retorna (data de referência, {tabela: registros}, comandos com erro).
+    """
+    tipo_banco = config['tipo_banco']
+    conn = conectar(config)
+    com_erro = 0
+    start_time = time.time()
+    try:
+        logger.info(f"Carregando tabelas de códigos em {caminho_banco(config)} ({tipo_banco})...")
+        for nome_tabela, extensao in TABELAS_CODIGO.items():
+            logger.info(f"✓ {nome_tabela}: {carregar_tabela_codigo(conn, config, pasta, extensao, nome_tabela):,} registros")
+
+        carregar_tabela = carregar_tabela_duckdb if tipo_banco == 'duckdb' else carregar_tabela_sqlite
+        # Mesma estrutura e conversões do schema configurado (ver schema_tipado.py)
+        layouts = schema_tipado.obter_layouts(config) if tipo_banco == 'sqlite' else TABELAS_PRINCIPAIS
+        for nome_tabela, layout in layouts.items():
+            fontes = fontes_dados.listar_fontes(pasta, layout.extensao)
+            tabela_start = time.time()
+            for tabela in (nome_tabela,) + tuple(filha.nome for filha in layout.filhas):
+                conn.execute(f"DELETE FROM {tabela}")
+            carregar_tabela(conn, config, fontes, nome_tabela, layout)
+            conn.commit()
+            duracao = time.time() - tabela_start
+            total = contar(conn, nome_tabela)
+            logger.info(f"✓ {nome_tabela}: {total:,} registros de {len(fontes)} arquivos em {duracao:.2f}s "
+                        f"({total / duracao if duracao else 0:,.0f} linhas/s)")
+
+        logger.info("Criando índices...")
+        com_erro += construir_indices(conn)[1]
+
+        logger.info("Montando a tabela socios...")
+        montar_socios(conn)
+        for indice in indices_cnpj.INDICES_SOCIOS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {indice.nome} ON {indice.tabela} ({indice.expressao})")
+        conn.commit()
+
+        data_referencia = fontes_dados.obter_data_referencia(pasta)
+        conn.execute("DROP TABLE IF EXISTS _referencia")
+        conn.execute("CREATE TABLE _referencia (referencia VARCHAR(100), valor VARCHAR(100))")
+        conn.executemany("INSERT INTO _referencia (referencia, valor) VALUES (?, ?)",
+                         [('CNPJ', data_referencia), ('cnpj_qtde', str(contar(conn, 'estabelecimento')))])
+        conn.commit()
+
+        if tipo_banco == 'sqlite':
+            conn.execute("ANALYZE")
+        totais = {
+            tabela: contar(conn, tabela)
+            for tabela in ['empresas', 'estabelecimento', 'estabelecimento_cnae_secundaria', 'simples', 'socios']
+                          + list(TABELAS_CODIGO)
+        }
+    finally:
+        conn.close()
+
+    logger.info(f"✓ Carga em {caminho_banco(config)} concluída em {time.time() - start_time:.2f}s "
+                f"({os.path.getsize(caminho_banco(config)) / (1024 * 1024):,.0f} MB)")
+    return data_referencia, totais, com_erro
+
+def main():
+    """Cria as tabelas e carrega os arquivos no banco embarcado configurado"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Cria e carrega a base CNPJ em DuckDB ou SQLite')
+    parser.add_argument('--tipo', choices=TIPOS_EMBARCADOS, help='Banco (padrão: tipo_banco do cnpj_config.json)')
+    parser.add_argument('--arquivo', help='Arquivo do banco (padrão: arquivo_banco ou <dbname>.<tipo>)')
+    args = parser.parse_args()
+
+    config = {}
+    if os.path.exists('cnpj_config.json'):
+        with open('cnpj_config.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    if args.tipo:
+        config['tipo_banco'] = args.tipo
+    if args.arquivo:
+        config['arquivo_banco'] = args.arquivo
+    if not embarcado_ativo(config):
+        print(f"❌ Informe --tipo {' ou '.join(TIPOS_EMBARCADOS)} (ou tipo_banco no cnpj_config.json)")
+        sys.exit(1)
+
+    criar_tabelas_cnpj = importlib.import_module('02_criar_tabelas')
+    _, com_erro = criar_tabelas(config, criar_tabelas_cnpj.obter_sql_criacao_tabelas(
+        tipado=schema_tipado.tipado_ativo(config)))
+    if com_erro:
+        sys.exit(1)
+    _, totais, com_erro = carregar(config, fontes_dados.pasta_dados(config))
+    for tabela, total in totais.items():
+        logger.info(f"  {tabela:32}: {total:>12,} registros")
+    sys.exit(1 if com_erro else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de Carga: COPY x Dask to_sql
+======================================
+
+Compara a vazão (linhas/s) da carga via COPY (carga_copy.py) com a carga
+antiga via Dask to_sql, usando uma amostra de um arquivo da Receita.
+
+Cada método carrega a mesma amostra em uma tabela temporária, removida ao
+final. A tabela do COPY é criada com CREATE TABLE ... (LIKE tabela), e a
+amostra passa pelas mesmas conversões da carga (inclusive as do schema tipado).
+
+Com --parsers python pyarrow, o COPY é medido com cada leitor dos arquivos
+(csv.reader e pyarrow.csv, ver parser_arrow.py).
+
+Uso:
+    python benchmark_carga.py --tabela estabelecimento --linhas 200000
+    python benchmark_carga.py --parsers python pyarrow --sem-dask
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import tempfile
+import sqlalchemy
+from sqlalchemy import text
+
+import carga_copy
+import schema_tipado
+from layout_cnpj import TABELAS_PRINCIPAIS
+
+def carregar_configuracao():
+    """Carrega a configuração do banco do arquivo cnpj_config.json"""
+    if not os.path.exists('cnpj_config.json'):
+        print("❌ Arquivo de configuração 'cnpj_config.json' não encontrado!")
+        sys.exit(1)
+    with open('cnpj_config.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def criar_amostra(arquivo, linhas):
+    """Copia as primeiras linhas de um arquivo para um arquivo temporário"""
+    fd, caminho = tempfile.mkstemp(suffix='.csv')
+    total = 0
+    with open(arquivo, 'rb') as origem, os.fdopen(fd, 'wb') as destino:
+        for linha in origem:
+            destino.write(linha)
+            total += 1
+            if total >= linhas:
+                break
+    return caminho, total
+
+def recriar_tabela(engine, tabela_bench, nome_tabela):
+    """Cria uma tabela vazia com a mesma estrutura da tabela de destino"""
+    with engine.connect() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS {tabela_bench}'))
+        conn.execute(text(f'CREATE TABLE {tabela_bench} (LIKE {nome_tabela})'))
+        conn.commit()
+
+def remover_tabela(engine, tabela_bench):
+    with engine.connect() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS {tabela_bench}'))
+        conn.commit()
+
+def medir_copy(engine, amostra, tabela_bench, layout, parser=carga_copy.PARSER_PYTHON):
+    """Carrega a amostra via COPY e retorna a duração em segundos"""
+    conn = engine.raw_connection()
+    try:
+        start_time = time.time()
+        carga_copy.carregar_arquivo_copy(conn, amostra, tabela_bench, layout, usar_manifesto=False, parser=parser)
+        return time.time() - start_time
+    finally:
+        conn.close()
+
+def medir_dask(engine_url, amostra, tabela_bench, colunas):
+    """Carrega a amostra via Dask to_sql (método anterior) e retorna a duração em segundos.
+
+    A tabela é criada pelo próprio to_sql com as colunas do arquivo, como era feito antes.
+    """
+    import dask.dataframe as dd
+
+    start_time = time.time()
+    ddf = dd.read_csv(amostra, sep=';', header=None, names=colunas, encoding='latin1', dtype=str, na_filter=None)
+    ddf.to_sql(tabela_bench, engine_url, index=None, if_exists='append', dtype=sqlalchemy.sql.sqltypes.String)
+    return time.time() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara a carga via COPY com a carga via Dask to_sql')
+    parser.add_argument('--tabela', default='estabelecimento', choices=sorted(TABELAS_PRINCIPAIS))
+    parser.add_argument('--arquivo', help='Arquivo de origem (padrão: primeiro arquivo da tabela em dados-publicos)')
+    parser.add_argument('--linhas', type=int, default=200000, help='Linhas da amostra')
+    parser.add_argument('--sem-dask', action='store_true', help='Mede apenas o COPY')
+    parser.add_argument('--parsers', nargs='+', choices=[carga_copy.PARSER_PYTHON, carga_copy.PARSER_PYARROW],
+                        default=[carga_copy.PARSER_PYTHON], help='Leitores dos arquivos medidos no COPY')
+    args = parser.parse_args()
+
+    config = carregar_configuracao()
+
+    # Apenas a tabela principal: as tabelas filhas gravariam nas tabelas carregadas.
+    # O layout segue o schema (VARCHAR ou tipado) copiado pelo CREATE TABLE ... (LIKE)
+    layout = schema_tipado.obter_layouts(config)[args.tabela]._replace(filhas=())
+    arquivo = args.arquivo
+    if not arquivo:
+        arquivos = sorted(glob.glob(os.path.join('dados-publicos', f'*{layout.extensao}')))
+        if not arquivos:
+            print(f"❌ Nenhum arquivo *{layout.extensao} encontrado em dados-publicos")
+            sys.exit(1)
+        arquivo = arquivos[0]
+
+    port = config.get('port', 5432)
+    engine_url = f"postgresql://{config['username']}:{config['password']}@{config['host']}:{port}/{config['dbname']}"
+    engine = sqlalchemy.create_engine(engine_url)
+
+    amostra, linhas = criar_amostra(arquivo, args.linhas)
+    print(f"Amostra: {linhas:,} linhas de {os.path.basename(arquivo)}")
+
+    resultados = []
+    try:
+        tabela_bench = f'bench_copy_{args.tabela}'
+        for parser_csv in args.parsers:
+            recriar_tabela(engine, tabela_bench, args.tabela)
+            metodo = 'COPY' if parser_csv == carga_copy.PARSER_PYTHON else f'COPY ({parser_csv})'
+            resultados.append((metodo, medir_copy(engine, amostra, tabela_bench, layout, parser_csv)))
+            remover_tabela(engine, tabela_bench)
+
+        if not args.sem_dask:
+            tabela_bench = f'bench_dask_{args.tabela}'
+            remover_tabela(engine, tabela_bench)
+            resultados.append(('Dask to_sql', medir_dask(engine_url, amostra, tabela_bench, layout.colunas)))
+            remover_tabela(engine, tabela_bench)
+    finally:
+        os.remove(amostra)
+        engine.dispose()
+
+    print("\n" + "="*60)
+    print(f"RESULTADO ({args.tabela}, {linhas:,} linhas)")
+    print("="*60)
+    for metodo, duracao in resultados:
+        print(f"  {metodo:15}: {duracao:8.2f}s  {linhas / duracao:>12,.0f} linhas/s")
+    if not args.sem_dask:
+        for metodo, duracao in resultados[:-1]:
+            print(f"  Ganho do {metodo}: {resultados[-1][1] / duracao:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de Consulta: Individual x Lote
+========================================
+
+Mede latência e vazão (CNPJs/s) da consulta de CNPJs na base carregada:
+
+    - individual: um SELECT ... WHERE te.cnpj = %s por CNPJ, em uma conexão do pool;
+    - lote: ServicoCNPJ.lookup_many (= ANY, uma ida ao banco por lote);
+    - concorrente: vários lotes ao mesmo tempo com lookup_many_async.
+
+Os CNPJs são sorteados da própria tabela estabelecimento (TABLESAMPLE).
+
+Uso:
+    python benchmark_consulta.py --cnpjs 10000 --lote 1000 --concorrencia 8
+"""
+
+import time
+import asyncio
+import argparse
+import statistics
+
+import schema_carga
+from consulta_cnpj import SQL_CNPJ
+from servico_cnpj import ServicoCNPJ
+from benchmark_carga import carregar_configuracao
+
+def sortear_cnpjs(servico, quantidade):
+    """Sorteia CNPJs existentes (amostra de blocos da tabela)"""
+    with servico.conexao() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT cnpj FROM estabelecimento TABLESAMPLE SYSTEM (1) LIMIT %s", (quantidade,))
+        return [str(row[0]).zfill(14) for row in cursor.fetchall()]
+
+def resumo(duracoes_ms, total, duracao_total):
+    duracoes_ms = sorted(duracoes_ms)
+    return {
+        'mediana': statistics.median(duracoes_ms),
+        'p95': duracoes_ms[max(int(len(duracoes_ms) * 0.95) - 1, 0)],
+        'vazao': total / duracao_total,
+    }
+
+def medir_individual(servico, cnpjs):
+    """Um SELECT por CNPJ, na mesma conexão"""
+    duracoes = []
+    start_time = time.perf_counter()
+    with servico.conexao() as conn, conn.cursor() as cursor:
+        for cnpj in cnpjs:
+            inicio = time.perf_counter()
+            cursor.execute(SQL_CNPJ, (cnpj,))
+            cursor.fetchall()
+            duracoes.append((time.perf_counter() - inicio) * 1000)
+    return resumo(duracoes, len(cnpjs), time.perf_counter() - start_time)
+
+def medir_lote(servico, lotes):
+    """Um lookup_many por lote, em sequência"""
+    duracoes = []
+    start_time = time.perf_counter()
+    for lote in lotes:
+        inicio = time.perf_counter()
+        servico.lookup_many(lote)
+        duracoes.append((time.perf_counter() - inicio) * 1000)
+    return resumo(duracoes, sum(len(lote) for lote in lotes), time.perf_counter() - start_time)
+
+async def medir_concorrente(servico, lotes, concorrencia):
+    """Lotes em paralelo com lookup_many_async, no máximo concorrencia ao mesmo tempo"""
+    limite = asyncio.Semaphore(concorrencia)
+    duracoes = []
+
+    async def consultar(lote):
+        async with limite:
+            inicio = time.perf_counter()
+            await servico.lookup_many_async(lote)
+            duracoes.append((time.perf_counter() - inicio) * 1000)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(consultar(lote) for lote in lotes))
+    return resumo(duracoes, sum(len(lote) for lote in lotes), time.perf_counter() - start_time)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara consultas de CNPJ individuais e em lote')
+    parser.add_argument('--cnpjs', type=int, default=10000, help='CNPJs sorteados')
+    parser.add_argument('--lote', type=int, default=1000, help='CNPJs por lookup_many')
+    parser.add_argument('--concorrencia', type=int, default=8, help='Lotes simultâneos no teste concorrente')
+    parser.add_argument('--individuais', type=int, default=2000, help='CNPJs no teste individual (mais lento)')
+    args = parser.parse_args()
+
+    config = carregar_configuracao()
+    if schema_carga.blue_green_ativo(config):
+        schema_carga.usar_schema(config, config['schema_publicado'])
+
+    with ServicoCNPJ(config, conexoes=max(args.concorrencia, 1)) as servico:
+        cnpjs = sortear_cnpjs(servico, args.cnpjs)
+        if not cnpjs:
+            print("❌ Nenhum CNPJ encontrado em estabelecimento")
+            return
+        print(f"CNPJs sorteados: {len(cnpjs):,}")
+        lotes = [cnpjs[i:i + args.lote] for i in range(0, len(cnpjs), args.lote)]
+
+        resultados = [
+            (f'Individual ({min(args.individuais, len(cnpjs)):,})', 'consulta', medir_individual(servico, cnpjs[:args.individuais])),
+            (f'Lote de {args.lote:,}', 'lote', medir_lote(servico, lotes)),
+            (f'{args.concorrencia} lotes simultâneos', 'lote', asyncio.run(medir_concorrente(servico, lotes, args.concorrencia))),
+        ]
+
+    print("\n" + "="*72)
+    print("RESULTADO")
+    print("="*72)
+    for metodo, unidade, medidas in resultados:
+        print(f"  {metodo:26}: mediana {medidas['mediana']:8.2f}ms/{unidade:8} p95 {medidas['p95']:8.2f}ms"
+              f"  {medidas['vazao']:>10,.0f} CNPJs/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de Banco Embarcado: DuckDB x SQLite
+=============================================
+
+Carrega a mesma amostra dos arquivos da Receita (as primeiras linhas do
+primeiro arquivo de cada tabela principal e as tabelas de códigos completas)
+em cada banco embarcado (banco_embarcado.py) e compara:
+
+    - tempo total da carga (tabelas, socios, índices) e vazão em linhas/s;
+    - tamanho do arquivo do banco;
+    - latência da busca de um estabelecimento por cnpj.
+
+Os bancos e a amostra são criados em uma pasta temporária, removida ao final.
+O schema (VARCHAR ou tipado) segue o cnpj_config.json.
+
+Uso:
+    python benchmark_embarcado.py --linhas 500000
+"""
+
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import importlib
+import statistics
+
+import fontes_dados
+import schema_tipado
+import banco_embarcado
+from layout_cnpj import TABELAS_PRINCIPAIS, TABELAS_CODIGO
+from benchmark_carga import carregar_configuracao
+
+criar_tabelas = importlib.import_module('02_criar_tabelas')
+
+def criar_pasta_amostra(config, pasta_amostra, linhas):
+    """Copia as primeiras linhas do primeiro arquivo de cada tabela principal e as tabelas de códigos.
+
+    Retorna o total de linhas das tabelas principais.
+    """
+    pasta = fontes_dados.pasta_dados(config)
+    total = 0
+    extensoes = [(layout.extensao, linhas) for layout in TABELAS_PRINCIPAIS.values()]
+    extensoes += [(extensao, None) for extensao in TABELAS_CODIGO.values()]
+    for extensao, limite in extensoes:
+        fontes = fontes_dados.listar_fontes(pasta, extensao)
+        if not fontes:
+            raise FileNotFoundError(f"Nenhum arquivo {extensao} em {pasta}")
+        with fontes_dados.abrir_fonte(fontes[0]) as origem, \
+                open(os.path.join(pasta_amostra, fontes_dados.nome_fonte(fontes[0])), 'wb') as destino:
+            for numero, linha in enumerate(origem):
+                if limite is not None and numero >= limite:
+                    break
+                destino.write(linha)
+                if limite is not None:
+                    total += 1
+    return total
+
+def medir_latencia(conn, cnpjs):
+    duracoes = []
+    for cnpj in cnpjs:
+        start_time = time.perf_counter()
+        conn.execute("SELECT * FROM estabelecimento WHERE cnpj = ?", (cnpj,)).fetchall()
+        duracoes.append((time.perf_counter() - start_time) * 1000)
+    duracoes.sort()
+    return statistics.median(duracoes), duracoes[max(int(len(duracoes) * 0.95) - 1, 0)]
+
+def medir_banco(config, tipo_banco, pasta_amostra, total_linhas, consultas):
+    """Cria as tabelas, carrega a amostra e mede a busca em um banco embarcado"""
+    config = {**config, 'tipo_banco': tipo_banco,
+              'arquivo_banco': os.path.join(pasta_amostra, f'benchmark.{tipo_banco}')}
+    banco_embarcado.criar_tabelas(config, criar_tabelas.obter_sql_criacao_tabelas(
+        tipado=schema_tipado.tipado_ativo(config)))
+
+    start_time = time.time()
+    _, _, com_erro = banco_embarcado.carregar(config, pasta_amostra)
+    duracao = time.time() - start_time
+
+    conn = banco_embarcado.conectar(config)
+    try:
+        cnpjs = [row[0] for row in conn.execute(
+            "SELECT cnpj FROM estabelecimento ORDER BY random() LIMIT ?", (consultas,)).fetchall()]
+        busca = medir_latencia(conn, cnpjs)
+    finally:
+        conn.close()
+    return {
+        'carga': duracao,
+        'vazao': total_linhas / duracao,
+        'tamanho': os.path.getsize(config['arquivo_banco']),
+        'busca': busca,
+        'erros': com_erro,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara a carga e a busca no DuckDB e no SQLite')
+    parser.add_argument('--linhas', type=int, default=200000, help='Linhas do primeiro arquivo de cada tabela principal')
+    parser.add_argument('--tipos', nargs='+', choices=banco_embarcado.TIPOS_EMBARCADOS,
+                        default=list(banco_embarcado.TIPOS_EMBARCADOS))
+    parser.add_argument('--consultas', type=int, default=200, help='Buscas por cnpj')
+    args = parser.parse_args()
+
+    config = carregar_configuracao()
+    pasta_amostra = tempfile.mkdtemp(prefix='benchmark_embarcado_')
+    try:
+        total_linhas = criar_pasta_amostra(config, pasta_amostra, args.linhas)
+        print(f"Amostra: {total_linhas:,} linhas das tabelas principais "
+              f"(schema {'tipado' if schema_tipado.tipado_ativo(config) else 'VARCHAR'})")
+
+        resultados = [(tipo_banco, medir_banco(config, tipo_banco, pasta_amostra, total_linhas, args.consultas))
+                      for tipo_banco in args.tipos]
+    finally:
+        shutil.rmtree(pasta_amostra, ignore_errors=True)
+
+    print("\n" + "="*72)
+    print("RESULTADO")
+    print("="*72)
+    for tipo_banco, medidas in resultados:
+        print(f"  {tipo_banco:8}: carga {medidas['carga']:8.2f}s  {medidas['vazao']:>10,.0f} linhas/s  "
+              f"{medidas['tamanho'] / (1024 * 1024):8.1f} MB  busca mediana {medidas['busca'][0]:6.2f}ms "
+              f"p95 {medidas['busca'][1]:6.2f}ms" + (f"  ({medidas['erros']} erros)" if medidas['erros'] else ''))
+
+if __name__ == "__main__":
+    main()
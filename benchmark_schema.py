@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de Schema: VARCHAR x Tipado
+=====================================
+
+Compara o schema original (todas as colunas VARCHAR) com o schema tipado
+(schema_tipado.py) usando a mesma amostra de um arquivo da Receita:
+
+    - tempo de carga via COPY;
+    - tamanho da tabela e dos índices (cnpj_basico e a primeira coluna de data);
+    - latência de busca por cnpj_basico e de contagem por intervalo de datas.
+
+Cada schema é carregado em uma tabela temporária (bench_texto_<tabela> e
+bench_tipado_<tabela>), criada a partir do DDL do 02_criar_tabelas.py e
+removida ao final. As consultas usam os mesmos literais nos dois schemas.
+
+Uso:
+    python benchmark_schema.py --tabela estabelecimento --linhas 1000000
+"""
+
+import os
+import re
+import glob
+import time
+import argparse
+import importlib
+import statistics
+
+import carga_copy
+import schema_tipado
+from layout_cnpj import TABELAS_PRINCIPAIS
+from benchmark_carga import carregar_configuracao, criar_amostra
+
+criar_tabelas = importlib.import_module('02_criar_tabelas')
+
+# Intervalo usado na consulta por datas
+DATA_INICIO = '20200101'
+DATA_FIM = '20201231'
+
+def sql_criar_tabela(nome_tabela, tabela_bench, tipado):
+    """Retorna o CREATE TABLE da tabela do 02_criar_tabelas.py com o nome da tabela do benchmark"""
+    sql = criar_tabelas.obter_sql_criacao_tabelas(tipado=tipado)
+    m = re.search(rf'CREATE TABLE {nome_tabela} \(.*?\n\s*\);', sql, re.DOTALL)
+    return m.group(0).replace(f'CREATE TABLE {nome_tabela} (', f'CREATE TABLE {tabela_bench} (', 1)
+
+def coluna_data(nome_tabela):
+    """Primeira coluna de data da tabela, ou None"""
+    for coluna, tipo in schema_tipado.TIPOS_COLUNAS.get(nome_tabela, {}).items():
+        if tipo == 'DATE':
+            return coluna
+    return None
+
+def executar(conn, sql, parametros=None):
+    with conn.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        resultado = cursor.fetchall() if cursor.description else None
+    conn.commit()
+    return resultado
+
+def medir_latencia(conn, sql, parametros_lista):
+    """Executa a consulta com cada conjunto de parâmetros e retorna (mediana, p95) em ms"""
+    duracoes = []
+    with conn.cursor() as cursor:
+        for parametros in parametros_lista:
+            start_time = time.perf_counter()
+            cursor.execute(sql, parametros)
+            cursor.fetchall()
+            duracoes.append((time.perf_counter() - start_time) * 1000)
+    conn.rollback()
+    duracoes.sort()
+    return statistics.median(duracoes), duracoes[int(len(duracoes) * 0.95) - 1]
+
+def medir_schema(conn, amostra, nome_tabela, tipado, chaves, consultas):
+    """Carrega a amostra em um schema e retorna as medidas"""
+    tabela_bench = f"bench_{'tipado' if tipado else 'texto'}_{nome_tabela}"
+    # Apenas a tabela principal: as tabelas filhas gravariam nas tabelas carregadas
+    layout = TABELAS_PRINCIPAIS[nome_tabela]._replace(filhas=())
+    if tipado:
+        layout = schema_tipado.layout_tipado(nome_tabela, layout)
+    data = coluna_data(nome_tabela)
+
+    executar(conn, f'DROP TABLE IF EXISTS {tabela_bench}')
+    executar(conn, sql_criar_tabela(nome_tabela, tabela_bench, tipado))
+    try:
+        start_time = time.time()
+        carga_copy.carregar_arquivo_copy(conn, amostra, tabela_bench, layout, usar_manifesto=False)
+        medidas = {'carga': time.time() - start_time}
+
+        executar(conn, f'CREATE INDEX ON {tabela_bench} (cnpj_basico)')
+        if data:
+            executar(conn, f'CREATE INDEX ON {tabela_bench} ({data})')
+        executar(conn, f'ANALYZE {tabela_bench}')
+
+        medidas['tabela'], medidas['indices'] = executar(
+            conn, "SELECT pg_relation_size(%s::regclass), pg_indexes_size(%s::regclass)", (tabela_bench, tabela_bench))[0]
+
+        # Mesmos literais nos dois schemas: o PostgreSQL converte '00012345' e '20200101' para o tipo da coluna
+        medidas['busca'] = medir_latencia(conn, f'SELECT * FROM {tabela_bench} WHERE cnpj_basico = %s',
+                                          [(chave,) for chave in chaves])
+        if data:
+            medidas['intervalo'] = medir_latencia(conn, f'SELECT count(*) FROM {tabela_bench} WHERE {data} BETWEEN %s AND %s',
+                                                  [(DATA_INICIO, DATA_FIM)] * consultas)
+        return medidas
+    finally:
+        executar(conn, f'DROP TABLE IF EXISTS {tabela_bench}')
+
+def ler_chaves(amostra, quantidade):
+    """Lê os primeiros cnpj_basico distintos da amostra, espaçados ao longo do arquivo"""
+    with open(amostra, 'rb') as f:
+        chaves = list(dict.fromkeys(linha.split(b';', 1)[0].strip(b'"').decode('latin1') for linha in f))
+    passo = max(len(chaves) // quantidade, 1)
+    return chaves[::passo][:quantidade]
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara tamanho e latência do schema VARCHAR com o schema tipado')
+    parser.add_argument('--tabela', default='estabelecimento', choices=sorted(TABELAS_PRINCIPAIS))
+    parser.add_argument('--arquivo', help='Arquivo de origem (padrão: primeiro arquivo da tabela em dados-publicos)')
+    parser.add_argument('--linhas', type=int, default=1000000, help='Linhas da amostra')
+    parser.add_argument('--consultas', type=int, default=200, help='Consultas de cada tipo')
+    args = parser.parse_args()
+
+    layout = TABELAS_PRINCIPAIS[args.tabela]
+    arquivo = args.arquivo
+    if not arquivo:
+        arquivos = sorted(glob.glob(os.path.join('dados-publicos', f'*{layout.extensao}')))
+        if not arquivos:
+            print(f"❌ Nenhum arquivo *{layout.extensao} encontrado em dados-publicos")
+            return
+        arquivo = arquivos[0]
+
+    config = carregar_configuracao()
+    amostra, linhas = criar_amostra(arquivo, args.linhas)
+    print(f"Amostra: {linhas:,} linhas de {os.path.basename(arquivo)}")
+
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        chaves = ler_chaves(amostra, args.consultas)
+        texto = medir_schema(conn, amostra, args.tabela, False, chaves, args.consultas)
+        tipado = medir_schema(conn, amostra, args.tabela, True, chaves, args.consultas)
+    finally:
+        conn.close()
+        os.remove(amostra)
+
+    mb = 1024 * 1024
+    print("\n" + "="*60)
+    print(f"RESULTADO ({args.tabela}, {linhas:,} linhas)")
+    print("="*60)
+    print(f"  {'':32}{'VARCHAR':>14}{'Tipado':>14}{'Razão':>9}")
+    print(f"  {'Carga (s)':32}{texto['carga']:>14.2f}{tipado['carga']:>14.2f}{texto['carga'] / tipado['carga']:>8.2f}x")
+    print(f"  {'Tabela (MB)':32}{texto['tabela'] / mb:>14.1f}{tipado['tabela'] / mb:>14.1f}{texto['tabela'] / tipado['tabela']:>8.2f}x")
+    print(f"  {'Índices (MB)':32}{texto['indices'] / mb:>14.1f}{tipado['indices'] / mb:>14.1f}{texto['indices'] / tipado['indices']:>8.2f}x")
+    for medida, descricao in [('busca', 'Busca cnpj_basico'), ('intervalo', 'Intervalo de datas')]:
+        if medida in texto:
+            for posicao, rotulo in enumerate(['mediana', 'p95']):
+                print(f"  {f'{descricao} {rotulo} (ms)':32}{texto[medida][posicao]:>14.2f}{tipado[medida][posicao]:>14.2f}"
+                      f"{texto[medida][posicao] / max(tipado[medida][posicao], 1e-9):>8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Busca por Nome na Base CNPJ
+===========================
+
+Com busca_textual no cnpj_config.json, o 03_inserir_dados.py constrói índices
+GIN de trigramas (pg_trgm) sobre os nomes, sem acentos e em minúsculas
+(unaccent), junto com os demais índices da carga, em paralelo:
+
+    empresas.razao_social, estabelecimento.nome_fantasia, socios.nome_socio
+
+Esses índices atendem buscas por qualquer trecho do nome
+(razao_social LIKE '%padaria sao jose%'), que os índices btree não atendem.
+
+As extensões são criadas uma vez no banco (CREATE EXTENSION IF NOT EXISTS, no
+schema public). A função busca_normalizar(texto), usada nos índices e nas
+consultas, é criada no schema das tabelas e chama as extensões pelo nome
+completo, pois no modo blue/green o search_path não inclui public (ver
+schema_carga.py).
+
+Uso:
+    python busca_cnpj.py "padaria sao jose" --campo nome_fantasia
+    python busca_cnpj.py --criar-indices      # base já carregada sem busca_textual
+
+Na aplicação:
+    conn = carga_copy.conectar_psycopg2(config)
+    busca_cnpj.buscar(conn, 'padaria são josé', 'nome_fantasia', limite=20)
+
+Configurações opcionais no cnpj_config.json:
+    busca_textual: cria as extensões e os índices de trigramas na carga (padrão: false)
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+import carga_copy
+import schema_carga
+import indices_cnpj
+
+logger = logging.getLogger(__name__)
+
+# Campo pesquisável -> (tabela, coluna de identificação retornada)
+CAMPOS_BUSCA = {
+    'razao_social': ('empresas', 'cnpj_basico'),
+    'nome_fantasia': ('estabelecimento', 'cnpj'),
+    'nome_socio': ('socios', 'cnpj'),
+}
+
+# Trechos menores que um trigrama não usam o índice
+TAMANHO_MINIMO = 3
+
+def busca_ativa(config):
+    """Indica se os índices de busca devem ser construídos na carga"""
+    return bool(config.get('busca_textual'))
+
+def schema_extensao(cursor, extensao):
+    """Retorna o schema em que a extensão está instalada, ou None"""
+    cursor.execute('''
+        SELECT n.nspname FROM pg_extension e
+        JOIN pg_namespace n ON n.oid = e.extnamespace
+        WHERE e.extname = %s
+    ''', (extensao,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def preparar_busca(config):
+    """Cria as extensões e a função busca_normalizar no schema das tabelas.
+
+    Retorna o schema do pg_trgm (usado na classe de operadores dos índices).
+    """
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        with conn.cursor() as cursor:
+            for extensao in ('pg_trgm', 'unaccent'):
+                if schema_extensao(cursor, extensao) is None:
+                    cursor.execute(f"CREATE EXTENSION IF NOT EXISTS {extensao} SCHEMA public")
+            schema_trgm = schema_extensao(cursor, 'pg_trgm')
+            schema_unaccent = schema_extensao(cursor, 'unaccent')
+
+            # unaccent é STABLE; a função IMMUTABLE com o dicionário fixo pode ser usada em índices
+            cursor.execute(f'''
+                CREATE OR REPLACE FUNCTION busca_normalizar(texto text) RETURNS text
+                LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+                AS $$ SELECT lower({schema_unaccent}.unaccent('{schema_unaccent}.unaccent'::regdictionary, texto)) $$
+            ''')
+        conn.commit()
+    finally:
+        conn.close()
+    return schema_trgm
+
+def indices_busca(schema_trgm, tabelas):
+    """Índices GIN de trigramas dos campos de busca das tabelas informadas"""
+    return [
+        indices_cnpj.Indice(f'idx_{tabela}_{campo}_trgm', tabela, f'busca_normalizar({campo}) {schema_trgm}.gin_trgm_ops', 'gin')
+        for campo, (tabela, _) in CAMPOS_BUSCA.items() if tabela in tabelas
+    ]
+
+def escapar_like(texto):
+    """Escapa os curingas do LIKE para buscar o texto literalmente"""
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def buscar(conn, texto, campo='razao_social', limite=20):
+    """Busca registros cujo campo contém o texto (sem diferenciar acentos e maiúsculas).
+
+    Retorna uma lista de dicts {identificador, campo, semelhanca}, mais semelhantes primeiro.
+    """
+    if campo not in CAMPOS_BUSCA:
+        raise ValueError(f"Campo de busca inválido: {campo} (use {', '.join(CAMPOS_BUSCA)})")
+    texto = texto.strip()
+    if len(texto) < TAMANHO_MINIMO:
+        raise ValueError(f"Informe pelo menos {TAMANHO_MINIMO} caracteres para a busca")
+
+    tabela, identificador = CAMPOS_BUSCA[campo]
+    with conn.cursor() as cursor:
+        schema_trgm = schema_extensao(cursor, 'pg_trgm')
+        if schema_trgm is None:
+            raise RuntimeError("Extensão pg_trgm não instalada: carregue com busca_textual ou execute --criar-indices")
+        cursor.execute(f'''
+            SELECT {identificador}, {campo},
+                   {schema_trgm}.similarity(busca_normalizar({campo}), busca_normalizar(%(texto)s)) AS semelhanca
+            FROM {tabela}
+            WHERE busca_normalizar({campo}) LIKE '%%' || busca_normalizar(%(padrao)s) || '%%'
+            ORDER BY semelhanca DESC
+            LIMIT %(limite)s
+        ''', {'texto': texto, 'padrao': escapar_like(texto), 'limite': limite})
+        return [
+            {identificador: row[0], campo: row[1], 'semelhanca': row[2]}
+            for row in cursor.fetchall()
+        ]
+
+def main():
+    """Busca pela linha de comando ou cria os índices de busca em uma base já carregada"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Busca por trecho de nome na base CNPJ')
+    parser.add_argument('texto', nargs='?', help='Trecho do nome a buscar')
+    parser.add_argument('--campo', default='razao_social', choices=sorted(CAMPOS_BUSCA))
+    parser.add_argument('--limite', type=int, default=20)
+    parser.add_argument('--criar-indices', action='store_true', help='Cria as extensões e os índices de busca')
+    args = parser.parse_args()
+
+    if not os.path.exists('cnpj_config.json'):
+        print("❌ Arquivo de configuração 'cnpj_config.json' não encontrado!")
+        sys.exit(1)
+    with open('cnpj_config.json', 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if schema_carga.blue_green_ativo(config):
+        schema_carga.usar_schema(config, config['schema_publicado'])
+
+    if args.criar_indices:
+        schema_trgm = preparar_busca(config)
+        _, com_erro = indices_cnpj.construir_indices(
+            config, indices_busca(schema_trgm, {tabela for tabela, _ in CAMPOS_BUSCA.values()}), 'índices de busca')
+        sys.exit(1 if com_erro else 0)
+
+    if not args.texto:
+        parser.error('informe o texto a buscar ou --criar-indices')
+
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        for registro in buscar(conn, args.texto, args.campo, args.limite):
+            print(f"{registro[CAMPOS_BUSCA[args.campo][1]]}  {registro['semelhanca']:.2f}  {registro[args.campo]}")
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {str(e)}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
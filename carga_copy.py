@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Carga via COPY para PostgreSQL
+==============================
+
+Este módulo carrega os arquivos principais do CNPJ (ESTABELE, SOCIOCSV,
+EMPRECSV, SIMPLES) usando COPY ... FROM STDIN do psycopg2. Os arquivos podem
+ser lidos já descompactados ou diretamente de dentro dos ZIPs.
+
+O arquivo é lido linha a linha em latin1, interpretado como CSV separado por
+';' e reescrito em blocos no formato texto do COPY (UTF-8). Nenhum DataFrame é
+criado: a memória usada é limitada ao tamanho de um bloco. O andamento de cada
+arquivo é registrado no _carga_manifest (ver manifesto_carga.py).
+
+As linhas das tabelas filhas do layout (ex.: estabelecimento_cnae_secundaria)
+são geradas na mesma leitura e enviadas junto com cada bloco.
+
+Com parser_csv = "pyarrow" no cnpj_config.json, os arquivos são lidos com
+pyarrow.csv em blocos de alguns MB (ver parser_arrow.py).
+"""
+
+import io
+import csv
+import time
+import logging
+import psycopg2
+
+import fontes_dados
+import parser_arrow
+import manifesto_carga
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de linhas enviadas em cada COPY
+LINHAS_POR_BLOCO = 100000
+
+# Escape dos caracteres especiais do formato texto do COPY.
+# O byte NUL não é aceito pelo PostgreSQL e é removido.
+TABELA_ESCAPE_COPY = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\x00': None,
+})
+
+NULO_COPY = '\\N'
+
+# Leitores dos arquivos: csv.reader (padrão) ou pyarrow.csv (ver parser_arrow.py)
+PARSER_PYTHON = 'python'
+PARSER_PYARROW = 'pyarrow'
+
+def parametros_conexao(config):
+    """Parâmetros de conexão psycopg2 a partir da configuração do cnpj_config.json.
+
+    Se a configuração tiver search_path (schema de carga, ver schema_carga.py),
+    a conexão usa apenas esse schema.
+    """
+    return {
+        'dbname': config['dbname'],
+        'user': config['username'],
+        'password': config['password'],
+        'host': config['host'],
+        'port': config.get('port', 5432),
+        'options': f"-csearch_path={config['search_path']}" if config.get('search_path') else None,
+    }
+
+def conectar_psycopg2(config):
+    """Abre uma conexão psycopg2 usando a configuração do cnpj_config.json"""
+    return psycopg2.connect(**parametros_conexao(config))
+
+class LeitorRegistros:
+    """Lê os registros (listas de campos) de um arquivo CSV da Receita aberto em modo binário.
+
+    O atributo offset guarda a posição em bytes logo após o último registro lido,
+    usada para retomar a carga do ponto exato em que parou.
+    """
+
+    def __init__(self, arquivo_bin, offset=0, encoding='latin1'):
+        self.arquivo_bin = arquivo_bin
+        self.offset = offset
+        self.encoding = encoding
+
+    def _linhas(self):
+        for linha in self.arquivo_bin:
+            self.offset += len(linha)
+            yield linha.decode(self.encoding)
+
+    def __iter__(self):
+        return csv.reader(self._linhas(), delimiter=';', quotechar='"')
+
+def formatar_linha_copy(campos):
+    """Converte uma lista de campos em uma linha no formato texto do COPY"""
+    return '\t'.join([NULO_COPY if campo is None else campo.translate(TABELA_ESCAPE_COPY) for campo in campos])
+
+def copiar_dados(cursor, nome_tabela, colunas, dados, formato_csv=False):
+    """Envia dados já no formato do COPY (texto ou, com formato_csv, CSV) para a tabela"""
+    opcoes = ' WITH (FORMAT csv)' if formato_csv else ''
+    sql = f"COPY {nome_tabela} ({', '.join(colunas)}) FROM STDIN{opcoes}"
+    cursor.copy_expert(sql, io.BytesIO(dados))
+
+def copiar_bloco(cursor, nome_tabela, colunas, linhas):
+    """Envia um bloco de linhas já formatadas para a tabela via COPY"""
+    copiar_dados(cursor, nome_tabela, colunas, ('\n'.join(linhas) + '\n').encode('utf-8'))
+
+def copiar_blocos_filhas(cursor, filhas, blocos, prefixo=''):
+    """Envia as linhas acumuladas das tabelas filhas e esvazia os blocos"""
+    for filha, linhas in zip(filhas, blocos):
+        if linhas:
+            copiar_bloco(cursor, f'{prefixo}{filha.nome}', filha.colunas, linhas)
+            linhas.clear()
+
+def dados_copy(linhas):
+    return ('\n'.join(linhas) + '\n').encode('utf-8') if linhas else None
+
+def blocos_copy(arquivo_bin, offset, layout, linhas_por_bloco, nome_arquivo, linhas_anteriores=0):
+    """Lê o arquivo registro a registro (csv.reader) e gera os blocos no formato texto do COPY.
+
+    Gera (linhas, dados da tabela, [dados de cada tabela filha], offset após o bloco).
+    """
+    leitor = LeitorRegistros(arquivo_bin, offset)
+    bloco = []
+    blocos_filhas = [[] for _ in layout.filhas]
+    for campos in leitor:
+        if len(campos) != len(layout.colunas):
+            raise ValueError(f"Registro {linhas_anteriores + len(bloco) + 1} de {nome_arquivo} tem {len(campos)} campos, esperado {len(layout.colunas)}")
+
+        campos = layout.transformar(campos)
+        bloco.append(formatar_linha_copy(campos))
+        for filha, linhas_filha in zip(layout.filhas, blocos_filhas):
+            linhas_filha.extend(formatar_linha_copy(linha) for linha in filha.extrair(campos))
+
+        if len(bloco) >= linhas_por_bloco:
+            yield len(bloco), dados_copy(bloco), [dados_copy(linhas) for linhas in blocos_filhas], leitor.offset
+            linhas_anteriores += len(bloco)
+            bloco = []
+            blocos_filhas = [[] for _ in layout.filhas]
+
+    if bloco:
+        yield len(bloco), dados_copy(bloco), [dados_copy(linhas) for linhas in blocos_filhas], leitor.offset
+
+def carregar_arquivo_copy(conn, arquivo, nome_tabela, layout, linhas_por_bloco=LINHAS_POR_BLOCO, usar_manifesto=True,
+                          parser=PARSER_PYTHON):
+    """Carrega um arquivo CSV da Receita em uma tabela via COPY.
+
+    O arquivo pode ser um arquivo descompactado ou um membro de ZIP, lido em fluxo
+    (ver fontes_dados.py). Cada linha passa pela transformação do layout
+    (layout_cnpj.py), que calcula as colunas derivadas antes do envio.
+
+    As tabelas filhas do layout recebem suas linhas no mesmo bloco (e na mesma
+    transação) que a tabela principal.
+
+    Com parser="pyarrow" (ver parser_arrow.py), os blocos são lidos e
+    transformados com pyarrow, coluna a coluna, e enviados como CSV.
+
+    Com usar_manifesto, cada bloco é confirmado junto com a posição alcançada no
+    _carga_manifest: arquivos concluídos são pulados e arquivos parciais continuam
+    do último bloco confirmado. Sem manifesto, o arquivo é carregado em uma única
+    transação.
+
+    Retorna a quantidade de linhas do arquivo presentes na tabela.
+    """
+    nome_arquivo, tamanho, mtime = fontes_dados.identificar_fonte(arquivo)
+    offset = 0
+    total_linhas = 0
+
+    try:
+        with conn.cursor() as cursor:
+            if usar_manifesto:
+                registro = manifesto_carga.preparar_retomada(cursor, nome_tabela, nome_arquivo, tamanho, mtime)
+                conn.commit()
+
+                if registro['status'] == manifesto_carga.STATUS_CONCLUIDO:
+                    logger.info(f"✓ {nome_arquivo} já carregado em {nome_tabela} ({registro['linhas']:,} linhas), pulando...")
+                    return registro['linhas']
+
+                offset = registro['offset_bytes']
+                total_linhas = registro['linhas']
+                if offset:
+                    logger.info(f"Retomando {nome_arquivo} a partir do byte {offset:,} ({total_linhas:,} linhas já carregadas)")
+
+            linhas_iniciais = total_linhas
+            start_time = time.time()
+
+            with fontes_dados.abrir_fonte(arquivo) as f:
+                f.seek(offset)
+                if parser == PARSER_PYARROW:
+                    blocos = parser_arrow.blocos_copy(f, offset, layout, nome_arquivo)
+                else:
+                    blocos = blocos_copy(f, offset, layout, linhas_por_bloco, nome_arquivo, total_linhas)
+
+                for linhas, dados, dados_filhas, offset in blocos:
+                    copiar_dados(cursor, nome_tabela, layout.colunas_destino, dados, parser == PARSER_PYARROW)
+                    for filha, dados_filha in zip(layout.filhas, dados_filhas):
+                        if dados_filha:
+                            copiar_dados(cursor, filha.nome, filha.colunas, dados_filha, parser == PARSER_PYARROW)
+                    total_linhas += linhas
+                    if usar_manifesto:
+                        manifesto_carga.registrar_progresso(cursor, nome_tabela, nome_arquivo, offset, total_linhas)
+                        conn.commit()
+                    duracao = time.time() - start_time
+                    logger.debug(f"  {nome_arquivo}: {total_linhas:,} linhas ({(total_linhas - linhas_iniciais) / duracao:,.0f} linhas/s)")
+
+                if usar_manifesto:
+                    manifesto_carga.registrar_progresso(cursor, nome_tabela, nome_arquivo, offset, total_linhas,
+                                                        manifesto_carga.STATUS_CONCLUIDO)
+
+        conn.commit()
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    duracao = time.time() - start_time
+    inseridas = total_linhas - linhas_iniciais
+    logger.info(f"COPY de {inseridas:,} linhas em {nome_tabela} ({nome_arquivo}) concluído em {duracao:.2f}s ({inseridas / max(duracao, 1e-9):,.0f} linhas/s)")
+    return total_linhas
@@ -0,0 +1,480 @@
+# -*- coding: utf-8 -*-
+"""
+Atualização Incremental da Base CNPJ
+====================================
+
+Aplica um novo mês de referência sobre a base já carregada, sem recriar as
+tabelas: apenas as linhas incluídas, alteradas e removidas são gravadas.
+
+Para cada tabela principal é mantida uma tabela _hash_<tabela> (chave, hash)
+com o MD5 de cada registro do mês carregado. A atualização:
+
+1. lê os arquivos do novo mês em fluxo e grava (chave, hash) em
+   _hash_novo_<tabela> (em paralelo, um processo por arquivo);
+2. compara com _hash_<tabela> em SQL e grava as chaves incluídas (I),
+   alteradas (U) e removidas (D) em _delta_<tabela>;
+3. relê os arquivos e carrega via COPY apenas os registros de chaves I/U em
+   _novo_<tabela>;
+4. em uma única transação, recarrega as tabelas de códigos, remove as chaves
+   alteradas/removidas, insere os registros novos, atualiza socios, os hashes
+   e a _referencia.
+
+Chaves: estabelecimento.cnpj, empresas.cnpj_basico, simples.cnpj_basico. Os
+sócios se repetem por empresa, por isso usam o hash agregado de todos os sócios
+de cada cnpj_basico, e a tabela atualizada é socios (socios_original é removida
+depois da carga completa). Os sócios das empresas cuja matriz foi incluída,
+removida ou trocada também são recarregados, pois recebem o cnpj da matriz.
+
+As tabelas filhas do layout (estabelecimento_cnae_secundaria) acompanham a
+tabela principal: as linhas das chaves alteradas/removidas são removidas e as
+das chaves incluídas/alteradas são recarregadas de _novo_<filha>.
+
+As chaves são guardadas como texto; no schema tipado (ver schema_tipado.py) são
+convertidas para o tipo da coluna ao comparar com as tabelas carregadas.
+
+Se a visão materializada cnpj_completo existir (ver cnpj_completo.py), ela é
+recalculada ao final com REFRESH ... CONCURRENTLY.
+
+Os hashes do mês carregado são criados uma vez, com os mesmos arquivos usados
+na carga completa:
+    python carga_incremental.py --inicializar
+
+Depois, a cada mês (arquivos novos em dados-publicos/ ou dados-publicos-zip/):
+    python carga_incremental.py
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import carga_copy
+import fontes_dados
+import carga_paralela
+import schema_carga
+import schema_tipado
+import cnpj_completo
+from layout_cnpj import TABELAS_PRINCIPAIS, TABELAS_CODIGO
+
+logger = logging.getLogger(__name__)
+
+# Coluna que identifica o registro em cada tabela principal
+CHAVES = {
+    'estabelecimento': 'cnpj',
+    'empresas': 'cnpj_basico',
+    'simples': 'cnpj_basico',
+    'socios_original': 'cnpj_basico',
+}
+
+# Tabelas com vários registros por chave: o hash é agregado por chave
+CHAVES_AGRUPADAS = {'socios_original'}
+
+# Tabela atualizada no banco, quando diferente da tabela carregada
+TABELAS_ALVO = {'socios_original': 'socios'}
+
+def tabela_alvo(nome_tabela):
+    return TABELAS_ALVO.get(nome_tabela, nome_tabela)
+
+def chave_delta(config, nome_tabela):
+    """Expressão de d.chave no tipo da coluna chave da tabela carregada"""
+    tipo = schema_tipado.tipo_coluna(config, nome_tabela, CHAVES[nome_tabela], None)
+    return f"d.chave::{tipo}" if tipo else "d.chave"
+
+def configurar_logging():
+    """Configura o sistema de logging com arquivo e console"""
+    logs_dir = 'logs'
+    if not os.path.exists(logs_dir):
+        os.makedirs(logs_dir)
+
+    log_filename = os.path.join(logs_dir, f'cnpj_incremental_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
+        handlers=[
+            logging.FileHandler(log_filename, encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+    return logging.getLogger(__name__)
+
+def carregar_configuracao():
+    """Carrega a configuração do banco do arquivo cnpj_config.json"""
+    if not os.path.exists('cnpj_config.json'):
+        print("❌ Arquivo de configuração 'cnpj_config.json' não encontrado!")
+        sys.exit(1)
+    with open('cnpj_config.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def executar(conn, sql, parametros=None):
+    """Executa um comando e retorna as linhas do resultado, se houver"""
+    with conn.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return cursor.fetchall() if cursor.description else None
+
+def hash_linha(linha):
+    """MD5 de uma linha já no formato do COPY (após a transformação do layout)"""
+    return hashlib.md5(linha.encode('utf-8')).hexdigest()
+
+def ler_registros(arquivo, nome_tabela, layout):
+    """Gera (chave, linha no formato COPY, campos transformados) de cada registro de um arquivo"""
+    indice_chave = layout.colunas_destino.index(CHAVES[nome_tabela])
+    nome_arquivo = fontes_dados.nome_fonte(arquivo)
+
+    with fontes_dados.abrir_fonte(arquivo) as f:
+        for numero, campos in enumerate(carga_copy.LeitorRegistros(f), 1):
+            if len(campos) != len(layout.colunas):
+                raise ValueError(f"Registro {numero} de {nome_arquivo} tem {len(campos)} campos, esperado {len(layout.colunas)}")
+            campos = layout.transformar(campos)
+            yield campos[indice_chave], carga_copy.formatar_linha_copy(campos), campos
+
+def calcular_hashes_worker(config, arquivo, nome_tabela, layout, tabela_destino):
+    """Grava (chave, hash) de cada registro de um arquivo em tabela_destino"""
+    start_time = time.time()
+    conn = carga_copy.conectar_psycopg2(config)
+    total = 0
+    try:
+        with conn.cursor() as cursor:
+            bloco = []
+            for chave, linha, _ in ler_registros(arquivo, nome_tabela, layout):
+                bloco.append(carga_copy.formatar_linha_copy([chave, hash_linha(linha)]))
+                if len(bloco) >= carga_copy.LINHAS_POR_BLOCO:
+                    carga_copy.copiar_bloco(cursor, tabela_destino, ['chave', 'hash'], bloco)
+                    total += len(bloco)
+                    bloco = []
+            if bloco:
+                carga_copy.copiar_bloco(cursor, tabela_destino, ['chave', 'hash'], bloco)
+                total += len(bloco)
+        conn.commit()
+    finally:
+        conn.close()
+    return arquivo, total, time.time() - start_time
+
+def carregar_alterados_worker(config, arquivo, nome_tabela, layout):
+    """Carrega em _novo_<tabela> (e _novo_<filha>) os registros de um arquivo cujas chaves foram incluídas ou alteradas"""
+    start_time = time.time()
+    conn = carga_copy.conectar_psycopg2(config)
+    total = 0
+    try:
+        chaves = {row[0] for row in executar(conn, f"SELECT chave FROM _delta_{nome_tabela} WHERE operacao <> 'D'")}
+        with conn.cursor() as cursor:
+            bloco = []
+            blocos_filhas = [[] for _ in layout.filhas]
+            for chave, linha, campos in ler_registros(arquivo, nome_tabela, layout):
+                if chave not in chaves:
+                    continue
+                bloco.append(linha)
+                for filha, linhas_filha in zip(layout.filhas, blocos_filhas):
+                    linhas_filha.extend(carga_copy.formatar_linha_copy(linha_filha) for linha_filha in filha.extrair(campos))
+                if len(bloco) >= carga_copy.LINHAS_POR_BLOCO:
+                    carga_copy.copiar_bloco(cursor, f'_novo_{nome_tabela}', layout.colunas_destino, bloco)
+                    carga_copy.copiar_blocos_filhas(cursor, layout.filhas, blocos_filhas, '_novo_')
+                    total += len(bloco)
+                    bloco = []
+            if bloco:
+                carga_copy.copiar_bloco(cursor, f'_novo_{nome_tabela}', layout.colunas_destino, bloco)
+                carga_copy.copiar_blocos_filhas(cursor, layout.filhas, blocos_filhas, '_novo_')
+                total += len(bloco)
+        conn.commit()
+    finally:
+        conn.close()
+    return arquivo, total, time.time() - start_time
+
+def executar_em_paralelo(config, funcao, arquivos, *args):
+    """Executa funcao(config, arquivo, *args) para cada arquivo em um pool de processos.
+
+    Retorna a soma das linhas processadas.
+    """
+    workers = carga_paralela.calcular_workers(config, len(arquivos))
+    total = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = [executor.submit(funcao, config, arquivo, *args) for arquivo in arquivos]
+        for concluidos, futuro in enumerate(as_completed(futuros), 1):
+            arquivo, linhas, duracao = futuro.result()
+            total += linhas
+            logger.info(f"✓ [{concluidos}/{len(arquivos)}] {fontes_dados.nome_fonte(arquivo)}: "
+                        f"{linhas:,} linhas em {duracao:.2f}s ({linhas / max(duracao, 1e-9):,.0f} linhas/s)")
+    return total
+
+def calcular_hashes(config, conn, pasta, nome_tabela, layout, tabela_hash):
+    """Calcula os hashes dos arquivos de uma tabela em tabela_hash (chave, hash), sem repetição de chave.
+
+    Nas tabelas agrupadas o hash é sempre o dos registros da chave. Nas demais,
+    uma chave repetida nos arquivos (carregada em duplicidade pela carga
+    completa) também recebe o hash de todos os seus registros: o delta trata
+    os registros da chave em conjunto, como nos sócios.
+    """
+    arquivos = fontes_dados.listar_fontes(pasta, layout.extensao)
+    if not arquivos:
+        raise FileNotFoundError(f"Nenhum arquivo {layout.extensao} encontrado em {pasta}")
+
+    tabela_linhas = f'{tabela_hash}_linhas'
+    for tabela in (tabela_hash, tabela_linhas):
+        executar(conn, f"DROP TABLE IF EXISTS {tabela}")
+    executar(conn, f"CREATE UNLOGGED TABLE {tabela_linhas} (chave VARCHAR(14), hash UUID)")
+    conn.commit()
+
+    logger.info(f"Calculando hashes de {nome_tabela} ({len(arquivos)} arquivos)...")
+    total = executar_em_paralelo(config, calcular_hashes_worker, arquivos, nome_tabela, layout, tabela_linhas)
+
+    # Um hash por chave, independente da ordem dos registros nos arquivos. Nas
+    # tabelas com um registro por chave o hash do registro é mantido
+    hash_agrupado = "md5(string_agg(hash::text, ',' ORDER BY hash))::uuid"
+    if nome_tabela not in CHAVES_AGRUPADAS:
+        hash_agrupado = f"CASE WHEN COUNT(*) = 1 THEN (array_agg(hash))[1] ELSE {hash_agrupado} END"
+    executar(conn, f'''
+        CREATE UNLOGGED TABLE {tabela_hash} AS
+        SELECT chave, {hash_agrupado} AS hash
+        FROM {tabela_linhas} GROUP BY chave
+    ''')
+
+    if nome_tabela not in CHAVES_AGRUPADAS:
+        repetidas = executar(conn, f"SELECT chave FROM {tabela_linhas} GROUP BY chave HAVING COUNT(*) > 1 LIMIT 6")
+        if repetidas:
+            chaves = executar(conn, f"SELECT COUNT(*) FROM {tabela_hash}")[0][0]
+            exemplos = ', '.join(row[0] for row in repetidas[:5])
+            logger.warning(f"⚠ {nome_tabela}: {total - chaves:,} registros com {CHAVES[nome_tabela]} repetido "
+                           f"(ex.: {exemplos}{', ...' if len(repetidas) > 5 else ''}); "
+                           f"os registros de cada chave são comparados em conjunto")
+    executar(conn, f"DROP TABLE {tabela_linhas}")
+    conn.commit()
+
+    logger.info(f"Hashes de {nome_tabela}: {total:,} registros")
+    return total
+
+def inicializar_hashes(config, conn, pasta):
+    """Cria as tabelas _hash_<tabela> a partir dos arquivos do mês já carregado"""
+    for nome_tabela, layout in schema_tipado.obter_layouts(config).items():
+        start_time = time.time()
+        calcular_hashes(config, conn, pasta, nome_tabela, layout, f'_hash_novo_{nome_tabela}')
+        executar(conn, f"DROP TABLE IF EXISTS _hash_{nome_tabela}")
+        executar(conn, f"ALTER TABLE _hash_novo_{nome_tabela} RENAME TO _hash_{nome_tabela}")
+        executar(conn, f"ALTER TABLE _hash_{nome_tabela} SET LOGGED")
+        executar(conn, f"ALTER TABLE _hash_{nome_tabela} ADD PRIMARY KEY (chave)")
+        conn.commit()
+        logger.info(f"✓ _hash_{nome_tabela} criada em {time.time() - start_time:.2f}s")
+
+    data_referencia = fontes_dados.obter_data_referencia(pasta)
+    registrar_referencia(conn, 'cnpj_hash', data_referencia)
+    conn.commit()
+    logger.info(f"✓ Hashes inicializados para a referência {data_referencia}")
+
+def registrar_referencia(conn, referencia, valor):
+    """Grava (ou substitui) um valor na tabela _referencia"""
+    executar(conn, "CREATE TABLE IF NOT EXISTS _referencia (referencia VARCHAR(100), valor VARCHAR(100))")
+    executar(conn, "DELETE FROM _referencia WHERE referencia = %s", (referencia,))
+    executar(conn, "INSERT INTO _referencia (referencia, valor) VALUES (%s, %s)", (referencia, str(valor)))
+
+def obter_referencia(conn, referencia):
+    """Retorna um valor da tabela _referencia, ou None"""
+    if executar(conn, "SELECT to_regclass('_referencia')")[0][0] is None:
+        return None
+    linhas = executar(conn, "SELECT valor FROM _referencia WHERE referencia = %s", (referencia,))
+    return linhas[0][0] if linhas else None
+
+def incluir_socios_matrizes(config, conn):
+    """Inclui no delta dos sócios (como alterados) as empresas cuja matriz foi incluída, removida ou trocada.
+
+    Na carga completa, os sócios só entram em socios com o cnpj da matriz. Os
+    sócios dessas empresas são recarregados mesmo sem mudança própria: entram
+    quando a matriz aparece, saem quando ela é removida e recebem o novo cnpj.
+    Usa _delta_estabelecimento e _novo_estabelecimento, calculados antes.
+    """
+    chave = chave_delta(config, 'estabelecimento')
+    executar(conn, f'''
+        INSERT INTO _delta_socios_original (chave, operacao)
+        SELECT m.chave, 'U' FROM (
+            SELECT lpad(n.cnpj_basico::text, 8, '0') AS chave
+            FROM _novo_estabelecimento n JOIN _delta_estabelecimento d ON n.cnpj = {chave}
+            WHERE d.operacao = 'I' AND n.matriz_filial = '1'
+            UNION
+            SELECT lpad(e.cnpj_basico::text, 8, '0')
+            FROM estabelecimento e JOIN _delta_estabelecimento d ON e.cnpj = {chave}
+            WHERE d.operacao = 'D' AND e.matriz_filial = '1'
+            UNION
+            SELECT lpad(n.cnpj_basico::text, 8, '0')
+            FROM _novo_estabelecimento n JOIN estabelecimento e ON e.cnpj = n.cnpj
+            WHERE n.matriz_filial IS DISTINCT FROM e.matriz_filial
+        ) m
+        WHERE NOT EXISTS (SELECT 1 FROM _delta_socios_original s WHERE s.chave = m.chave)
+    ''')
+
+def calcular_delta(config, conn, pasta, nome_tabela, layout):
+    """Compara o novo mês com os hashes carregados e prepara _delta_<tabela> e _novo_<tabela>.
+
+    Retorna {'I': incluídos, 'U': alterados, 'D': removidos}.
+    """
+    calcular_hashes(config, conn, pasta, nome_tabela, layout, f'_hash_novo_{nome_tabela}')
+
+    executar(conn, f"DROP TABLE IF EXISTS _delta_{nome_tabela}")
+    executar(conn, f'''
+        CREATE UNLOGGED TABLE _delta_{nome_tabela} AS
+        SELECT COALESCE(n.chave, h.chave) AS chave,
+               CASE WHEN h.chave IS NULL THEN 'I' WHEN n.chave IS NULL THEN 'D' ELSE 'U' END AS operacao
+        FROM _hash_novo_{nome_tabela} n
+        FULL OUTER JOIN _hash_{nome_tabela} h ON h.chave = n.chave
+        WHERE n.hash IS DISTINCT FROM h.hash
+    ''')
+    if nome_tabela == 'socios_original':
+        incluir_socios_matrizes(config, conn)
+    contagem = dict(executar(conn, f"SELECT operacao, COUNT(*) FROM _delta_{nome_tabela} GROUP BY operacao"))
+    delta = {operacao: contagem.get(operacao, 0) for operacao in 'IUD'}
+    logger.info(f"Delta de {nome_tabela}: {delta['I']:,} incluídos, {delta['U']:,} alterados, {delta['D']:,} removidos")
+
+    executar(conn, f"DROP TABLE IF EXISTS _novo_{nome_tabela}")
+    executar(conn, f"CREATE UNLOGGED TABLE _novo_{nome_tabela} (LIKE {tabela_alvo(nome_tabela)})")
+    for filha in layout.filhas:
+        executar(conn, f"DROP TABLE IF EXISTS _novo_{filha.nome}")
+        executar(conn, f"CREATE UNLOGGED TABLE _novo_{filha.nome} (LIKE {filha.nome})")
+    conn.commit()
+
+    if delta['I'] or delta['U']:
+        arquivos = fontes_dados.listar_fontes(pasta, layout.extensao)
+        logger.info(f"Carregando registros incluídos/alterados de {nome_tabela}...")
+        executar_em_paralelo(config, carregar_alterados_worker, arquivos, nome_tabela, layout)
+
+    return delta
+
+def aplicar_delta(config, conn, nome_tabela, layout):
+    """Aplica o delta de uma tabela (deve ser confirmado junto com as demais)"""
+    chave = CHAVES[nome_tabela]
+    alvo = tabela_alvo(nome_tabela)
+    colunas = ', '.join(layout.colunas_destino)
+
+    executar(conn, f"DELETE FROM {alvo} t USING _delta_{nome_tabela} d WHERE t.{chave} = {chave_delta(config, nome_tabela)}")
+    for filha in layout.filhas:
+        executar(conn, f"DELETE FROM {filha.nome} t USING _delta_{nome_tabela} d WHERE t.{chave} = {chave_delta(config, nome_tabela)}")
+        executar(conn, f"INSERT INTO {filha.nome} ({', '.join(filha.colunas)}) SELECT {', '.join(filha.colunas)} FROM _novo_{filha.nome}")
+
+    if nome_tabela == 'socios_original':
+        # Mesma junção da carga completa: sócios recebem o cnpj da matriz
+        colunas_ts = ', '.join(f'ts.{coluna}' for coluna in layout.colunas_destino)
+        executar(conn, f'''
+            INSERT INTO socios (cnpj, {colunas})
+            SELECT te.cnpj, {colunas_ts}
+            FROM _novo_socios_original ts
+            JOIN estabelecimento te ON te.cnpj_basico = ts.cnpj_basico
+            WHERE te.matriz_filial = '1'
+        ''')
+    else:
+        executar(conn, f"INSERT INTO {alvo} ({colunas}) SELECT {colunas} FROM _novo_{nome_tabela}")
+
+    executar(conn, f"DELETE FROM _hash_{nome_tabela} h USING _delta_{nome_tabela} d WHERE h.chave = d.chave")
+    executar(conn, f'''
+        INSERT INTO _hash_{nome_tabela} (chave, hash)
+        SELECT n.chave, n.hash FROM _hash_novo_{nome_tabela} n
+        JOIN _delta_{nome_tabela} d ON d.chave = n.chave
+        WHERE d.operacao <> 'D'
+    ''')
+
+def recarregar_tabelas_codigo(conn, pasta):
+    """Recarrega as tabelas de códigos (pequenas) por inteiro, sem confirmar a transação.
+
+    DELETE + COPY na transação de conn: o chamador confirma junto com os deltas.
+    """
+    with conn.cursor() as cursor:
+        for nome_tabela, extensao in TABELAS_CODIGO.items():
+            arquivo = fontes_dados.listar_fontes(pasta, extensao)[0]
+            with fontes_dados.abrir_fonte(arquivo) as f:
+                linhas = [carga_copy.formatar_linha_copy(campos) for campos in carga_copy.LeitorRegistros(f)]
+            cursor.execute(f"DELETE FROM {nome_tabela}")
+            if linhas:
+                carga_copy.copiar_bloco(cursor, nome_tabela, ['codigo', 'descricao'], linhas)
+            logger.info(f"  {nome_tabela}: {len(linhas):,} linhas")
+
+def remover_tabelas_temporarias(conn):
+    for nome_tabela, layout in TABELAS_PRINCIPAIS.items():
+        for prefixo in ('_hash_novo_', '_delta_', '_novo_'):
+            executar(conn, f"DROP TABLE IF EXISTS {prefixo}{nome_tabela}")
+        for filha in layout.filhas:
+            executar(conn, f"DROP TABLE IF EXISTS _novo_{filha.nome}")
+    conn.commit()
+
+def atualizar(config, conn, pasta):
+    """Aplica o mês de referência dos arquivos da pasta sobre a base carregada"""
+    data_referencia = fontes_dados.obter_data_referencia(pasta)
+    referencia_carregada = obter_referencia(conn, 'CNPJ')
+    referencia_hash = obter_referencia(conn, 'cnpj_hash')
+
+    if referencia_hash is None or referencia_hash != referencia_carregada:
+        raise RuntimeError(f"Hashes ({referencia_hash}) não correspondem à base carregada ({referencia_carregada}). "
+                           f"Execute 'python carga_incremental.py --inicializar' com os arquivos do mês carregado.")
+    if data_referencia == referencia_carregada:
+        logger.info(f"✓ A base já está na referência {data_referencia}, nada a fazer")
+        return {}
+
+    logger.info(f"Atualizando da referência {referencia_carregada} para {data_referencia}")
+    start_time = time.time()
+
+    layouts = schema_tipado.obter_layouts(config)
+    deltas = {}
+    for nome_tabela, layout in layouts.items():
+        deltas[nome_tabela] = calcular_delta(config, conn, pasta, nome_tabela, layout)
+
+    # Tabelas de códigos e principais em uma transação: leitores veem o mês anterior ou o novo, nunca uma mistura
+    try:
+        logger.info("Recarregando tabelas de códigos...")
+        recarregar_tabelas_codigo(conn, pasta)
+
+        logger.info("Aplicando deltas...")
+        # estabelecimento antes de socios, que usa o cnpj da matriz
+        for nome_tabela, layout in layouts.items():
+            aplicar_delta(config, conn, nome_tabela, layout)
+
+        qtde_cnpjs = executar(conn, "SELECT COUNT(*) FROM estabelecimento")[0][0]
+        registrar_referencia(conn, 'CNPJ', data_referencia)
+        registrar_referencia(conn, 'cnpj_qtde', qtde_cnpjs)
+        registrar_referencia(conn, 'cnpj_hash', data_referencia)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    for nome_tabela in TABELAS_PRINCIPAIS:
+        executar(conn, f"ANALYZE {tabela_alvo(nome_tabela)}")
+    conn.commit()
+    remover_tabelas_temporarias(conn)
+
+    # Sem bloquear as leituras; não faz nada se a carga foi feita sem cnpj_completo
+    cnpj_completo.atualizar_visao(config)
+
+    logger.info(f"✓ Atualização incremental para {data_referencia} concluída em {time.time() - start_time:.2f}s")
+    return deltas
+
+def main():
+    """Função principal do script"""
+    global logger
+
+    parser = argparse.ArgumentParser(description='Atualização incremental da base CNPJ com um novo mês de referência')
+    parser.add_argument('--inicializar', action='store_true',
+                        help='Cria os hashes a partir dos arquivos do mês já carregado (executar uma vez após a carga completa)')
+    args = parser.parse_args()
+
+    logger = configurar_logging()
+    config = carregar_configuracao()
+    pasta = fontes_dados.pasta_dados(config)
+    if schema_carga.blue_green_ativo(config):
+        # A atualização é aplicada no schema lido pelas aplicações, em uma transação
+        schema_carga.usar_schema(config, config['schema_publicado'])
+
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        if args.inicializar:
+            inicializar_hashes(config, conn, pasta)
+        else:
+            deltas = atualizar(config, conn, pasta)
+            for nome_tabela, delta in deltas.items():
+                logger.info(f"  {tabela_alvo(nome_tabela):16}: +{delta['I']:,} ~{delta['U']:,} -{delta['D']:,}")
+    except Exception as e:
+        logger.error(f"✗ Erro na atualização incremental: {str(e)}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
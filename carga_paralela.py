@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Carga Paralela dos Arquivos CNPJ
+================================
+
+Este módulo carrega em paralelo os arquivos de uma tabela principal
+(Estabelecimentos0..9, Socios0..9, Empresas0..9) usando um pool de processos.
+
+Cada processo abre sua própria conexão e carrega o arquivo em sua própria
+transação via COPY (carga_copy.py). A quantidade de processos é limitada pelos
+núcleos do servidor de banco e pela memória disponível.
+
+Configurações opcionais no cnpj_config.json:
+    carga_workers: máximo de processos (padrão: sem limite além dos abaixo)
+    db_cores: núcleos do servidor PostgreSQL (padrão: núcleos desta máquina)
+    memoria_por_worker_mb: memória reservada por processo (padrão: 512)
+    parser_csv: leitor dos arquivos, "python" ou "pyarrow" (padrão: python, ver parser_arrow.py)
+"""
+
+import time
+import logging
+import psutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import carga_copy
+import fontes_dados
+
+logger = logging.getLogger(__name__)
+
+MEMORIA_POR_WORKER_MB = 512
+
+def obter_nucleos_banco(config):
+    """Retorna os núcleos do servidor de banco (db_cores ou, na falta, os desta máquina)"""
+    return config.get('db_cores') or psutil.cpu_count(logical=False) or psutil.cpu_count() or 1
+
+def calcular_workers(config, total_arquivos):
+    """Calcula quantos processos usar, limitado por núcleos do banco, memória e arquivos"""
+    nucleos_banco = obter_nucleos_banco(config)
+
+    memoria_disponivel = psutil.virtual_memory().available
+    memoria_por_worker = config.get('memoria_por_worker_mb', MEMORIA_POR_WORKER_MB) * 1024 * 1024
+    limite_memoria = max(1, int(memoria_disponivel // memoria_por_worker))
+
+    workers = min(nucleos_banco, limite_memoria, max(1, total_arquivos))
+    if config.get('carga_workers'):
+        workers = min(workers, config['carga_workers'])
+
+    logger.info(f"Workers de carga: {workers} (núcleos do banco: {nucleos_banco}, "
+                f"limite por memória: {limite_memoria}, arquivos: {total_arquivos})")
+    return max(1, workers)
+
+def carregar_arquivo_worker(config, arquivo, nome_tabela, layout):
+    """Carrega um arquivo em um processo do pool, com conexão e transação próprias"""
+    start_time = time.time()
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        linhas = carga_copy.carregar_arquivo_copy(conn, arquivo, nome_tabela, layout,
+                                                  parser=config.get('parser_csv', carga_copy.PARSER_PYTHON))
+    finally:
+        conn.close()
+    return arquivo, linhas, time.time() - start_time
+
+def carregar_arquivos_paralelo(config, arquivos, nome_tabela, layout):
+    """Carrega todos os arquivos de uma tabela em paralelo.
+
+    Retorna a quantidade total de linhas inseridas.
+    """
+    if not arquivos:
+        return 0
+
+    workers = calcular_workers(config, len(arquivos))
+    tamanho_total = sum(fontes_dados.identificar_fonte(arquivo)[1] for arquivo in arquivos)
+    total_linhas = 0
+    tempo_workers = 0.0
+    start_time = time.time()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = [
+            executor.submit(carregar_arquivo_worker, config, arquivo, nome_tabela, layout)
+            for arquivo in arquivos
+        ]
+
+        for concluidos, futuro in enumerate(as_completed(futuros), 1):
+            arquivo, linhas, duracao = futuro.result()
+            total_linhas += linhas
+            tempo_workers += duracao
+            logger.info(f"✓ [{concluidos}/{len(arquivos)}] {fontes_dados.nome_fonte(arquivo)}: "
+                        f"{linhas:,} linhas em {duracao:.2f}s ({linhas / max(duracao, 1e-9):,.0f} linhas/s)")
+
+    duracao_total = time.time() - start_time
+    logger.info(f"Tabela {nome_tabela}: {total_linhas:,} linhas de {len(arquivos)} arquivos em {duracao_total:.2f}s")
+    logger.info(f"  Vazão combinada: {total_linhas / max(duracao_total, 1e-9):,.0f} linhas/s, "
+                f"{tamanho_total / (1024 * 1024) / max(duracao_total, 1e-9):.1f} MB/s")
+    logger.info(f"  Paralelismo efetivo: {tempo_workers / max(duracao_total, 1e-9):.1f}x com {workers} workers")
+    return total_linhas
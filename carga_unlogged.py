@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Carga em Tabelas UNLOGGED
+=========================
+
+Com tabelas_unlogged no cnpj_config.json, o 02_criar_tabelas.py cria as tabelas
+como UNLOGGED e o 03_inserir_dados.py carrega os dados, monta a tabela socios e
+constrói os índices sem gravar WAL. Ao final, as tabelas passam para LOGGED com
+ALTER TABLE ... SET LOGGED (em paralelo, uma conexão por tabela), a menos que
+manter_unlogged esteja ativo.
+
+O 03_inserir_dados.py informa o WAL gerado (diferença de pg_current_wal_lsn)
+durante a carga e durante o SET LOGGED, e o volume de tabelas + índices, que é
+aproximadamente o WAL que a carga em tabelas normais teria escrito a mais.
+
+Segurança e réplicas:
+    - Tabelas UNLOGGED são esvaziadas pelo PostgreSQL após uma queda do
+      servidor. Por isso o _carga_manifest também é UNLOGGED nesse modo: após
+      uma queda, manifesto e dados são esvaziados juntos e a carga recomeça do
+      início, em vez de "retomar" sobre tabelas vazias.
+    - Tabelas UNLOGGED não são replicadas: nas réplicas elas existem mas não
+      podem ser lidas. O SET LOGGED grava a tabela inteira no WAL uma vez, e só
+      então ela aparece nas réplicas.
+    - manter_unlogged = true deixa as tabelas sem WAL permanentemente: só use
+      em bancos sem réplicas e que podem ser recarregados após uma queda.
+
+Configurações opcionais no cnpj_config.json:
+    tabelas_unlogged: cria e carrega as tabelas como UNLOGGED (padrão: false)
+    manter_unlogged: não executa o SET LOGGED ao final (padrão: false)
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import carga_copy
+import indices_cnpj
+
+logger = logging.getLogger(__name__)
+
+def unlogged_ativo(config):
+    """Indica se as tabelas devem ser criadas e carregadas como UNLOGGED"""
+    return bool(config.get('tabelas_unlogged'))
+
+def comando_criar_tabela(config):
+    """Retorna 'CREATE UNLOGGED TABLE' ou 'CREATE TABLE', conforme a configuração"""
+    return 'CREATE UNLOGGED TABLE' if unlogged_ativo(config) else 'CREATE TABLE'
+
+def posicao_wal(conn):
+    """Retorna a posição atual do WAL (LSN) como texto, ou None se não disponível"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_current_wal_lsn()::text")
+            return cursor.fetchone()[0]
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"⚠ Não foi possível ler a posição do WAL: {str(e)}")
+        return None
+
+def wal_gerado(conn, desde):
+    """Retorna os bytes de WAL gerados desde a posição informada (None se desconhecido)"""
+    if desde is None:
+        return None
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s::pg_lsn)::bigint", (desde,))
+        return cursor.fetchone()[0]
+
+def listar_tabelas_unlogged(conn):
+    """Retorna {tabela: tamanho com índices em bytes} das tabelas UNLOGGED do schema atual"""
+    with conn.cursor() as cursor:
+        cursor.execute('''
+            SELECT c.relname, pg_total_relation_size(c.oid)
+            FROM pg_class c
+            WHERE c.relnamespace = current_schema()::regnamespace
+              AND c.relkind = 'r' AND c.relpersistence = 'u'
+        ''')
+        return dict(cursor.fetchall())
+
+def tornar_logged_tabela(config, tabela):
+    """Executa ALTER TABLE ... SET LOGGED em uma conexão própria e retorna a duração"""
+    start_time = time.time()
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {tabela} SET LOGGED")
+    finally:
+        conn.close()
+    return time.time() - start_time
+
+def tornar_logged(config, tabelas):
+    """Passa as tabelas para LOGGED em paralelo, maiores primeiro.
+
+    Retorna a quantidade de tabelas com erro.
+    """
+    conexoes, _, _ = indices_cnpj.calcular_parametros(config, len(tabelas))
+    com_erro = 0
+    with ThreadPoolExecutor(max_workers=conexoes) as executor:
+        futuros = {
+            executor.submit(tornar_logged_tabela, config, tabela): tabela
+            for tabela in sorted(tabelas, key=tabelas.get, reverse=True)
+        }
+        for futuro in as_completed(futuros):
+            tabela = futuros[futuro]
+            try:
+                logger.info(f"✓ {tabela} ({tabelas[tabela] / (1024**3):.2f} GB) passou para LOGGED em {futuro.result():.2f}s")
+            except Exception as e:
+                com_erro += 1
+                logger.error(f"✗ Erro ao passar {tabela} para LOGGED: {str(e)}")
+    return com_erro
+
+def finalizar_carga(config, wal_inicio):
+    """Informa o WAL gerado e passa as tabelas para LOGGED (salvo com manter_unlogged).
+
+    Retorna a quantidade de tabelas com erro.
+    """
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        wal_carga = wal_gerado(conn, wal_inicio)
+        tabelas = listar_tabelas_unlogged(conn)
+        volume = sum(tabelas.values())
+
+        logger.info(f"Tabelas UNLOGGED: {len(tabelas)} ({volume / (1024**3):.2f} GB com índices)")
+        if wal_carga is not None:
+            logger.info(f"WAL gerado durante a carga: {wal_carga / (1024**3):.2f} GB")
+            logger.info(f"WAL evitado na carga: ~{max(volume - wal_carga, 0) / (1024**3):.2f} GB "
+                        f"(tabelas normais gravariam os dados e os índices também no WAL)")
+
+        if config.get('manter_unlogged'):
+            logger.warning("⚠ manter_unlogged ativo: as tabelas continuam UNLOGGED "
+                           "(não replicadas e esvaziadas após uma queda do servidor)")
+            return 0
+
+        if not tabelas:
+            return 0
+
+        wal_antes = posicao_wal(conn)
+        start_time = time.time()
+        com_erro = tornar_logged(config, tabelas)
+        wal_set_logged = wal_gerado(conn, wal_antes)
+        logger.info(f"SET LOGGED concluído em {time.time() - start_time:.2f}s"
+                    + (f", {wal_set_logged / (1024**3):.2f} GB de WAL (uma única gravação de cada tabela)" if wal_set_logged is not None else ""))
+        return com_erro
+    finally:
+        conn.close()
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Visão Materializada cnpj_completo
+=================================
+
+Com cnpj_completo no cnpj_config.json, o 03_inserir_dados.py cria, logo após
+os SQLs finais, a visão materializada cnpj_completo: uma linha por cnpj com o
+estabelecimento, a empresa e o Simples já juntos, os códigos já decodificados
+(tabelas de códigos e domínios fixos do leiaute) e capital_social numérico.
+
+A leitura de um registro completo passa a ser uma busca no índice único de
+cnpj, em vez de juntar estabelecimento, empresas, simples e as tabelas de
+códigos a cada consulta:
+
+    SELECT * FROM cnpj_completo WHERE cnpj = '00000000000191';
+
+O índice único permite REFRESH MATERIALIZED VIEW CONCURRENTLY, que recalcula a
+visão sem bloquear as leituras. A atualização incremental (carga_incremental.py)
+faz esse REFRESH ao final; para fazê-lo manualmente:
+
+    python cnpj_completo.py --atualizar
+
+A visão ocupa aproximadamente o espaço de estabelecimento + empresas.
+
+Configurações opcionais no cnpj_config.json:
+    cnpj_completo: cria a visão materializada na carga (padrão: false)
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+import carga_copy
+import schema_carga
+import indices_cnpj
+from consulta_cnpj import DOMINIOS
+
+logger = logging.getLogger(__name__)
+
+NOME_VISAO = 'cnpj_completo'
+
+INDICES_VISAO = [
+    indices_cnpj.Indice('idx_cnpj_completo_cnpj_basico', NOME_VISAO, 'cnpj_basico'),
+]
+
+def visao_ativa(config):
+    """Indica se a visão cnpj_completo deve ser criada na carga"""
+    return bool(config.get('cnpj_completo'))
+
+def sql_dominio(expressao, dominio):
+    """CASE que decodifica um código de domínio fixo (funciona com colunas texto ou numéricas)"""
+    casos = ' '.join(
+        f"WHEN '{str(codigo).lstrip('0')}' THEN '{descricao}'" for codigo, descricao in DOMINIOS[dominio].items()
+    )
+    return f"CASE ltrim({expressao}::text, '0') {casos} END"
+
+def sql_codigo(tabela):
+    """Tabela de códigos sem códigos repetidos (a junção não pode duplicar cnpjs).
+
+    A chave é o código sem zeros à esquerda, como em sql_dominio: '0001' e 1 se juntam.
+    """
+    return (f"(SELECT DISTINCT ON (chave) chave, descricao FROM "
+            f"(SELECT ltrim(codigo::text, '0') AS chave, descricao FROM {tabela}) codigos ORDER BY chave)")
+
+def sql_por_empresa(tabela):
+    """Tabela com no máximo um registro por cnpj_basico (a junção não pode duplicar cnpjs).
+
+    A carga completa mantém registros repetidos dos arquivos (ver
+    carga_incremental.calcular_hashes); fica um deles.
+    """
+    return f"(SELECT DISTINCT ON (cnpj_basico) * FROM {tabela} ORDER BY cnpj_basico)"
+
+def sql_juncao(tabela, apelido, coluna):
+    return f"LEFT JOIN {sql_codigo(tabela)} {apelido} ON {apelido}.chave = ltrim({coluna}::text, '0')"
+
+# DISTINCT ON (te.cnpj): um cnpj repetido em estabelecimento impediria o índice único
+SQL_VISAO = f'''
+    SELECT DISTINCT ON (te.cnpj)
+        te.cnpj, te.cnpj_basico, te.cnpj_ordem, te.cnpj_dv,
+        emp.razao_social, te.nome_fantasia,
+        te.matriz_filial, {sql_dominio('te.matriz_filial', 'matriz_filial')} AS matriz_filial_descricao,
+        te.situacao_cadastral, {sql_dominio('te.situacao_cadastral', 'situacao_cadastral')} AS situacao_cadastral_descricao,
+        te.data_situacao_cadastral,
+        te.motivo_situacao_cadastral, mot.descricao AS motivo_situacao_cadastral_descricao,
+        te.data_inicio_atividades,
+        te.cnae_fiscal, cnae.descricao AS cnae_fiscal_descricao, te.cnae_fiscal_secundaria,
+        te.tipo_logradouro, te.logradouro, te.numero, te.complemento, te.bairro, te.cep, te.uf,
+        te.municipio, mun.descricao AS municipio_descricao,
+        te.nome_cidade_exterior, te.pais, pais.descricao AS pais_descricao,
+        te.ddd1, te.telefone1, te.ddd2, te.telefone2, te.ddd_fax, te.fax, te.correio_eletronico,
+        te.situacao_especial, te.data_situacao_especial,
+        emp.natureza_juridica, nat.descricao AS natureza_juridica_descricao,
+        emp.qualificacao_responsavel, qual.descricao AS qualificacao_responsavel_descricao,
+        emp.capital_social,
+        emp.porte_empresa, {sql_dominio('emp.porte_empresa', 'porte_empresa')} AS porte_empresa_descricao,
+        emp.ente_federativo_responsavel,
+        sim.opcao_simples, sim.data_opcao_simples, sim.data_exclusao_simples,
+        sim.opcao_mei, sim.data_opcao_mei, sim.data_exclusao_mei
+    FROM estabelecimento te
+    LEFT JOIN {sql_por_empresa('empresas')} emp ON emp.cnpj_basico = te.cnpj_basico
+    LEFT JOIN {sql_por_empresa('simples')} sim ON sim.cnpj_basico = te.cnpj_basico
+    {sql_juncao('motivo', 'mot', 'te.motivo_situacao_cadastral')}
+    {sql_juncao('cnae', 'cnae', 'te.cnae_fiscal')}
+    {sql_juncao('municipio', 'mun', 'te.municipio')}
+    {sql_juncao('pais', 'pais', 'te.pais')}
+    {sql_juncao('natureza_juridica', 'nat', 'emp.natureza_juridica')}
+    {sql_juncao('qualificacao_socio', 'qual', 'emp.qualificacao_responsavel')}
+    ORDER BY te.cnpj
+'''
+
+def visao_existe(cursor):
+    cursor.execute("SELECT to_regclass(%s)", (NOME_VISAO,))
+    return cursor.fetchone()[0] is not None
+
+def criar_visao(config):
+    """Cria (ou recria) a visão cnpj_completo com seus índices.
+
+    Retorna (comandos executados, comandos com erro).
+    """
+    _, memoria_mb, workers_paralelos = indices_cnpj.calcular_parametros(config, 1)
+    start_time = time.time()
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SET work_mem = '{memoria_mb}MB'")
+            cursor.execute(f"SET max_parallel_workers_per_gather = {workers_paralelos}")
+            cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {NOME_VISAO}")
+            cursor.execute(f"CREATE MATERIALIZED VIEW {NOME_VISAO} AS {SQL_VISAO}")
+            # Índice único: chave da busca e requisito do REFRESH ... CONCURRENTLY
+            cursor.execute(f"CREATE UNIQUE INDEX idx_{NOME_VISAO}_cnpj ON {NOME_VISAO} (cnpj)")
+            cursor.execute(f"ANALYZE {NOME_VISAO}")
+            cursor.execute(f"SELECT COUNT(*) FROM {NOME_VISAO}")
+            total = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM estabelecimento")
+            repetidos = cursor.fetchone()[0] - total
+            if repetidos:
+                logger.warning(f"⚠ estabelecimento: {repetidos:,} registros com cnpj repetido; "
+                               f"a visão {NOME_VISAO} mantém um registro por cnpj")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"✗ Erro ao criar a visão {NOME_VISAO}: {str(e)}")
+        return 0, 1
+    finally:
+        conn.close()
+
+    logger.info(f"✓ Visão {NOME_VISAO} criada com {total:,} linhas em {time.time() - start_time:.2f}s")
+    executados, com_erro = indices_cnpj.construir_indices(config, INDICES_VISAO, f'índices da visão {NOME_VISAO}')
+    return executados + 1, com_erro
+
+def atualizar_visao(config, concorrente=True):
+    """Recalcula a visão (CONCURRENTLY: sem bloquear as leituras). Não faz nada se ela não existir.
+
+    Retorna a duração em segundos, ou None se a visão não existe.
+    """
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            if not visao_existe(cursor):
+                return None
+            start_time = time.time()
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concorrente else ''}{NOME_VISAO}")
+    finally:
+        conn.close()
+    duracao = time.time() - start_time
+    logger.info(f"✓ Visão {NOME_VISAO} atualizada em {duracao:.2f}s")
+    return duracao
+
+def main():
+    """Cria ou atualiza a visão cnpj_completo em uma base já carregada"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Visão materializada cnpj_completo')
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument('--criar', action='store_true', help='Cria (ou recria) a visão e seus índices')
+    grupo.add_argument('--atualizar', action='store_true', help='REFRESH MATERIALIZED VIEW CONCURRENTLY')
+    args = parser.parse_args()
+
+    if not os.path.exists('cnpj_config.json'):
+        print("❌ Arquivo de configuração 'cnpj_config.json' não encontrado!")
+        sys.exit(1)
+    with open('cnpj_config.json', 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if schema_carga.blue_green_ativo(config):
+        schema_carga.usar_schema(config, config['schema_publicado'])
+
+    if args.criar:
+        _, com_erro = criar_visao(config)
+        sys.exit(1 if com_erro else 0)
+    if atualizar_visao(config) is None:
+        print(f"❌ A visão {NOME_VISAO} não existe: crie com --criar")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
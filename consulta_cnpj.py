@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Consulta de CNPJs com Tabelas de Códigos em Memória
+===================================================
+
+As tabelas de códigos (cnae, motivo, municipio, natureza_juridica, pais,
+qualificacao_socio) têm poucos milhares de linhas e só mudam uma vez por mês.
+Em vez de juntá-las a cada consulta, ConsultaCNPJ as carrega uma vez em
+dicionários {codigo: descricao} e decodifica os códigos em Python:
+
+    consulta = ConsultaCNPJ(config)
+    consulta.decode('municipio', '7107')        # 'SAO PAULO'
+    consulta.get_cnpj('00.000.000/0001-91')     # registro completo, decodificado
+
+get_cnpj faz uma única consulta (estabelecimento + empresas + simples) e outra
+para os sócios, e guarda o resultado em um cache LRU. A cada
+intervalo_referencia segundos a _referencia é relida: se o mês carregado mudou
+(nova carga, atualização incremental ou troca de schema), os dicionários são
+recarregados e o cache é esvaziado.
+
+Os códigos podem ser informados como texto ('0001', '01') ou número (1), o que
+funciona tanto no schema original quanto no schema tipado (ver schema_tipado.py).
+Os registros devolvidos pelo cache são compartilhados: não os altere.
+
+Uso:
+    python consulta_cnpj.py 00000000000191
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from functools import lru_cache
+
+import carga_copy
+import schema_carga
+from layout_cnpj import TABELAS_CODIGO, COLUNAS_DESTINO_EMPRESAS, COLUNAS_SIMPLES
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_CACHE = 10000
+INTERVALO_REFERENCIA = 60
+
+# Códigos com domínio fixo, definidos no leiaute da Receita (sem tabela no banco)
+DOMINIOS = {
+    'matriz_filial': {1: 'MATRIZ', 2: 'FILIAL'},
+    'situacao_cadastral': {1: 'NULA', 2: 'ATIVA', 3: 'SUSPENSA', 4: 'INAPTA', 8: 'BAIXADA'},
+    'porte_empresa': {0: 'NÃO INFORMADO', 1: 'MICRO EMPRESA', 3: 'EMPRESA DE PEQUENO PORTE', 5: 'DEMAIS'},
+    'identificador_de_socio': {1: 'PESSOA JURÍDICA', 2: 'PESSOA FÍSICA', 3: 'ESTRANGEIRO'},
+    'faixa_etaria': {0: 'NÃO SE APLICA', 1: '0 A 12 ANOS', 2: '13 A 20 ANOS', 3: '21 A 30 ANOS', 4: '31 A 40 ANOS',
+                     5: '41 A 50 ANOS', 6: '51 A 60 ANOS', 7: '61 A 70 ANOS', 8: '71 A 80 ANOS', 9: 'MAIS DE 80 ANOS'},
+}
+
+# Coluna do registro -> tabela de códigos (ou domínio) usada para decodificá-la
+DECODIFICACAO = {
+    'matriz_filial': 'matriz_filial',
+    'situacao_cadastral': 'situacao_cadastral',
+    'motivo_situacao_cadastral': 'motivo',
+    'pais': 'pais',
+    'cnae_fiscal': 'cnae',
+    'municipio': 'municipio',
+    'natureza_juridica': 'natureza_juridica',
+    'qualificacao_responsavel': 'qualificacao_socio',
+    'porte_empresa': 'porte_empresa',
+}
+
+DECODIFICACAO_SOCIOS = {
+    'identificador_de_socio': 'identificador_de_socio',
+    'qualificacao_socio': 'qualificacao_socio',
+    'qualificacao_representante_legal': 'qualificacao_socio',
+    'pais': 'pais',
+    'faixa_etaria': 'faixa_etaria',
+}
+
+# Estabelecimento com os dados da empresa e do Simples (sem o filtro)
+SQL_REGISTRO = f'''
+    SELECT te.*, {', '.join(f'emp.{coluna}' for coluna in COLUNAS_DESTINO_EMPRESAS[1:])},
+           {', '.join(f'sim.{coluna}' for coluna in COLUNAS_SIMPLES[1:])}
+    FROM estabelecimento te
+    LEFT JOIN empresas emp ON emp.cnpj_basico = te.cnpj_basico
+    LEFT JOIN simples sim ON sim.cnpj_basico = te.cnpj_basico
+'''
+
+SQL_CNPJ = SQL_REGISTRO + 'WHERE te.cnpj = %s'
+
+SQL_SOCIOS = 'SELECT * FROM socios WHERE cnpj_basico = %s'
+
+def normalizar_codigo(codigo):
+    """Chave dos dicionários: códigos numéricos viram int ('0001', '1' e 1 são o mesmo código)"""
+    if codigo is None:
+        return None
+    texto = str(codigo).strip()
+    return int(texto) if texto.isdigit() else texto
+
+def normalizar_cnpj(cnpj):
+    """Remove a pontuação do CNPJ e completa com zeros à esquerda"""
+    return re.sub(r'\D', '', str(cnpj)).zfill(14)
+
+def linhas_como_dicts(cursor):
+    colunas = [descricao[0] for descricao in cursor.description]
+    return [dict(zip(colunas, row)) for row in cursor.fetchall()]
+
+class ConsultaCNPJ:
+    """Consulta de CNPJs com tabelas de códigos em memória e cache LRU dos registros.
+
+    Usa uma conexão própria (psycopg2, autocommit). Com tamanho_cache=0 o cache
+    de registros é desativado.
+    """
+
+    def __init__(self, config, tamanho_cache=TAMANHO_CACHE, intervalo_referencia=INTERVALO_REFERENCIA):
+        self.config = config
+        self.intervalo_referencia = intervalo_referencia
+        self.conn = carga_copy.conectar_psycopg2(config)
+        self.conn.autocommit = True
+        self.trava = threading.Lock()
+        self.codigos = {}
+        self.referencia = None
+        self.verificado_em = 0
+        self._consultar = lru_cache(maxsize=tamanho_cache)(self.consultar_cnpj) if tamanho_cache else self.consultar_cnpj
+        self.verificar_referencia(forcar=True)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def ler_referencia(self):
+        with self.trava, self.conn.cursor() as cursor:
+            cursor.execute("SELECT valor FROM _referencia WHERE referencia = 'CNPJ'")
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def carregar_codigos(self):
+        """Lê as tabelas de códigos para dicionários {codigo: descricao}"""
+        codigos = {}
+        with self.trava, self.conn.cursor() as cursor:
+            for nome_tabela in TABELAS_CODIGO:
+                cursor.execute(f"SELECT codigo, descricao FROM {nome_tabela}")
+                codigos[nome_tabela] = {normalizar_codigo(codigo): descricao for codigo, descricao in cursor.fetchall()}
+        self.codigos = codigos
+        logger.info(f"Tabelas de códigos carregadas: {', '.join(f'{t} ({len(c)})' for t, c in codigos.items())}")
+
+    def verificar_referencia(self, forcar=False):
+        """Recarrega os códigos e esvazia o cache se a referência carregada mudou"""
+        agora = time.monotonic()
+        if not forcar and agora - self.verificado_em < self.intervalo_referencia:
+            return
+        self.verificado_em = agora
+        referencia = self.ler_referencia()
+        if forcar or referencia != self.referencia:
+            if self.referencia is not None:
+                logger.info(f"Referência mudou ({self.referencia} -> {referencia}), recarregando códigos e esvaziando o cache")
+            self.carregar_codigos()
+            self.invalidar_cache()
+            self.referencia = referencia
+
+    def invalidar_cache(self):
+        if hasattr(self._consultar, 'cache_clear'):
+            self._consultar.cache_clear()
+
+    def decode(self, tabela, codigo):
+        """Descrição de um código de uma tabela de códigos ou domínio fixo, ou None"""
+        self.verificar_referencia()
+        dominio = DOMINIOS.get(tabela)
+        if dominio is None:
+            dominio = self.codigos.get(tabela)
+            if dominio is None:
+                raise ValueError(f"Tabela de códigos desconhecida: {tabela}")
+        return dominio.get(normalizar_codigo(codigo))
+
+    def decodificar(self, registro, decodificacao):
+        """Acrescenta <coluna>_descricao ao registro para cada coluna codificada"""
+        for coluna, tabela in decodificacao.items():
+            if coluna in registro:
+                registro[f'{coluna}_descricao'] = self.decode(tabela, registro[coluna])
+        return registro
+
+    def consultar_cnpj(self, cnpj):
+        """Lê e decodifica um CNPJ no banco (sem cache)"""
+        with self.trava, self.conn.cursor() as cursor:
+            cursor.execute(SQL_CNPJ, (cnpj,))
+            registros = linhas_como_dicts(cursor)
+            if not registros:
+                return None
+            registro = registros[0]
+            cursor.execute(SQL_SOCIOS, (registro['cnpj_basico'],))
+            socios = linhas_como_dicts(cursor)
+
+        self.decodificar(registro, DECODIFICACAO)
+        registro['cnaes_secundarios'] = [
+            {'codigo': cnae, 'descricao': self.decode('cnae', cnae)}
+            for cnae in (registro.get('cnae_fiscal_secundaria') or '').split(',') if cnae
+        ]
+        registro['socios'] = [self.decodificar(socio, DECODIFICACAO_SOCIOS) for socio in socios]
+        return registro
+
+    def get_cnpj(self, cnpj):
+        """Registro completo e decodificado de um CNPJ (com ou sem pontuação), ou None"""
+        self.verificar_referencia()
+        return self._consultar(normalizar_cnpj(cnpj))
+
+def main():
+    """Consulta um CNPJ pela linha de comando e mostra o registro em JSON"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Consulta um CNPJ com os códigos decodificados')
+    parser.add_argument('cnpj', help='CNPJ com ou sem pontuação')
+    args = parser.parse_args()
+
+    if not os.path.exists('cnpj_config.json'):
+        print("❌ Arquivo de configuração 'cnpj_config.json' não encontrado!")
+        sys.exit(1)
+    with open('cnpj_config.json', 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if schema_carga.blue_green_ativo(config):
+        schema_carga.usar_schema(config, config['schema_publicado'])
+
+    with ConsultaCNPJ(config, tamanho_cache=0) as consulta:
+        registro = consulta.get_cnpj(args.cnpj)
+    if registro is None:
+        print(f"❌ CNPJ {normalizar_cnpj(args.cnpj)} não encontrado")
+        sys.exit(1)
+    print(json.dumps(registro, ensure_ascii=False, indent=2, default=str))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Download Retomável
+==================
+
+Este módulo baixa arquivos grandes via HTTP com retomada: o conteúdo é gravado
+em '<arquivo>.part' e, se a conexão cair, o download continua do ponto em que
+parou usando requisições com cabeçalho Range, em vez de recomeçar do zero.
+
+Arquivos grandes podem ser divididos em segmentos baixados em paralelo, cada um
+com sua própria conexão.
+
+O estado de cada arquivo (ETag, Last-Modified, tamanho e bytes baixados de cada
+segmento) fica em '.<arquivo>.download.json', na mesma pasta. Um arquivo já
+concluído cujo ETag/Last-Modified/tamanho não mudou no servidor é pulado; se o
+arquivo mudou (novo mês publicado), o download parcial é descartado.
+
+O arquivo concluído é conferido pelo tamanho informado pelo servidor
+(Content-Length); a Receita não publica checksums dos arquivos. O CRC32 de cada
+membro dos ZIPs é conferido depois, na descompactação.
+
+A sessão HTTP pode ser informada pelo chamador, o que permite testar o módulo
+contra um servidor HTTP local (ver tests/test_download_retomavel.py).
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_BLOCO = 1024 * 1024
+TAMANHO_MINIMO_SEGMENTO = 64 * 1024 * 1024
+# Intervalo, em bytes baixados por segmento, entre gravações do estado
+INTERVALO_ESTADO = 16 * 1024 * 1024
+TENTATIVAS = 5
+TIMEOUT = 60
+
+class ArquivoAlteradoError(Exception):
+    """O arquivo mudou no servidor durante o download"""
+
+def caminho_estado(destino):
+    """Retorna o caminho do arquivo de estado de um download"""
+    pasta, nome = os.path.split(destino)
+    return os.path.join(pasta, f'.{nome}.download.json')
+
+def carregar_estado(destino):
+    """Carrega o estado de um download, ou None"""
+    try:
+        with open(caminho_estado(destino), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def salvar_estado(destino, estado):
+    """Grava o estado de um download de forma atômica"""
+    caminho = caminho_estado(destino)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2)
+    os.replace(temporario, caminho)
+
+def consultar_remoto(sessao, url):
+    """Retorna {'tamanho', 'etag', 'last_modified', 'aceita_range'} do arquivo no servidor"""
+    resposta = sessao.head(url, allow_redirects=True, timeout=TIMEOUT)
+    resposta.raise_for_status()
+    tamanho = resposta.headers.get('Content-Length')
+    return {
+        'tamanho': int(tamanho) if tamanho is not None else None,
+        'etag': resposta.headers.get('ETag'),
+        'last_modified': resposta.headers.get('Last-Modified'),
+        'aceita_range': resposta.headers.get('Accept-Ranges', '').lower() == 'bytes',
+    }
+
+def mesmo_arquivo(estado, remoto):
+    """Indica se o estado salvo corresponde ao mesmo arquivo publicado no servidor"""
+    return (estado is not None
+            and estado.get('tamanho') == remoto['tamanho']
+            and estado.get('etag') == remoto['etag']
+            and estado.get('last_modified') == remoto['last_modified'])
+
+def planejar_segmentos(tamanho, segmentos):
+    """Divide [0, tamanho) em até N segmentos [inicio, fim] (fim inclusivo)"""
+    segmentos = max(1, min(segmentos, tamanho // TAMANHO_MINIMO_SEGMENTO))
+    passo = -(-tamanho // segmentos)
+    return [
+        {'inicio': inicio, 'fim': min(inicio + passo, tamanho) - 1, 'baixado': 0}
+        for inicio in range(0, tamanho, passo)
+    ]
+
+class _Download:
+    """Download de um arquivo com segmentos, estado compartilhado entre as threads"""
+
+    def __init__(self, sessao, url, destino, estado, tentativas):
+        self.sessao = sessao
+        self.url = url
+        self.destino = destino
+        self.parcial = destino + '.part'
+        self.estado = estado
+        self.tentativas = tentativas
+        self.lock = threading.Lock()
+
+    def registrar(self, segmento, baixado):
+        with self.lock:
+            segmento['baixado'] = baixado
+            salvar_estado(self.destino, self.estado)
+
+    def baixar_segmento(self, segmento):
+        """Baixa um segmento, retomando do último byte gravado a cada nova tentativa"""
+        tamanho_segmento = segmento['fim'] - segmento['inicio'] + 1
+
+        for tentativa in range(1, self.tentativas + 1):
+            baixado = segmento['baixado']
+            if baixado >= tamanho_segmento:
+                return
+            headers = {'Range': f"bytes={segmento['inicio'] + baixado}-{segmento['fim']}"}
+            # Garante que os bytes retomados são do mesmo arquivo (ETag fraco não vale para If-Range)
+            etag = self.estado.get('etag')
+            validador = etag if etag and not etag.startswith('W/') else self.estado.get('last_modified')
+            if validador:
+                headers['If-Range'] = validador
+
+            try:
+                with self.sessao.get(self.url, headers=headers, stream=True, timeout=TIMEOUT) as resposta:
+                    if resposta.status_code == 200:
+                        raise ArquivoAlteradoError(f"{os.path.basename(self.destino)} mudou no servidor durante o download")
+                    resposta.raise_for_status()
+
+                    with open(self.parcial, 'r+b') as f:
+                        f.seek(segmento['inicio'] + baixado)
+                        desde_estado = 0
+                        for bloco in resposta.iter_content(TAMANHO_BLOCO):
+                            bloco = bloco[:tamanho_segmento - baixado]
+                            f.write(bloco)
+                            baixado += len(bloco)
+                            desde_estado += len(bloco)
+                            if desde_estado >= INTERVALO_ESTADO:
+                                # Só registra bytes que já estão no arquivo
+                                f.flush()
+                                self.registrar(segmento, baixado)
+                                desde_estado = 0
+                            if baixado >= tamanho_segmento:
+                                break
+                        f.flush()
+                    self.registrar(segmento, baixado)
+
+                if baixado >= tamanho_segmento:
+                    return
+                raise requests.exceptions.ConnectionError('conexão encerrada antes do fim do segmento')
+
+            except requests.exceptions.RequestException as e:
+                self.registrar(segmento, baixado)
+                if tentativa == self.tentativas:
+                    raise
+                espera = min(60, 2 ** tentativa)
+                logger.warning(f"⚠ {os.path.basename(self.destino)}: {e} "
+                               f"(tentativa {tentativa}/{self.tentativas}, retomando de {segmento['inicio'] + baixado:,} em {espera}s)")
+                time.sleep(espera)
+
+def baixar_sem_range(sessao, url, destino, estado):
+    """Baixa o arquivo inteiro em uma única requisição (servidor sem suporte a Range).
+
+    O tamanho esperado é o do HEAD ou, se ele não informou, o Content-Length do
+    GET; só sem nenhum dos dois o tamanho recebido é aceito sem conferência.
+    """
+    parcial = destino + '.part'
+    with sessao.get(url, stream=True, timeout=TIMEOUT) as resposta:
+        resposta.raise_for_status()
+        tamanho = resposta.headers.get('Content-Length')
+        if estado['tamanho'] is None and tamanho is not None and 'Content-Encoding' not in resposta.headers:
+            estado['tamanho'] = int(tamanho)
+        with open(parcial, 'wb') as f:
+            for bloco in resposta.iter_content(TAMANHO_BLOCO):
+                f.write(bloco)
+    if estado['tamanho'] is None:
+        logger.warning(f"⚠ {os.path.basename(destino)}: servidor não informou o tamanho, download não conferido")
+        estado['tamanho'] = os.path.getsize(parcial)
+
+def baixar_arquivo(url, pasta, nome=None, sessao=None, segmentos=1, tentativas=TENTATIVAS):
+    """Baixa um arquivo para a pasta, retomando um download parcial anterior.
+
+    Retorna (caminho, bytes baixados nesta execução). Arquivos já concluídos e
+    inalterados no servidor são pulados (0 bytes baixados).
+    """
+    sessao = sessao or requests.Session()
+    nome = nome or os.path.basename(url)
+    destino = os.path.join(pasta, nome)
+    parcial = destino + '.part'
+
+    remoto = consultar_remoto(sessao, url)
+    estado = carregar_estado(destino)
+
+    if (mesmo_arquivo(estado, remoto) and estado.get('concluido')
+            and os.path.exists(destino) and os.path.getsize(destino) == estado['tamanho']):
+        logger.info(f"{nome} já foi baixado e não mudou no servidor, pulando...")
+        return destino, 0
+
+    retomavel = remoto['aceita_range'] and remoto['tamanho']
+    if not (retomavel and mesmo_arquivo(estado, remoto) and os.path.exists(parcial)):
+        # Download novo: descarta parciais de outra versão do arquivo
+        if estado is not None:
+            logger.info(f"{nome} mudou no servidor desde o download anterior, baixando de novo")
+        estado = dict(remoto, url=url, concluido=False,
+                      segmentos=planejar_segmentos(remoto['tamanho'], segmentos) if retomavel else [])
+        if retomavel:
+            with open(parcial, 'wb') as f:
+                f.truncate(remoto['tamanho'])
+        salvar_estado(destino, estado)
+
+    ja_baixado = sum(segmento['baixado'] for segmento in estado['segmentos'])
+    if ja_baixado:
+        logger.info(f"Retomando {nome} de {ja_baixado / (1024**2):.1f}/{estado['tamanho'] / (1024**2):.1f} MB")
+
+    if retomavel:
+        download = _Download(sessao, url, destino, estado, tentativas)
+        with ThreadPoolExecutor(max_workers=len(estado['segmentos'])) as executor:
+            # list() propaga a exceção de qualquer segmento
+            list(executor.map(download.baixar_segmento, estado['segmentos']))
+    else:
+        baixar_sem_range(sessao, url, destino, estado)
+
+    if os.path.getsize(parcial) != estado['tamanho']:
+        raise IOError(f"{nome}: tamanho baixado {os.path.getsize(parcial)} difere do esperado {estado['tamanho']}")
+
+    os.replace(parcial, destino)
+    estado['concluido'] = True
+    salvar_estado(destino, estado)
+    return destino, estado['tamanho'] - ja_baixado
+
+def baixar_arquivos(urls, pasta, sessao=None, conexoes=5, segmentos=1, tentativas=TENTATIVAS):
+    """Baixa vários arquivos, N ao mesmo tempo.
+
+    Retorna (arquivos baixados ou pulados, arquivos com erro).
+    """
+    sessao = sessao or requests.Session()
+    # Uma conexão por segmento de cada arquivo simultâneo
+    adaptador = requests.adapters.HTTPAdapter(pool_maxsize=conexoes * segmentos)
+    sessao.mount('http://', adaptador)
+    sessao.mount('https://', adaptador)
+
+    concluidos = 0
+    com_erro = 0
+    total_bytes = 0
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=conexoes) as executor:
+        futuros = {
+            executor.submit(baixar_arquivo, url, pasta, sessao=sessao, segmentos=segmentos, tentativas=tentativas): url
+            for url in urls
+        }
+        for futuro in as_completed(futuros):
+            url = futuros[futuro]
+            try:
+                destino, baixado = futuro.result()
+                concluidos += 1
+                total_bytes += baixado
+                logger.info(f"✓ [{concluidos + com_erro}/{len(urls)}] {os.path.basename(destino)} ({baixado / (1024**2):.1f} MB baixados)")
+            except Exception as e:
+                com_erro += 1
+                logger.error(f"✗ [{concluidos + com_erro}/{len(urls)}] Erro ao baixar {url}: {str(e)}")
+
+    duracao = time.time() - start_time
+    logger.info(f"Download: {concluidos} arquivos ok, {com_erro} com erro, "
+                f"{total_bytes / (1024**2):.1f} MB em {duracao:.2f}s "
+                f"({total_bytes / (1024**2) / max(duracao, 1e-9):.1f} MB/s)")
+    return concluidos, com_erro
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Exportação dos Arquivos CNPJ para Parquet
+=========================================
+
+Converte os arquivos da Receita (dados-publicos/*.ESTABELE, *.EMPRECSV,
+*.SOCIOCSV, *.SIMPLES.CSV.*, ou direto dos ZIPs) em datasets Parquet tipados e
+comprimidos, sem passar pelo banco. Consultas analíticas podem então ler os
+datasets com DuckDB ou pandas em vez de extrair tabelas inteiras do PostgreSQL:
+
+    SELECT uf, COUNT(*) FROM 'dados-parquet/estabelecimento/**/*.parquet'
+    WHERE situacao_cadastral = 2 GROUP BY uf;
+
+    pd.read_parquet('dados-parquet/estabelecimento', filters=[('uf', '=', 'SP')])
+
+Os tipos são os do schema tipado (ver schema_tipado.py): datas como date32,
+códigos como int16/int32, cnpj como int64 e capital_social como decimal. Datas
+vazias, 00000000 ou inexistentes viram nulas.
+
+Cada dataset é particionado no estilo hive, por uf (estabelecimento) ou pelos
+primeiros dígitos do cnpj_basico (cnpj_prefixo=NN, demais tabelas):
+
+    dados-parquet/estabelecimento/uf=SP/K3241.K03200Y0.D30610.ESTABELE-0.parquet
+    dados-parquet/empresas/cnpj_prefixo=3/K3241.K03200Y0.D30610.EMPRECSV-0.parquet
+
+cnpj_prefixo é texto (com parquet_prefixo_digitos=2, '01' e '1' são prefixos
+diferentes), mas a descoberta hive infere int32 a partir dos nomes das pastas
+e perde o zero à esquerda. Na leitura, declare o tipo da partição:
+
+    particao = ds.partitioning(pa.schema([('cnpj_prefixo', pa.string())]), flavor='hive')
+    pd.read_parquet('dados-parquet/empresas', partitioning=particao,
+                    filters=[('cnpj_prefixo', '=', '01')])
+
+    SELECT COUNT(*) FROM read_parquet('dados-parquet/empresas/**/*.parquet',
+        hive_partitioning = true, hive_types = {'cnpj_prefixo': VARCHAR})
+    WHERE cnpj_prefixo = '01';
+
+Os arquivos são lidos em fluxo, em blocos de LINHAS_POR_BLOCO linhas, um
+processo por arquivo. Cada partição acumula linhas até completar um row group
+de parquet_linhas_grupo linhas, o que limita a memória de cada processo a
+aproximadamente (partições x parquet_linhas_grupo) linhas. Os row groups
+mantêm a ordem dos arquivos da Receita (por cnpj_basico), então as
+estatísticas min/max de cada row group permitem que filtros por cnpj_basico
+pulem os row groups que não interessam.
+
+A exportação de uma tabela recria o dataset dela do zero.
+
+Uso:
+    python exportar_parquet.py
+    python exportar_parquet.py --tabelas estabelecimento empresas --particao prefixo
+
+Requer pyarrow (opcional, não é necessário para a carga no banco).
+
+Configurações opcionais no cnpj_config.json:
+    parquet_pasta: pasta dos datasets (padrão: dados-parquet)
+    parquet_particao: "uf" ou "prefixo", partição do estabelecimento (padrão: uf)
+    parquet_prefixo_digitos: dígitos do cnpj_basico na partição por prefixo (padrão: 1)
+    parquet_linhas_grupo: linhas por row group (padrão: 65536)
+    parquet_compressao: codec do Parquet (padrão: zstd)
+    parquet_workers: máximo de processos (padrão: núcleos desta máquina)
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+import carga_copy
+import fontes_dados
+import schema_tipado
+from layout_cnpj import TABELAS_PRINCIPAIS
+
+logger = logging.getLogger(__name__)
+
+PASTA_PARQUET = 'dados-parquet'
+LINHAS_POR_GRUPO = 65536
+PREFIXO_DIGITOS = 1
+COMPRESSAO = 'zstd'
+
+# Nome do dataset de cada tabela (socios_original é a tabela socios sem a coluna cnpj)
+NOMES_DATASET = {
+    'estabelecimento': 'estabelecimento',
+    'empresas': 'empresas',
+    'socios_original': 'socios',
+    'simples': 'simples',
+}
+
+COLUNA_PREFIXO = 'cnpj_prefixo'
+
+# Tipos do schema tipado -> tipos do Arrow
+TIPOS_ARROW = {
+    'DATE': 'date32',
+    'SMALLINT': 'int16',
+    'INTEGER': 'int32',
+    'BIGINT': 'int64',
+}
+
+# NUMERIC no banco
+COLUNAS_DECIMAIS = {
+    'empresas': {'capital_social'},
+}
+
+def coluna_particao(config, nome_tabela):
+    """Coluna de partição do dataset: uf (só estabelecimento) ou o prefixo do cnpj_basico"""
+    if nome_tabela == 'estabelecimento' and config.get('parquet_particao', 'uf') == 'uf':
+        return 'uf'
+    return COLUNA_PREFIXO
+
+def tipo_arrow(nome_tabela, coluna):
+    if coluna in COLUNAS_DECIMAIS.get(nome_tabela, ()):
+        return pa.decimal128(20, 2)
+    tipo = schema_tipado.TIPOS_COLUNAS.get(nome_tabela, {}).get(coluna)
+    return getattr(pa, TIPOS_ARROW[tipo])() if tipo else pa.string()
+
+def esquema_arrow(nome_tabela, layout, particao):
+    campos = [pa.field(coluna, tipo_arrow(nome_tabela, coluna)) for coluna in layout.colunas_destino]
+    if particao == COLUNA_PREFIXO:
+        campos.append(pa.field(COLUNA_PREFIXO, pa.string()))
+    return pa.schema(campos)
+
+def converter_coluna(valores, tipo):
+    """Converte os valores texto (já limpos pelo layout tipado) para o tipo da coluna"""
+    coluna = pa.array(valores, type=pa.string())
+    if tipo == pa.string():
+        return coluna
+    if tipo == pa.date32():
+        return pc.strptime(coluna, format='%Y%m%d', unit='s', error_is_null=True).cast(tipo)
+    return coluna.cast(tipo)
+
+def montar_lote(linhas, esquema, prefixo_digitos):
+    """RecordBatch de um bloco de linhas transformadas"""
+    colunas = list(zip(*linhas))
+    if COLUNA_PREFIXO in esquema.names:
+        colunas.append([cnpj_basico[:prefixo_digitos] if cnpj_basico else None for cnpj_basico in colunas[0]])
+    return pa.RecordBatch.from_arrays(
+        [converter_coluna(valores, campo.type) for valores, campo in zip(colunas, esquema)],
+        schema=esquema,
+    )
+
+def gerar_lotes(leitor, layout, esquema, prefixo_digitos, contador):
+    """Lê o arquivo em blocos de LINHAS_POR_BLOCO linhas e gera um RecordBatch por bloco"""
+    bloco = []
+    for campos in leitor:
+        bloco.append(layout.transformar(campos))
+        if len(bloco) >= carga_copy.LINHAS_POR_BLOCO:
+            contador[0] += len(bloco)
+            yield montar_lote(bloco, esquema, prefixo_digitos)
+            bloco = []
+    if bloco:
+        contador[0] += len(bloco)
+        yield montar_lote(bloco, esquema, prefixo_digitos)
+
+def exportar_arquivo(config, fonte, nome_tabela, pasta_dataset):
+    """Exporta um arquivo da Receita para o dataset da tabela (executado em um processo do pool)"""
+    start_time = time.time()
+    layout = schema_tipado.layout_tipado(nome_tabela, TABELAS_PRINCIPAIS[nome_tabela])
+    particao = coluna_particao(config, nome_tabela)
+    esquema = esquema_arrow(nome_tabela, layout, particao)
+    linhas_grupo = config.get('parquet_linhas_grupo', LINHAS_POR_GRUPO)
+    contador = [0]
+
+    with fontes_dados.abrir_fonte(fonte) as arquivo_bin:
+        lotes = gerar_lotes(carga_copy.LeitorRegistros(arquivo_bin), layout, esquema,
+                            config.get('parquet_prefixo_digitos', PREFIXO_DIGITOS), contador)
+        ds.write_dataset(
+            lotes, pasta_dataset, schema=esquema, format='parquet',
+            partitioning=ds.partitioning(pa.schema([esquema.field(particao)]), flavor='hive'),
+            basename_template=f'{fontes_dados.nome_fonte(fonte)}-{{i}}.parquet',
+            file_options=ds.ParquetFileFormat().make_write_options(
+                compression=config.get('parquet_compressao', COMPRESSAO)),
+            # Row groups completos por partição (e não um pedaço de cada bloco lido)
+            min_rows_per_group=linhas_grupo,
+            max_rows_per_group=linhas_grupo,
+            # Sem threads a ordem das linhas (por cnpj_basico) é mantida nos row groups
+            use_threads=False,
+            existing_data_behavior='overwrite_or_ignore',
+        )
+    return fonte, contador[0], time.time() - start_time
+
+def calcular_workers(config, total_arquivos):
+    workers = min(os.cpu_count() or 1, max(1, total_arquivos))
+    if config.get('parquet_workers'):
+        workers = min(workers, config['parquet_workers'])
+    return max(1, workers)
+
+def exportar_tabela(config, nome_tabela, pasta_saida):
+    """Recria o dataset Parquet de uma tabela a partir dos arquivos da Receita.
+
+    Retorna (linhas exportadas, arquivos com erro).
+    """
+    layout = TABELAS_PRINCIPAIS[nome_tabela]
+    fontes = fontes_dados.listar_fontes(fontes_dados.pasta_dados(config), layout.extensao)
+    if not fontes:
+        logger.warning(f"⚠ Nenhum arquivo {layout.extensao} encontrado para {nome_tabela}")
+        return 0, 0
+
+    pasta_dataset = os.path.join(pasta_saida, NOMES_DATASET[nome_tabela])
+    shutil.rmtree(pasta_dataset, ignore_errors=True)
+
+    workers = calcular_workers(config, len(fontes))
+    logger.info(f"Exportando {nome_tabela}: {len(fontes)} arquivos, {workers} processos, "
+                f"partição {coluna_particao(config, nome_tabela)}")
+    total_linhas = 0
+    com_erro = 0
+    start_time = time.time()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = {
+            executor.submit(exportar_arquivo, config, fonte, nome_tabela, pasta_dataset): fonte
+            for fonte in fontes
+        }
+        for futuro in as_completed(futuros):
+            nome_arquivo = fontes_dados.nome_fonte(futuros[futuro])
+            try:
+                _, linhas, duracao = futuro.result()
+            except Exception as e:
+                com_erro += 1
+                logger.error(f"✗ Erro ao exportar {nome_arquivo}: {str(e)}")
+                continue
+            total_linhas += linhas
+            logger.info(f"✓ {nome_arquivo}: {linhas:,} linhas em {duracao:.2f}s")
+
+    duracao = time.time() - start_time
+    logger.info(f"✓ {NOMES_DATASET[nome_tabela]}: {total_linhas:,} linhas em {duracao:.2f}s "
+                f"({total_linhas / duracao if duracao else 0:,.0f} linhas/s) -> {pasta_dataset}")
+    return total_linhas, com_erro
+
+def main():
+    """Exporta as tabelas principais para Parquet"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Exporta os arquivos CNPJ para datasets Parquet')
+    parser.add_argument('--tabelas', nargs='+', choices=list(TABELAS_PRINCIPAIS), default=list(TABELAS_PRINCIPAIS))
+    parser.add_argument('--particao', choices=['uf', 'prefixo'], help='Partição do estabelecimento')
+    parser.add_argument('--pasta', help=f'Pasta dos datasets (padrão: {PASTA_PARQUET})')
+    args = parser.parse_args()
+
+    if pa is None:
+        print("❌ pyarrow não instalado: pip install pyarrow")
+        sys.exit(1)
+    if not os.path.exists('cnpj_config.json'):
+        print("❌ Arquivo de configuração 'cnpj_config.json' não encontrado!")
+        sys.exit(1)
+    with open('cnpj_config.json', 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if args.particao:
+        config['parquet_particao'] = args.particao
+
+    pasta_saida = args.pasta or config.get('parquet_pasta', PASTA_PARQUET)
+    com_erro = 0
+    for nome_tabela in args.tabelas:
+        com_erro += exportar_tabela(config, nome_tabela, pasta_saida)[1]
+    sys.exit(1 if com_erro else 0)
+
+if __name__ == "__main__":
+    main()
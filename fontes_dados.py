@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Fontes de Dados CNPJ
+====================
+
+Este módulo localiza e abre os arquivos de dados da Receita, sejam eles
+arquivos já descompactados em dados-publicos/ ou membros dos ZIPs em
+dados-publicos-zip/.
+
+Um membro de ZIP é identificado como 'pasta/Arquivo.zip!NOME.DO.MEMBRO' e é
+lido como fluxo com zipfile.ZipFile.open, sem gravar arquivos intermediários
+em disco.
+"""
+
+import os
+import glob
+import time
+import fnmatch
+import zipfile
+from contextlib import contextmanager
+
+SEPARADOR_ZIP = '!'
+
+def pasta_dados(config):
+    """Retorna a pasta de onde os dados são lidos (fonte_dados = "zip" lê direto dos ZIPs)"""
+    if config.get('fonte_dados') == 'zip':
+        return r"dados-publicos-zip"
+    return r"dados-publicos"
+
+def e_membro_zip(fonte):
+    """Indica se a fonte é um membro de arquivo ZIP"""
+    return SEPARADOR_ZIP in fonte
+
+def separar_membro_zip(fonte):
+    """Retorna (arquivo zip, nome do membro) de uma fonte dentro de um ZIP"""
+    arquivo_zip, membro = fonte.split(SEPARADOR_ZIP, 1)
+    return arquivo_zip, membro
+
+def listar_fontes(pasta, extensao):
+    """Lista as fontes de uma extensão na pasta: arquivos soltos e membros dos ZIPs.
+
+    Retorna as fontes em ordem alfabética.
+    """
+    fontes = list(glob.glob(os.path.join(pasta, f'*{extensao}')))
+
+    for arquivo_zip in glob.glob(os.path.join(pasta, '*.zip')):
+        with zipfile.ZipFile(arquivo_zip, 'r') as zip_ref:
+            for membro in zip_ref.namelist():
+                if fnmatch.fnmatch(membro, f'*{extensao}'):
+                    fontes.append(f'{arquivo_zip}{SEPARADOR_ZIP}{membro}')
+
+    return sorted(fontes)
+
+def nome_fonte(fonte):
+    """Retorna o nome do arquivo de dados (sem pasta e sem o ZIP)"""
+    if e_membro_zip(fonte):
+        return os.path.basename(separar_membro_zip(fonte)[1])
+    return os.path.basename(fonte)
+
+def obter_data_referencia(pasta):
+    """Retorna a data de referência (dd/mm/aaaa) a partir do nome dos arquivos de empresas.
+
+    Os arquivos seguem o padrão K3241.K03200Y0.D30610.EMPRECSV, em que D30610
+    corresponde a 10/06/2023.
+    """
+    arquivos_empresas = listar_fontes(pasta, '.EMPRECSV')
+    if arquivos_empresas:
+        data_referencia = nome_fonte(arquivos_empresas[0]).split('.')[2]  # formato DAMMDD
+        if len(data_referencia) == len('D30610') and data_referencia.startswith('D'):
+            return data_referencia[4:6] + '/' + data_referencia[2:4] + '/202' + data_referencia[1]
+    return 'dd/mm/2025'
+
+def identificar_fonte(fonte):
+    """Retorna (nome, tamanho descompactado, mtime) de uma fonte"""
+    if e_membro_zip(fonte):
+        arquivo_zip, membro = separar_membro_zip(fonte)
+        with zipfile.ZipFile(arquivo_zip, 'r') as zip_ref:
+            info = zip_ref.getinfo(membro)
+        mtime = int(time.mktime(info.date_time + (0, 0, -1)))
+        return nome_fonte(fonte), info.file_size, mtime
+
+    info = os.stat(fonte)
+    return nome_fonte(fonte), info.st_size, int(info.st_mtime)
+
+@contextmanager
+def abrir_fonte(fonte):
+    """Abre uma fonte para leitura binária.
+
+    Membros de ZIP são descompactados em fluxo; seek() para frente é suportado
+    (descompacta e descarta até a posição), o que permite retomar uma carga.
+    """
+    if e_membro_zip(fonte):
+        arquivo_zip, membro = separar_membro_zip(fonte)
+        with zipfile.ZipFile(arquivo_zip, 'r') as zip_ref:
+            with zip_ref.open(membro, 'r') as f:
+                yield f
+    else:
+        with open(fonte, 'rb') as f:
+            yield f
+
+def ler_blocos(arquivo_bin, tamanho_bloco):
+    """Lê um arquivo aberto em modo binário em blocos de aproximadamente tamanho_bloco bytes.
+
+    Cada bloco termina em um fim de linha (exceto o último, se o arquivo não
+    terminar em um), então a posição após cada bloco é uma posição de retomada.
+    """
+    resto = b''
+    while True:
+        dados = arquivo_bin.read(tamanho_bloco)
+        if not dados:
+            break
+        dados = resto + dados
+        fim = dados.rfind(b'\n') + 1
+        resto = dados[fim:]
+        if fim:
+            yield dados[:fim]
+    if resto:
+        yield resto
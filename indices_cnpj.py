@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Construção dos Índices CNPJ
+===========================
+
+Este módulo reúne as definições de todos os índices da base CNPJ e os constrói
+depois da carga, em paralelo, cada um em sua própria conexão.
+
+Cada CREATE INDEX recebe um maintenance_work_mem e um
+max_parallel_maintenance_workers calculados a partir dos núcleos do servidor de
+banco e da memória disponível, divididos entre as construções simultâneas.
+
+Em tabelas particionadas (ver particionamento_cnpj.py), o índice da tabela
+principal é criado com ON ONLY, o índice de cada partição é construído como os
+demais, em paralelo, e ao final é anexado com ALTER INDEX ... ATTACH PARTITION.
+
+Configurações opcionais no cnpj_config.json:
+    indices_conexoes: máximo de índices construídos ao mesmo tempo
+    indices_memoria_mb: memória total para as construções simultâneas
+                        (padrão: 25% da memória disponível)
+"""
+
+import time
+import logging
+import psutil
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import carga_copy
+import carga_paralela
+import particionamento_cnpj
+
+logger = logging.getLogger(__name__)
+
+Indice = namedtuple('Indice', ['nome', 'tabela', 'expressao', 'metodo'], defaults=['btree'])
+
+# Índices das tabelas de códigos
+INDICES_CODIGO = [
+    Indice('idx_cnae', 'cnae', 'codigo'),
+    Indice('idx_motivo', 'motivo', 'codigo'),
+    Indice('idx_municipio', 'municipio', 'codigo'),
+    Indice('idx_natureza_juridica', 'natureza_juridica', 'codigo'),
+    Indice('idx_pais', 'pais', 'codigo'),
+    Indice('idx_qualificacao_socio', 'qualificacao_socio', 'codigo'),
+]
+
+# Índices das tabelas principais, construídos logo após a carga
+INDICES_CARGA = [
+    Indice('idx_estabelecimento_cnpj', 'estabelecimento', 'cnpj'),
+    Indice('idx_estabelecimento_cnpj_basico', 'estabelecimento', 'cnpj_basico'),
+    Indice('idx_estabelecimento_cnae_secundaria_cnae', 'estabelecimento_cnae_secundaria', 'cnae'),
+    Indice('idx_estabelecimento_cnae_secundaria_cnpj', 'estabelecimento_cnae_secundaria', 'cnpj'),
+    Indice('idx_empresas_cnpj_basico', 'empresas', 'cnpj_basico'),
+    Indice('idx_empresas_razao_social', 'empresas', 'razao_social'),
+    Indice('idx_socios_original_cnpj_basico', 'socios_original', 'cnpj_basico'),
+    Indice('idx_simples_cnpj_basico', 'simples', 'cnpj_basico'),
+]
+
+# Índices da tabela socios, construídos depois que ela é montada
+INDICES_SOCIOS = [
+    Indice('idx_socios_cnpj', 'socios', 'cnpj'),
+    Indice('idx_socios_cnpj_basico', 'socios', 'cnpj_basico'),
+    Indice('idx_socios_cnpj_cpf_socio', 'socios', 'cnpj_cpf_socio'),
+    Indice('idx_socios_nome_socio', 'socios', 'nome_socio'),
+]
+
+def sql_indice(indice, somente_principal=False):
+    """Retorna o CREATE INDEX de um índice (ON ONLY para o índice de uma tabela particionada)"""
+    only = 'ONLY ' if somente_principal else ''
+    return f"CREATE INDEX IF NOT EXISTS {indice.nome} ON {only}{indice.tabela} USING {indice.metodo} ({indice.expressao})"
+
+def expandir_particoes(config, indices):
+    """Troca os índices de tabelas particionadas por um índice em cada partição.
+
+    Cria o índice da tabela principal (ON ONLY, ainda sem as partições) e retorna
+    (índices a construir, {índice principal: [índices das partições]}).
+    """
+    expandidos = []
+    principais = {}
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            for indice in indices:
+                particoes = particionamento_cnpj.listar_particoes(cursor, indice.tabela)
+                if not particoes:
+                    expandidos.append(indice)
+                    continue
+                cursor.execute(sql_indice(indice, somente_principal=True))
+                filhos = [
+                    indice._replace(nome=f"{indice.nome}_{particao[len(indice.tabela) + 1:]}", tabela=particao)
+                    for particao in particoes
+                ]
+                principais[indice.nome] = [filho.nome for filho in filhos]
+                expandidos.extend(filhos)
+    finally:
+        conn.close()
+    return expandidos, principais
+
+def anexar_particoes(config, principais):
+    """Anexa os índices das partições aos índices das tabelas principais.
+
+    Retorna a quantidade de índices principais com erro.
+    """
+    com_erro = 0
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            for principal, filhos in principais.items():
+                try:
+                    for filho in filhos:
+                        cursor.execute(f"ALTER INDEX {principal} ATTACH PARTITION {filho}")
+                    logger.info(f"✓ Índice {principal}: {len(filhos)} partições anexadas")
+                except Exception as e:
+                    com_erro += 1
+                    logger.error(f"✗ Erro ao anexar as partições do índice {principal}: {str(e)}")
+    finally:
+        conn.close()
+    return com_erro
+
+def calcular_parametros(config, total_indices):
+    """Calcula (conexões simultâneas, maintenance_work_mem em MB, workers paralelos por índice)"""
+    nucleos_banco = carga_paralela.obter_nucleos_banco(config)
+
+    conexoes = min(total_indices, config.get('indices_conexoes') or max(1, nucleos_banco // 2))
+    conexoes = max(1, conexoes)
+
+    memoria_total_mb = config.get('indices_memoria_mb') or int(psutil.virtual_memory().available * 0.25 / (1024 * 1024))
+    memoria_mb = max(64, memoria_total_mb // conexoes)
+
+    # O processo líder também trabalha na ordenação, por isso o -1
+    workers_paralelos = max(0, nucleos_banco // conexoes - 1)
+
+    return conexoes, memoria_mb, workers_paralelos
+
+def ordenar_por_tamanho(config, indices):
+    """Ordena os índices pelo tamanho da tabela, maiores primeiro, para evitar uma cauda longa"""
+    tabelas = sorted({indice.tabela for indice in indices})
+    tamanhos = {}
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        with conn.cursor() as cursor:
+            for tabela in tabelas:
+                cursor.execute("SELECT COALESCE(pg_relation_size(to_regclass(%s)), 0)", (tabela,))
+                tamanhos[tabela] = cursor.fetchone()[0]
+    finally:
+        conn.close()
+    return sorted(indices, key=lambda indice: tamanhos[indice.tabela], reverse=True)
+
+def construir_indice(config, indice, memoria_mb, workers_paralelos):
+    """Constrói um índice em uma conexão própria e retorna a duração em segundos"""
+    start_time = time.time()
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"SET maintenance_work_mem = '{memoria_mb}MB'")
+            cursor.execute(f"SET max_parallel_maintenance_workers = {workers_paralelos}")
+            cursor.execute(sql_indice(indice))
+    finally:
+        conn.close()
+    return time.time() - start_time
+
+def construir_indices(config, indices, descricao='índices'):
+    """Constrói os índices em paralelo, cada um em sua própria conexão.
+
+    Retorna (índices construídos, índices com erro).
+    """
+    if not indices:
+        return 0, 0
+
+    indices, principais = expandir_particoes(config, indices)
+    conexoes, memoria_mb, workers_paralelos = calcular_parametros(config, len(indices))
+    indices = ordenar_por_tamanho(config, indices)
+
+    logger.info(f"Construindo {len(indices)} {descricao} com {conexoes} conexões simultâneas "
+                f"(maintenance_work_mem={memoria_mb}MB, max_parallel_maintenance_workers={workers_paralelos})")
+
+    construidos = 0
+    com_erro = 0
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=conexoes) as executor:
+        futuros = {
+            executor.submit(construir_indice, config, indice, memoria_mb, workers_paralelos): indice
+            for indice in indices
+        }
+
+        for futuro in as_completed(futuros):
+            indice = futuros[futuro]
+            try:
+                duracao = futuro.result()
+                construidos += 1
+                logger.info(f"✓ Índice {indice.nome} ({indice.tabela}) criado em {duracao:.2f}s")
+            except Exception as e:
+                com_erro += 1
+                logger.error(f"✗ Erro ao criar índice {indice.nome}: {str(e)}")
+                logger.error(f"SQL problemático: {sql_indice(indice)}")
+
+    com_erro += anexar_particoes(config, principais)
+
+    duracao_total = time.time() - start_time
+    logger.info(f"{descricao.capitalize()}: {construidos} criados, {com_erro} com erro em {duracao_total:.2f}s")
+    return construidos, com_erro
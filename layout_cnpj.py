@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Layout dos Arquivos CNPJ
+========================
+
+Este módulo define as colunas e as extensões dos arquivos públicos do CNPJ.
+É compartilhado pelos scripts de carga para que todos leiam os arquivos da
+mesma forma.
+
+Também define as transformações aplicadas a cada linha durante a carga, como o
+cálculo das colunas derivadas (cnpj, capital_social), evitando UPDATEs sobre as
+tabelas inteiras depois da carga.
+
+Uma tabela principal pode gerar tabelas filhas na mesma leitura: a lista de
+CNAEs secundários de cada estabelecimento ('6201501,6202300') é separada em
+linhas (cnpj, cnae) de estabelecimento_cnae_secundaria, enviadas no mesmo bloco
+e na mesma transação que o estabelecimento.
+"""
+
+from collections import namedtuple
+
+# Colunas dos arquivos principais, na ordem em que aparecem no CSV da Receita
+COLUNAS_ESTABELECIMENTO = ['cnpj_basico','cnpj_ordem', 'cnpj_dv','matriz_filial', 'nome_fantasia', 'situacao_cadastral','data_situacao_cadastral', 'motivo_situacao_cadastral', 'nome_cidade_exterior', 'pais', 'data_inicio_atividades', 'cnae_fiscal', 'cnae_fiscal_secundaria', 'tipo_logradouro', 'logradouro', 'numero', 'complemento','bairro', 'cep','uf','municipio', 'ddd1', 'telefone1', 'ddd2', 'telefone2', 'ddd_fax', 'fax', 'correio_eletronico', 'situacao_especial', 'data_situacao_especial']
+
+COLUNAS_EMPRESAS = ['cnpj_basico', 'razao_social', 'natureza_juridica', 'qualificacao_responsavel', 'capital_social_str', 'porte_empresa', 'ente_federativo_responsavel']
+
+COLUNAS_SOCIOS = ['cnpj_basico', 'identificador_de_socio', 'nome_socio', 'cnpj_cpf_socio', 'qualificacao_socio', 'data_entrada_sociedade', 'pais', 'representante_legal', 'nome_representante', 'qualificacao_representante_legal', 'faixa_etaria']
+
+COLUNAS_SIMPLES = ['cnpj_basico', 'opcao_simples', 'data_opcao_simples', 'data_exclusao_simples', 'opcao_mei', 'data_opcao_mei', 'data_exclusao_mei']
+
+# Colunas das tabelas no banco, quando diferentes das colunas do arquivo
+COLUNAS_DESTINO_ESTABELECIMENTO = COLUNAS_ESTABELECIMENTO + ['cnpj']
+
+COLUNAS_DESTINO_EMPRESAS = ['cnpj_basico', 'razao_social', 'natureza_juridica', 'qualificacao_responsavel', 'capital_social', 'porte_empresa', 'ente_federativo_responsavel']
+
+def transformar_estabelecimento(campos):
+    """Acrescenta o cnpj completo (básico + ordem + dv)"""
+    campos.append(campos[0] + campos[1] + campos[2])
+    return campos
+
+def transformar_empresas(campos):
+    """Converte o capital social do formato '1234,56' para '1234.56' (vazio vira NULL)"""
+    capital_social = campos[4]
+    campos[4] = capital_social.replace(',', '.') if capital_social else None
+    return campos
+
+def sem_transformacao(campos):
+    return campos
+
+INDICE_CNPJ = COLUNAS_DESTINO_ESTABELECIMENTO.index('cnpj')
+INDICE_CNAE_SECUNDARIA = COLUNAS_DESTINO_ESTABELECIMENTO.index('cnae_fiscal_secundaria')
+
+def extrair_cnae_secundaria(campos):
+    """Uma linha (cnpj, cnae) para cada CNAE da lista separada por vírgulas (sem repetição)"""
+    lista = campos[INDICE_CNAE_SECUNDARIA]
+    if not lista:
+        return []
+    cnpj = campos[INDICE_CNPJ]
+    return [[cnpj, cnae] for cnae in dict.fromkeys(lista.split(',')) if cnae.isdigit()]
+
+# Tabela filha gerada a partir dos registros de uma tabela principal:
+#   nome: tabela no banco
+#   colunas: colunas da tabela
+#   extrair: função que recebe os campos já transformados e retorna as linhas da tabela filha
+TabelaFilha = namedtuple('TabelaFilha', ['nome', 'colunas', 'extrair'])
+
+CNAE_SECUNDARIA = TabelaFilha('estabelecimento_cnae_secundaria', ['cnpj', 'cnae'], extrair_cnae_secundaria)
+
+# Layout de uma tabela principal:
+#   extensao: extensão dos arquivos de origem
+#   colunas: colunas do arquivo de origem
+#   colunas_destino: colunas da tabela no banco, na ordem gerada por transformar
+#   transformar: função aplicada à lista de campos de cada linha
+#   filhas: tabelas filhas carregadas junto com a tabela
+Layout = namedtuple('Layout', ['extensao', 'colunas', 'colunas_destino', 'transformar', 'filhas'], defaults=[()])
+
+TABELAS_PRINCIPAIS = {
+    'estabelecimento': Layout('.ESTABELE', COLUNAS_ESTABELECIMENTO, COLUNAS_DESTINO_ESTABELECIMENTO, transformar_estabelecimento, (CNAE_SECUNDARIA,)),
+    'socios_original': Layout('.SOCIOCSV', COLUNAS_SOCIOS, COLUNAS_SOCIOS, sem_transformacao),
+    'empresas': Layout('.EMPRECSV', COLUNAS_EMPRESAS, COLUNAS_DESTINO_EMPRESAS, transformar_empresas),
+    'simples': Layout('.SIMPLES.CSV.*', COLUNAS_SIMPLES, COLUNAS_SIMPLES, sem_transformacao),
+}
+
+# Tabelas de códigos: nome da tabela -> extensão do arquivo
+TABELAS_CODIGO = {
+    'cnae': '.CNAECSV',
+    'motivo': '.MOTICSV',
+    'municipio': '.MUNICCSV',
+    'natureza_juridica': '.NATJUCSV',
+    'pais': '.PAISCSV',
+    'qualificacao_socio': '.QUALSCSV',
+}
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Manifesto de Carga
+==================
+
+Este módulo mantém a tabela _carga_manifest, que registra o andamento da carga
+de cada arquivo de origem: tamanho, data de modificação, linhas carregadas,
+posição em bytes alcançada e status.
+
+A posição é atualizada na mesma transação de cada bloco enviado via COPY, de
+forma que uma execução interrompida (queda, reinício do PM2) retoma o arquivo
+exatamente do último bloco confirmado, sem inserir linhas em duplicidade.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+STATUS_CARREGANDO = 'carregando'
+STATUS_CONCLUIDO = 'concluido'
+
+SQL_CRIAR_MANIFESTO = '''
+CREATE TABLE IF NOT EXISTS _carga_manifest (
+    tabela VARCHAR(100) NOT NULL,
+    arquivo VARCHAR(255) NOT NULL,
+    tamanho BIGINT NOT NULL,
+    mtime BIGINT NOT NULL,
+    linhas BIGINT NOT NULL DEFAULT 0,
+    offset_bytes BIGINT NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL,
+    atualizado_em TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (tabela, arquivo)
+)
+'''
+
+def criar_manifesto(conn, unlogged=False):
+    """Cria a tabela _carga_manifest se não existir.
+
+    Na carga em tabelas UNLOGGED o manifesto também é UNLOGGED: após uma queda do
+    servidor os dois são esvaziados juntos e a carga recomeça do início.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(SQL_CRIAR_MANIFESTO.replace('CREATE TABLE', 'CREATE UNLOGGED TABLE') if unlogged else SQL_CRIAR_MANIFESTO)
+    conn.commit()
+
+def obter_registro(cursor, tabela, nome_arquivo):
+    """Retorna o registro do manifesto de um arquivo, ou None"""
+    cursor.execute(
+        'SELECT tamanho, mtime, linhas, offset_bytes, status FROM _carga_manifest WHERE tabela = %s AND arquivo = %s',
+        (tabela, nome_arquivo)
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return {'tamanho': row[0], 'mtime': row[1], 'linhas': row[2], 'offset_bytes': row[3], 'status': row[4]}
+
+def listar_concluidos(conn, tabela):
+    """Retorna {arquivo: (tamanho, mtime, linhas)} dos arquivos já concluídos de uma tabela"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            'SELECT arquivo, tamanho, mtime, linhas FROM _carga_manifest WHERE tabela = %s AND status = %s',
+            (tabela, STATUS_CONCLUIDO)
+        )
+        return {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
+
+def iniciar_arquivo(cursor, tabela, nome_arquivo, tamanho, mtime):
+    """Registra o início da carga de um arquivo"""
+    cursor.execute(
+        'INSERT INTO _carga_manifest (tabela, arquivo, tamanho, mtime, linhas, offset_bytes, status) '
+        'VALUES (%s, %s, %s, %s, 0, 0, %s)',
+        (tabela, nome_arquivo, tamanho, mtime, STATUS_CARREGANDO)
+    )
+
+def registrar_progresso(cursor, tabela, nome_arquivo, offset_bytes, linhas, status=STATUS_CARREGANDO):
+    """Atualiza a posição alcançada de um arquivo (deve ser confirmado junto com o bloco)"""
+    cursor.execute(
+        'UPDATE _carga_manifest SET offset_bytes = %s, linhas = %s, status = %s, atualizado_em = now() '
+        'WHERE tabela = %s AND arquivo = %s',
+        (offset_bytes, linhas, status, tabela, nome_arquivo)
+    )
+
+def registrar_concluido(cursor, tabela, nome_arquivo, tamanho, mtime, linhas):
+    """Registra como concluída a carga completa de uma tabela a partir de um único arquivo.
+
+    Usado pelas tabelas de códigos, recarregadas inteiras: o registro anterior da
+    tabela (de outro arquivo ou mês) é substituído.
+    """
+    cursor.execute('DELETE FROM _carga_manifest WHERE tabela = %s', (tabela,))
+    iniciar_arquivo(cursor, tabela, nome_arquivo, tamanho, mtime)
+    registrar_progresso(cursor, tabela, nome_arquivo, tamanho, linhas, STATUS_CONCLUIDO)
+
+def preparar_retomada(cursor, tabela, nome_arquivo, tamanho, mtime):
+    """Verifica o manifesto antes de carregar um arquivo.
+
+    Retorna o registro atual (com offset_bytes e linhas de onde continuar).
+    Lança ValueError se o arquivo mudou desde a carga parcial anterior, pois as
+    linhas já inseridas não correspondem mais ao arquivo.
+    """
+    registro = obter_registro(cursor, tabela, nome_arquivo)
+
+    if registro is None:
+        iniciar_arquivo(cursor, tabela, nome_arquivo, tamanho, mtime)
+        return {'tamanho': tamanho, 'mtime': mtime, 'linhas': 0, 'offset_bytes': 0, 'status': STATUS_CARREGANDO}
+
+    if registro['tamanho'] != tamanho or registro['mtime'] != mtime:
+        raise ValueError(
+            f"Arquivo {nome_arquivo} mudou desde a carga anterior em {tabela} "
+            f"(tamanho {registro['tamanho']} -> {tamanho}, mtime {registro['mtime']} -> {mtime}). "
+            f"Recrie as tabelas com 02_criar_tabelas.py antes de carregar um novo mês."
+        )
+
+    return registro
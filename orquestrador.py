@@ -0,0 +1,479 @@
+# -*- coding: utf-8 -*-
+"""
+Orquestrador da Carga CNPJ
+==========================
+
+Executa download -> descompactação -> criação das tabelas -> carga -> índices
+como um grafo de tarefas por arquivo, em vez das etapas inteiras em sequência
+do make all-sequencial. Cada tarefa começa assim que as tarefas de que depende
+terminam:
+
+    baixar:Estabelecimentos0.zip -> extrair:Estabelecimentos0.zip -> carregar:Estabelecimentos0.zip
+    baixar:Cnaes.zip -> extrair:Cnaes.zip -> carregar:Cnaes.zip -> indices:cnae
+    carregar:Estabelecimentos0..9.zip -> indices:estabelecimento
+    tudo -> finalizar
+
+Assim as tabelas de códigos são carregadas logo que seus ZIPs chegam, cada
+arquivo é carregado enquanto os demais ainda são baixados, e os índices de uma
+tabela são construídos assim que todos os arquivos dela estão no banco.
+
+O tabelas cria as tabelas sem perguntas, com o cnpj_config.json atual (que
+deve existir: rode o 02_criar_tabelas.py uma vez para criá-lo). O finalizar
+executa o 03_inserir_dados.py, que encontra os arquivos já carregados no
+_carga_manifest (inclusive as tabelas de códigos, registradas pelo carregar) e
+faz apenas o restante (socios, demais índices, referência, visão, publicação).
+
+Cada tarefa usa um recurso, com um limite de tarefas simultâneas por recurso:
+
+    rede: downloads (threads)
+    cpu: descompactação (processos)
+    banco: criação das tabelas, cargas, índices e finalização (processos)
+
+O estado de cada tarefa é gravado em orquestrador_estado.json a cada mudança.
+Ao executar de novo, as tarefas concluídas são puladas e as demais recomeçam
+(todas são retomáveis: download por Range, descompactação pelo índice lateral,
+carga pelo _carga_manifest, índices com IF NOT EXISTS). Um mês novo na Receita
+(ou outros ZIPs, com --sem-download) começa um estado novo.
+
+Uso:
+    python orquestrador.py
+    python orquestrador.py --sem-download     # usa os ZIPs de dados-publicos-zip
+    python orquestrador.py --reiniciar        # descarta o estado gravado
+    python orquestrador.py --segmentos 4      # conexões por arquivo no download
+
+Configurações opcionais no cnpj_config.json:
+    orquestrador_rede: downloads simultâneos (padrão: 5)
+    orquestrador_cpu: descompactações simultâneas (padrão: núcleos desta máquina)
+    orquestrador_banco: tarefas de banco simultâneas (padrão: como carga_workers, ver carga_paralela.py)
+    orquestrador_estado: arquivo do estado (padrão: orquestrador_estado.json)
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import fnmatch
+import logging
+import argparse
+import importlib
+import subprocess
+from collections import namedtuple
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import carga_copy
+import fontes_dados
+import indices_cnpj
+import schema_carga
+import schema_tipado
+import carga_paralela
+import carga_unlogged
+import manifesto_carga
+import banco_embarcado
+import particionamento_cnpj
+from layout_cnpj import TABELAS_PRINCIPAIS, TABELAS_CODIGO
+
+baixa_dados = importlib.import_module('00_dados_cnpj_baixa')
+descompactar = importlib.import_module('01_descompactar_arquivos')
+criacao_tabelas = importlib.import_module('02_criar_tabelas')
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_ESTADO = 'orquestrador_estado.json'
+
+RECURSO_REDE = 'rede'
+RECURSO_CPU = 'cpu'
+RECURSO_BANCO = 'banco'
+
+STATUS_CONCLUIDA = 'concluida'
+STATUS_EXECUTANDO = 'executando'
+STATUS_ERRO = 'erro'
+
+# Tabela carregada a partir de cada ZIP da Receita (nome sem o número e sem .zip)
+TABELAS_ZIP = {
+    'Empresas': 'empresas',
+    'Estabelecimentos': 'estabelecimento',
+    'Socios': 'socios_original',
+    'Simples': 'simples',
+    'Cnaes': 'cnae',
+    'Motivos': 'motivo',
+    'Municipios': 'municipio',
+    'Naturezas': 'natureza_juridica',
+    'Paises': 'pais',
+    'Qualificacoes': 'qualificacao_socio',
+}
+
+# Tarefa do grafo:
+#   nome: identificador (também a chave no estado gravado)
+#   recurso: rede, cpu ou banco
+#   funcao: função de nível de módulo (enviada aos processos)
+#   argumentos: argumentos da função
+#   dependencias: nomes das tarefas que precisam terminar antes
+Tarefa = namedtuple('Tarefa', ['nome', 'recurso', 'funcao', 'argumentos', 'dependencias'])
+
+def configurar_logging():
+    """Configura o sistema de logging com arquivo e console"""
+    logs_dir = 'logs'
+    if not os.path.exists(logs_dir):
+        os.makedirs(logs_dir)
+
+    log_filename = os.path.join(logs_dir, f'cnpj_orquestrador_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
+        handlers=[
+            logging.FileHandler(log_filename, encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+    return logging.getLogger(__name__)
+
+def carregar_configuracao():
+    """Carrega a configuração do banco do arquivo cnpj_config.json"""
+    if not os.path.exists('cnpj_config.json'):
+        print("❌ Arquivo de configuração 'cnpj_config.json' não encontrado!")
+        print("Execute uma vez o script 02_criar_tabelas.py (ou make all-sequencial) para criar a configuração.")
+        sys.exit(1)
+    with open('cnpj_config.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def tabela_zip(arquivo_zip):
+    """Tabela carregada a partir de um ZIP (ex.: Estabelecimentos3.zip -> estabelecimento)"""
+    return TABELAS_ZIP.get(re.sub(r'\d*\.zip$', '', os.path.basename(arquivo_zip), flags=re.IGNORECASE))
+
+def configuracao_carga(config):
+    """Configuração usada pelas tarefas de banco (no modo blue/green, com o schema de carga)"""
+    config = dict(config)
+    if schema_carga.blue_green_ativo(config):
+        schema_carga.usar_schema(config, schema_carga.nome_schema_carga(config))
+    return config
+
+# Tarefas (executadas nos pools: funções de nível de módulo)
+
+def baixar(url, pasta_zip, segmentos):
+    sessao = baixa_dados.requests.Session()
+    sessao.headers.update(baixa_dados.headers)
+    destino, baixado = baixa_dados.download_retomavel.baixar_arquivo(url, pasta_zip, sessao=sessao, segmentos=segmentos)
+    return f"{baixado / (1024**2):.1f} MB baixados"
+
+def extrair(arquivo_zip, pasta_saida):
+    # As funções do 01 usam o logger que o main dele configura
+    descompactar.logger = logging.getLogger(descompactar.__name__)
+    extraidos = descompactar.descompactar_arquivo(arquivo_zip, pasta_saida)
+    if extraidos is None:
+        raise RuntimeError(f"Erro ao descompactar {os.path.basename(arquivo_zip)}")
+    return f"{extraidos / (1024**2):.1f} MB extraídos"
+
+def criar_tabelas(config):
+    """Cria (ou recria) as tabelas e o _carga_manifest, como o 02_criar_tabelas.py"""
+    if banco_embarcado.embarcado_ativo(config):
+        _, com_erro = banco_embarcado.criar_tabelas(
+            config, criacao_tabelas.obter_sql_criacao_tabelas(tipado=schema_tipado.tipado_ativo(config)))
+        if com_erro:
+            raise RuntimeError(f"{com_erro} comandos com erro na criação das tabelas")
+        return banco_embarcado.caminho_banco(config)
+
+    config = configuracao_carga(config)
+    sql_criacao = criacao_tabelas.obter_sql_criacao_tabelas(carga_unlogged.comando_criar_tabela(config),
+                                                            particionamento_cnpj.quantidade_particoes(config),
+                                                            schema_tipado.tipado_ativo(config))
+    if config.get('search_path'):
+        sql_criacao = f"CREATE SCHEMA IF NOT EXISTS {config['search_path']};\n" + sql_criacao
+    comandos = [comando.strip() for comando in sql_criacao.split(';') if comando.strip()]
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        with conn.cursor() as cursor:
+            for comando in comandos:
+                cursor.execute(comando)
+        conn.commit()
+        manifesto_carga.criar_manifesto(conn, carga_unlogged.unlogged_ativo(config))
+    finally:
+        conn.close()
+    return f"{len(comandos)} comandos" + (f" no schema {config['search_path']}" if config.get('search_path') else '')
+
+def fontes_zip(config, arquivo_zip, pasta_saida):
+    """Arquivos de dados de um ZIP: os membros (fonte_dados = "zip") ou os arquivos extraídos"""
+    with descompactar.zipfile.ZipFile(arquivo_zip, 'r') as zip_ref:
+        membros = [info.filename for info in zip_ref.infolist() if not info.is_dir()]
+    if config.get('fonte_dados') == 'zip':
+        return [f'{arquivo_zip}{fontes_dados.SEPARADOR_ZIP}{membro}' for membro in membros]
+    return [os.path.join(pasta_saida, membro) for membro in membros]
+
+def carregar_tabela_codigo(conn, fonte, nome_tabela):
+    """Recarrega uma tabela de códigos (poucos milhares de linhas) em uma transação.
+
+    O arquivo fica registrado como concluído no _carga_manifest, na mesma
+    transação, para que o 03_inserir_dados.py (finalizar) não o carregue de novo.
+    """
+    nome_arquivo, tamanho, mtime = fontes_dados.identificar_fonte(fonte)
+    with conn.cursor() as cursor:
+        registro = manifesto_carga.obter_registro(cursor, nome_tabela, nome_arquivo)
+        if registro and registro['status'] == manifesto_carga.STATUS_CONCLUIDO \
+                and (registro['tamanho'], registro['mtime']) == (tamanho, mtime):
+            logger.info(f"✓ {nome_arquivo} já carregado em {nome_tabela} ({registro['linhas']:,} linhas), pulando...")
+            return registro['linhas']
+
+        with fontes_dados.abrir_fonte(fonte) as f:
+            linhas = [carga_copy.formatar_linha_copy(campos) for campos in carga_copy.LeitorRegistros(f)]
+        cursor.execute(f"DELETE FROM {nome_tabela}")
+        if linhas:
+            carga_copy.copiar_bloco(cursor, nome_tabela, ['codigo', 'descricao'], linhas)
+        manifesto_carga.registrar_concluido(cursor, nome_tabela, nome_arquivo, tamanho, mtime, len(linhas))
+    conn.commit()
+    return len(linhas)
+
+def carregar(config, arquivo_zip, pasta_saida):
+    """Carrega os arquivos de um ZIP nas suas tabelas (principais via COPY com manifesto)"""
+    config = configuracao_carga(config)
+    layouts = schema_tipado.obter_layouts(config)
+    total_linhas = 0
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        for fonte in fontes_zip(config, arquivo_zip, pasta_saida):
+            nome = fontes_dados.nome_fonte(fonte)
+            tabela_codigo = next((tabela for tabela, extensao in TABELAS_CODIGO.items()
+                                  if fnmatch.fnmatch(nome, f'*{extensao}')), None)
+            if tabela_codigo:
+                total_linhas += carregar_tabela_codigo(conn, fonte, tabela_codigo)
+                continue
+            for nome_tabela, layout in layouts.items():
+                if fnmatch.fnmatch(nome, f'*{layout.extensao}'):
+                    total_linhas += carga_copy.carregar_arquivo_copy(
+                        conn, fonte, nome_tabela, layout,
+                        parser=config.get('parser_csv', carga_copy.PARSER_PYTHON))
+                    break
+    finally:
+        conn.close()
+    return f"{total_linhas:,} linhas"
+
+def tabelas_indexadas(tabela):
+    """A tabela e suas tabelas filhas, preenchidas pela mesma carga"""
+    layout = TABELAS_PRINCIPAIS.get(tabela)
+    return [tabela] + ([filha.nome for filha in layout.filhas] if layout else [])
+
+def indices_tabela(tabela):
+    return [indice for indice in indices_cnpj.INDICES_CODIGO + indices_cnpj.INDICES_CARGA
+            if indice.tabela in tabelas_indexadas(tabela)]
+
+def construir_indices(config, tabela):
+    """Índices de carga de uma tabela e de suas filhas (os de socios são criados pelo finalizar)"""
+    config = configuracao_carga(config)
+    indices = indices_tabela(tabela)
+    executados, com_erro = indices_cnpj.construir_indices(config, indices, f'índices de {tabela}')
+    if com_erro:
+        raise RuntimeError(f"{com_erro} índices de {tabela} com erro")
+    return f"{executados} índices"
+
+def finalizar():
+    """Executa o 03_inserir_dados.py: os arquivos já carregados são pulados pelo manifesto.
+
+    Sem entrada padrão, as perguntas do 03 assumem a resposta padrão em vez de
+    esperar indefinidamente dentro do pool.
+    """
+    subprocess.run([sys.executable, '03_inserir_dados.py'], check=True, stdin=subprocess.DEVNULL)
+    return "03_inserir_dados.py concluído"
+
+# Grafo
+
+def nome_tarefa(etapa, arquivo_zip):
+    return f"{etapa}:{os.path.basename(arquivo_zip)}"
+
+def montar_grafo(config, urls, arquivos_zip, pasta_zip, pasta_saida, segmentos):
+    """Monta as tarefas a partir dos ZIPs (baixados por urls, ou já presentes em arquivos_zip)"""
+    tarefas = []
+    embarcado = banco_embarcado.embarcado_ativo(config)
+    ler_zip = config.get('fonte_dados') == 'zip'
+
+    # Tarefa que deixa os dados de cada ZIP disponíveis para a carga
+    disponivel = {}
+    for url in urls:
+        arquivo_zip = os.path.join(pasta_zip, os.path.basename(url))
+        tarefas.append(Tarefa(nome_tarefa('baixar', arquivo_zip), RECURSO_REDE, baixar, (url, pasta_zip, segmentos), ()))
+        arquivos_zip.append(arquivo_zip)
+        disponivel[arquivo_zip] = nome_tarefa('baixar', arquivo_zip)
+    for arquivo_zip in arquivos_zip:
+        if not ler_zip:
+            dependencias = (disponivel[arquivo_zip],) if arquivo_zip in disponivel else ()
+            tarefas.append(Tarefa(nome_tarefa('extrair', arquivo_zip), RECURSO_CPU, extrair,
+                                  (arquivo_zip, pasta_saida), dependencias))
+            disponivel[arquivo_zip] = nome_tarefa('extrair', arquivo_zip)
+
+    # No blue/green o nome do schema vem da data dos arquivos de empresas
+    dependencias_tabelas = ()
+    if schema_carga.blue_green_ativo(config):
+        dependencias_tabelas = tuple(disponivel[arquivo_zip] for arquivo_zip in arquivos_zip
+                                     if tabela_zip(arquivo_zip) == 'empresas' and arquivo_zip in disponivel)[:1]
+    tarefas.append(Tarefa('tabelas', RECURSO_BANCO, criar_tabelas, (config,), dependencias_tabelas))
+
+    # Banco embarcado: a carga é toda feita pelo 03 (ver banco_embarcado.py)
+    dependencias_finais = ['tabelas'] + list(disponivel.values())
+    if not embarcado:
+        cargas_tabela = {}
+        for arquivo_zip in arquivos_zip:
+            dependencias = ('tabelas',) + ((disponivel[arquivo_zip],) if arquivo_zip in disponivel else ())
+            tarefas.append(Tarefa(nome_tarefa('carregar', arquivo_zip), RECURSO_BANCO, carregar,
+                                  (config, arquivo_zip, pasta_saida), dependencias))
+            cargas_tabela.setdefault(tabela_zip(arquivo_zip), []).append(nome_tarefa('carregar', arquivo_zip))
+            dependencias_finais.append(nome_tarefa('carregar', arquivo_zip))
+
+        for tabela, cargas in cargas_tabela.items():
+            if tabela and indices_tabela(tabela):
+                tarefas.append(Tarefa(f'indices:{tabela}', RECURSO_BANCO, construir_indices, (config, tabela), tuple(cargas)))
+                dependencias_finais.append(f'indices:{tabela}')
+
+    tarefas.append(Tarefa('finalizar', RECURSO_BANCO, finalizar, (), tuple(dependencias_finais)))
+    return tarefas
+
+# Estado gravado
+
+def carregar_estado(caminho, assinatura):
+    """Estado das tarefas da execução anterior, se for dos mesmos arquivos"""
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            estado = json.load(f)
+    except (OSError, ValueError):
+        return {'assinatura': assinatura, 'tarefas': {}}
+    if estado.get('assinatura') != assinatura:
+        logger.info(f"Estado anterior em {caminho} é de outros arquivos ({estado.get('assinatura')}), começando do zero")
+        return {'assinatura': assinatura, 'tarefas': {}}
+    return estado
+
+def salvar_estado(caminho, estado):
+    """Grava o estado de forma atômica"""
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+def limites_recursos(config, total_arquivos):
+    return {
+        RECURSO_REDE: config.get('orquestrador_rede', 5),
+        RECURSO_CPU: config.get('orquestrador_cpu', os.cpu_count() or 1),
+        RECURSO_BANCO: config.get('orquestrador_banco') or carga_paralela.calcular_workers(config, total_arquivos),
+    }
+
+def executar_grafo(tarefas, limites, caminho_estado, estado):
+    """Executa as tarefas respeitando as dependências e o limite de cada recurso.
+
+    Retorna (tarefas concluídas, tarefas com erro, tarefas não executadas).
+    """
+    concluidas = {nome for nome, registro in estado['tarefas'].items() if registro['status'] == STATUS_CONCLUIDA}
+    pendentes = {tarefa.nome: tarefa for tarefa in tarefas if tarefa.nome not in concluidas}
+    puladas = len(tarefas) - len(pendentes)
+    if puladas:
+        logger.info(f"✓ {puladas} tarefas já concluídas em execução anterior, pulando...")
+
+    com_erro = set()
+    em_execucao = {}
+    inicio = {}
+    executores = {
+        RECURSO_REDE: ThreadPoolExecutor(max_workers=limites[RECURSO_REDE]),
+        RECURSO_CPU: ProcessPoolExecutor(max_workers=limites[RECURSO_CPU]),
+        RECURSO_BANCO: ProcessPoolExecutor(max_workers=limites[RECURSO_BANCO]),
+    }
+    try:
+        while pendentes or em_execucao:
+            # Cada recurso tem seu pool: a tarefa pronta espera nele só pelo limite do recurso
+            prontas = [tarefa for tarefa in pendentes.values() if all(dep in concluidas for dep in tarefa.dependencias)]
+            for tarefa in prontas:
+                del pendentes[tarefa.nome]
+                futuro = executores[tarefa.recurso].submit(tarefa.funcao, *tarefa.argumentos)
+                em_execucao[futuro] = tarefa
+                inicio[tarefa.nome] = time.time()
+                estado['tarefas'][tarefa.nome] = {'status': STATUS_EXECUTANDO, 'recurso': tarefa.recurso}
+                logger.info(f"→ {tarefa.nome} ({tarefa.recurso})")
+            if prontas:
+                salvar_estado(caminho_estado, estado)
+
+            if not em_execucao:
+                break
+
+            terminados, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                tarefa = em_execucao.pop(futuro)
+                duracao = time.time() - inicio[tarefa.nome]
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    com_erro.add(tarefa.nome)
+                    estado['tarefas'][tarefa.nome] = {'status': STATUS_ERRO, 'recurso': tarefa.recurso,
+                                                      'duracao': round(duracao, 2), 'erro': str(e)}
+                    logger.error(f"✗ {tarefa.nome}: {str(e)}")
+                    continue
+                concluidas.add(tarefa.nome)
+                estado['tarefas'][tarefa.nome] = {'status': STATUS_CONCLUIDA, 'recurso': tarefa.recurso,
+                                                  'duracao': round(duracao, 2)}
+                logger.info(f"✓ {tarefa.nome} em {duracao:.2f}s ({resultado}) "
+                            f"[{len(concluidas)}/{len(tarefas)}]")
+            salvar_estado(caminho_estado, estado)
+    finally:
+        for executor in executores.values():
+            executor.shutdown(wait=True)
+
+    # As pendentes restantes dependem (direta ou indiretamente) de uma tarefa com erro
+    return len(concluidas), len(com_erro), len(pendentes)
+
+def main():
+    """Executa o grafo de tarefas da carga completa"""
+    global logger
+
+    parser = argparse.ArgumentParser(description='Executa a carga CNPJ como um grafo de tarefas por arquivo')
+    parser.add_argument('--sem-download', action='store_true', help='Usa os ZIPs já presentes em dados-publicos-zip')
+    parser.add_argument('--reiniciar', action='store_true', help='Descarta o estado gravado e executa todas as tarefas')
+    parser.add_argument('--segmentos', type=int, default=1, help='Conexões simultâneas por arquivo no download')
+    parser.add_argument('--url', default=baixa_dados.url_dados_abertos, help='Página de dados abertos da Receita')
+    args = parser.parse_args()
+
+    logger = configurar_logging()
+    config = carregar_configuracao()
+    caminho_estado = config.get('orquestrador_estado', ARQUIVO_ESTADO)
+    pasta_zip = baixa_dados.pasta_zip
+    pasta_saida = baixa_dados.pasta_cnpj
+    for pasta in (pasta_zip, pasta_saida):
+        os.makedirs(pasta, exist_ok=True)
+
+    urls = []
+    arquivos_zip = []
+    if args.sem_download:
+        arquivos_zip = sorted(glob.glob(os.path.join(pasta_zip, '*.zip')))
+        if not arquivos_zip:
+            print(f"❌ Nenhum arquivo ZIP encontrado em {pasta_zip}")
+            sys.exit(1)
+        # Os mesmos ZIPs (nome, tamanho e data) continuam o mesmo estado
+        assinatura = ';'.join(f"{os.path.basename(arquivo_zip)}:{os.path.getsize(arquivo_zip)}:{int(os.path.getmtime(arquivo_zip))}"
+                              for arquivo_zip in arquivos_zip)
+    else:
+        urls = baixa_dados.listar_arquivos(args.url)
+        if not urls:
+            print(f"❌ Nenhum arquivo ZIP encontrado em {args.url}")
+            sys.exit(1)
+        assinatura = os.path.dirname(urls[0])
+
+    if args.reiniciar and os.path.exists(caminho_estado):
+        os.remove(caminho_estado)
+    estado = carregar_estado(caminho_estado, assinatura)
+
+    tarefas = montar_grafo(config, urls, arquivos_zip, pasta_zip, pasta_saida, args.segmentos)
+    limites = limites_recursos(config, len(urls) + len(arquivos_zip))
+    logger.info(f"Orquestrador: {len(tarefas)} tarefas, limites por recurso: "
+                + ', '.join(f"{recurso}={limite}" for recurso, limite in limites.items()))
+
+    start_time = time.time()
+    concluidas, com_erro, nao_executadas = executar_grafo(tarefas, limites, caminho_estado, estado)
+
+    logger.info("\n" + "="*60)
+    logger.info("RESUMO DO ORQUESTRADOR")
+    logger.info("="*60)
+    logger.info(f"Tarefas: {concluidas} concluídas, {com_erro} com erro, "
+                f"{nao_executadas} não executadas (dependem de tarefas com erro) em {time.time() - start_time:.2f}s")
+    logger.info(f"Estado gravado em {caminho_estado}")
+    if com_erro or nao_executadas:
+        logger.warning("⚠ Corrija os erros e execute novamente: as tarefas concluídas serão puladas")
+        sys.exit(1)
+    logger.info("\n✓ CARGA CONCLUÍDA COM SUCESSO!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Leitura dos Arquivos CNPJ com pyarrow
+=====================================
+
+Com parser_csv = "pyarrow" no cnpj_config.json, a carga (carga_copy.py) lê os
+arquivos principais com pyarrow.csv em vez de csv.reader: cada bloco de
+TAMANHO_BLOCO_MB MB do arquivo é convertido de latin1 e separado em colunas
+Arrow (texto contíguo em memória, sem um objeto str do Python por campo), as
+transformações do layout (cnpj, capital_social, limpeza do schema tipado,
+CNAEs secundários) são feitas coluna a coluna com pyarrow.compute e o bloco é
+enviado ao COPY em formato CSV.
+
+A memória de cada processo fica em algumas vezes o tamanho do bloco,
+independentemente do tamanho do arquivo.
+
+Os blocos terminam sempre em um fim de linha, então o offset gravado no
+manifesto da carga (manifesto_carga.py) continua exato e a retomada funciona
+como no leitor padrão. Por isso campos com quebra de linha dentro de aspas não
+são suportados: arquivos assim devem ser carregados com o leitor padrão.
+
+Uso (cnpj_config.json):
+    "parser_csv": "pyarrow"
+
+Requer pyarrow (opcional, não é necessário para o leitor padrão).
+
+Configurações opcionais no cnpj_config.json:
+    parser_csv: "python" (csv.reader) ou "pyarrow" (padrão: python)
+"""
+
+import io
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+import fontes_dados
+import schema_tipado
+import layout_cnpj
+
+TAMANHO_BLOCO_MB = 32
+
+# Valores aceitos pelo converter_inteiro (só dígitos ASCII)
+PADRAO_INTEIRO = r'^[0-9]+$'
+
+def nulos(coluna):
+    return pa.nulls(len(coluna), type=pa.string())
+
+def manter_validos(coluna, validos):
+    """Mantém os valores onde validos é verdadeiro e troca os demais por NULL"""
+    return pc.if_else(pc.fill_null(validos, False), coluna, nulos(coluna))
+
+def converter_data(coluna):
+    """Equivalente a schema_tipado.converter_data: mantém as datas AAAAMMDD existentes"""
+    datas = pc.strptime(coluna, format='%Y%m%d', unit='s', error_is_null=True)
+    # O strptime do Arrow aceita dias inexistentes (20230230 vira 20230302): a data
+    # só é válida se voltar ao mesmo texto
+    return manter_validos(coluna, pc.equal(pc.strftime(datas, format='%Y%m%d'), coluna))
+
+def converter_inteiro(coluna):
+    """Equivalente a schema_tipado.converter_inteiro: mantém os códigos numéricos"""
+    return manter_validos(coluna, pc.match_substring_regex(coluna, PADRAO_INTEIRO))
+
+def transformar_estabelecimento(colunas):
+    """Equivalente a layout_cnpj.transformar_estabelecimento: acrescenta o cnpj"""
+    return colunas + [pc.binary_join_element_wise(colunas[0], colunas[1], colunas[2], '')]
+
+def transformar_empresas(colunas):
+    """Equivalente a layout_cnpj.transformar_empresas: capital_social com ponto, vazio vira NULL"""
+    capital_social = colunas[4]
+    colunas[4] = manter_validos(pc.replace_substring(capital_social, ',', '.'),
+                                pc.not_equal(capital_social, ''))
+    return colunas
+
+def sem_transformacao(colunas):
+    return colunas
+
+def extrair_cnae_secundaria(colunas):
+    """Equivalente a layout_cnpj.extrair_cnae_secundaria: uma linha (cnpj, cnae) por CNAE, sem repetição"""
+    listas = pc.split_pattern(colunas[layout_cnpj.INDICE_CNAE_SECUNDARIA], ',')
+    pares = pa.table({
+        'linha': pc.list_parent_indices(listas),
+        'cnae': pc.list_flatten(listas),
+    })
+    pares = pares.filter(pc.match_substring_regex(pares['cnae'], PADRAO_INTEIRO))
+    # O group_by não mantém a ordem: as linhas voltam à ordem dos estabelecimentos
+    pares = pares.group_by(['linha', 'cnae'], use_threads=False).aggregate([]).sort_by('linha')
+    return [pc.take(colunas[layout_cnpj.INDICE_CNPJ], pares['linha']), pares['cnae']]
+
+# Funções do layout -> equivalentes vetorizadas
+TRANSFORMACOES = {
+    layout_cnpj.transformar_estabelecimento: transformar_estabelecimento,
+    layout_cnpj.transformar_empresas: transformar_empresas,
+    layout_cnpj.sem_transformacao: sem_transformacao,
+}
+
+CONVERSORES = {
+    schema_tipado.converter_data: converter_data,
+    schema_tipado.converter_inteiro: converter_inteiro,
+}
+
+EXTRACOES = {
+    layout_cnpj.extrair_cnae_secundaria: extrair_cnae_secundaria,
+}
+
+def transformar_colunas(layout, colunas):
+    """Aplica às colunas do bloco a transformação do layout (e a do schema tipado, se houver)"""
+    transformar = layout.transformar
+    conversoes = ()
+    if isinstance(transformar, schema_tipado.TransformacaoTipada):
+        transformar, conversoes = transformar.transformar, transformar.conversoes
+    if transformar not in TRANSFORMACOES:
+        raise ValueError(f"Transformação {transformar.__name__} sem equivalente no parser pyarrow")
+
+    colunas = TRANSFORMACOES[transformar](colunas)
+    for indice, converter in conversoes:
+        colunas[indice] = CONVERSORES[converter](colunas[indice])
+    return colunas
+
+def ler_bloco(dados, layout, nome_arquivo, offset):
+    """Separa as colunas (texto) de um bloco do arquivo"""
+    try:
+        tabela = pacsv.read_csv(
+            pa.py_buffer(dados.replace(b'\x00', b'')),
+            read_options=pacsv.ReadOptions(column_names=layout.colunas, encoding='latin1',
+                                           # Os processos da carga paralela já ocupam os núcleos
+                                           use_threads=False),
+            parse_options=pacsv.ParseOptions(delimiter=';', quote_char='"', newlines_in_values=False),
+            convert_options=pacsv.ConvertOptions(
+                column_types={coluna: pa.string() for coluna in layout.colunas},
+                strings_can_be_null=False,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Bloco a partir do byte {offset} de {nome_arquivo}: {str(e)}") from e
+    return [tabela.column(coluna).combine_chunks() for coluna in layout.colunas]
+
+def escrever_csv(colunas, nomes):
+    """Bloco no formato CSV do COPY: texto entre aspas (vazio = ''), NULL sem aspas"""
+    saida = io.BytesIO()
+    pacsv.write_csv(pa.table(colunas, names=nomes), saida,
+                    write_options=pacsv.WriteOptions(include_header=False, quoting_style='all_valid'))
+    return saida.getvalue()
+
+def blocos_copy(arquivo_bin, offset, layout, nome_arquivo, tamanho_bloco=TAMANHO_BLOCO_MB * 1024 * 1024):
+    """Lê o arquivo com pyarrow e gera os blocos no formato CSV do COPY.
+
+    Gera (linhas, dados da tabela, [dados de cada tabela filha], offset após o bloco),
+    como carga_copy.blocos_copy.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow não instalado: pip install pyarrow (ou use parser_csv = \"python\")")
+
+    for dados in fontes_dados.ler_blocos(arquivo_bin, tamanho_bloco):
+        colunas = transformar_colunas(layout, ler_bloco(dados, layout, nome_arquivo, offset))
+        offset += len(dados)
+        dados_filhas = []
+        for filha in layout.filhas:
+            colunas_filha = EXTRACOES[filha.extrair](colunas)
+            dados_filhas.append(escrever_csv(colunas_filha, filha.colunas) if len(colunas_filha[0]) else None)
+        yield len(colunas[0]), escrever_csv(colunas, layout.colunas_destino), dados_filhas, offset
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Particionamento das Tabelas CNPJ
+================================
+
+Com particoes_hash no cnpj_config.json (ex.: 16), as tabelas estabelecimento,
+empresas e socios são criadas particionadas por HASH (cnpj_basico), com N
+partições <tabela>_p0 .. <tabela>_pN-1.
+
+Consultas por cnpj_basico (e por cnpj, que começa pelo cnpj_basico, quando o
+filtro inclui cnpj_basico) acessam uma única partição, mantendo a profundidade
+dos índices e o custo do VACUUM limitados ao tamanho de cada partição.
+
+O COPY é feito na tabela principal e o PostgreSQL encaminha cada linha para a
+partição correspondente. Os índices são construídos em cada partição em
+paralelo e depois anexados ao índice da tabela principal (ver indices_cnpj.py).
+
+Configurações opcionais no cnpj_config.json:
+    particoes_hash: quantidade de partições (padrão: 0, sem particionamento)
+"""
+
+import re
+
+# Tabelas particionadas e a coluna de particionamento
+TABELAS_PARTICIONADAS = {
+    'estabelecimento': 'cnpj_basico',
+    'empresas': 'cnpj_basico',
+    'socios': 'cnpj_basico',
+}
+
+def quantidade_particoes(config):
+    """Quantidade de partições por tabela (0 = sem particionamento)"""
+    return int(config.get('particoes_hash') or 0)
+
+def nome_particao(tabela, resto):
+    return f'{tabela}_p{resto}'
+
+def sql_particoes(tabela, particoes, comando_criar='CREATE TABLE'):
+    """Retorna os CREATE TABLE ... PARTITION OF das partições de uma tabela"""
+    return '\n'.join(
+        f"{comando_criar} {nome_particao(tabela, resto)} PARTITION OF {tabela} "
+        f"FOR VALUES WITH (MODULUS {particoes}, REMAINDER {resto});"
+        for resto in range(particoes)
+    )
+
+def particionar_ddl(sql, particoes, comando_criar='CREATE TABLE'):
+    """Reescreve o DDL de criação para particionar as tabelas de TABELAS_PARTICIONADAS.
+
+    A tabela principal é sempre criada com CREATE TABLE (tabelas particionadas
+    não podem ser UNLOGGED); as partições usam comando_criar.
+    """
+    for tabela, coluna in TABELAS_PARTICIONADAS.items():
+        padrao = re.compile(rf'{re.escape(comando_criar)} {tabela} \((.*?)\n(\s*)\);', re.DOTALL)
+        sql = padrao.sub(
+            lambda m: (f"CREATE TABLE {tabela} ({m.group(1)}\n{m.group(2)}) PARTITION BY HASH ({coluna});\n"
+                       + sql_particoes(tabela, particoes, comando_criar)),
+            sql
+        )
+    return sql
+
+def listar_particoes(cursor, tabela):
+    """Retorna as partições de uma tabela (lista vazia se não for particionada)"""
+    cursor.execute('''
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+    ''', (tabela,))
+    return [row[0] for row in cursor.fetchall()]
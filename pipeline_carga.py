@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""
+Carga em Pipeline dos Arquivos CNPJ
+===================================
+
+Com carga_pipeline no cnpj_config.json, o 03_inserir_dados.py carrega cada
+tabela principal em três etapas ligadas por filas limitadas, em vez de um
+processo por arquivo que lê, transforma e envia cada bloco em sequência:
+
+    leitura (1 thread)  ->  transformação (processos)  ->  escrita (conexões)
+
+    - leitura: lê os arquivos (soltos ou dentro dos ZIPs) em blocos de
+      pipeline_bloco_mb MB terminados em fim de linha;
+    - transformação: um pool de processos separa os campos, aplica a
+      transformação do layout e gera os dados do COPY (csv.reader ou pyarrow,
+      conforme parser_csv);
+    - escrita: threads com conexões próprias enviam cada bloco via COPY.
+
+Enquanto um bloco está no banco os processos já transformam os próximos, e a
+leitura não espera nenhum dos dois. A fila entre a leitura e a escrita tem
+pipeline_fila blocos: quando ela enche, a leitura para até a escrita consumir
+um bloco (backpressure), então a memória fica limitada a aproximadamente
+(pipeline_fila + processos + conexões) x tamanho do bloco, qualquer que seja o
+tamanho dos arquivos.
+
+Os blocos de um arquivo são enviados em paralelo, mas confirmados em ordem,
+cada um junto com a posição alcançada no _carga_manifest (ver
+manifesto_carga.py): a retomada de uma carga interrompida funciona como na
+carga por arquivo.
+
+Ao final de cada tabela (e a cada INTERVALO_METRICAS segundos) são registradas
+a ocupação e a espera de cada etapa. A etapa mais ocupada é o gargalo: leitura
+esperando a fila cheia e escrita ocupada indicam o PostgreSQL; escrita
+aguardando blocos e transformação ocupada indicam o parser.
+
+Configurações opcionais no cnpj_config.json:
+    carga_pipeline: carrega as tabelas principais em pipeline (padrão: false)
+    pipeline_transformadores: processos de transformação (padrão: núcleos desta máquina - 1)
+    pipeline_escritores: conexões de escrita (padrão: metade de db_cores)
+    pipeline_fila: blocos na fila entre leitura e escrita (padrão: 2 x processos)
+    pipeline_bloco_mb: tamanho de cada bloco lido, em MB (padrão: 8)
+"""
+
+import io
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+import carga_copy
+import parser_arrow
+import fontes_dados
+import manifesto_carga
+
+logger = logging.getLogger(__name__)
+
+BLOCO_MB = 8
+INTERVALO_METRICAS = 30
+
+def pipeline_ativo(config):
+    """Indica se as tabelas principais devem ser carregadas em pipeline"""
+    return bool(config.get('carga_pipeline'))
+
+def calcular_parametros(config):
+    """Retorna (processos de transformação, conexões de escrita, blocos na fila, bytes por bloco)"""
+    transformadores = config.get('pipeline_transformadores', max(1, (os.cpu_count() or 2) - 1))
+    nucleos_banco = config.get('db_cores', os.cpu_count() or 1)
+    escritores = config.get('pipeline_escritores', max(1, nucleos_banco // 2))
+    fila = config.get('pipeline_fila', 2 * transformadores)
+    tamanho_bloco = int(config.get('pipeline_bloco_mb', BLOCO_MB) * 1024 * 1024)
+    return max(1, transformadores), max(1, escritores), max(1, fila), tamanho_bloco
+
+class MetricasEtapa:
+    """Tempo ocupado e tempo de espera acumulados pelas threads (ou processos) de uma etapa"""
+
+    def __init__(self, nome, unidades, tipo_unidade, descricao_espera=''):
+        self.nome = nome
+        self.unidades = unidades
+        self.tipo_unidade = tipo_unidade
+        self.descricao_espera = descricao_espera
+        self.ocupado = 0.0
+        self.espera = 0.0
+        self.lock = threading.Lock()
+
+    def somar(self, ocupado=0.0, espera=0.0):
+        with self.lock:
+            self.ocupado += ocupado
+            self.espera += espera
+
+    @contextmanager
+    def medir_ocupado(self):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.somar(ocupado=time.perf_counter() - inicio)
+
+    @contextmanager
+    def medir_espera(self):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.somar(espera=time.perf_counter() - inicio)
+
+    def ocupacao(self, duracao):
+        """Fração do tempo disponível (duração x unidades) em que a etapa trabalhou"""
+        return self.ocupado / max(duracao * self.unidades, 1e-9)
+
+    def resumo(self, duracao):
+        texto = f"{self.nome}: {self.ocupacao(duracao):4.0%} ocupada"
+        if self.descricao_espera:
+            texto += f", {self.espera / max(duracao * self.unidades, 1e-9):4.0%} {self.descricao_espera}"
+        return f"{texto} ({self.unidades} {self.tipo_unidade})"
+
+class ArquivoPipeline:
+    """Andamento de um arquivo: blocos confirmados em ordem e linhas na tabela"""
+
+    def __init__(self, nome_arquivo, linhas):
+        self.nome_arquivo = nome_arquivo
+        self.linhas = linhas
+        self.proximo_bloco = 0
+        self.concluido = False
+
+def transformar_bloco(dados, layout, parser, descricao):
+    """Gera os dados do COPY de um bloco do arquivo (executado em um processo do pool).
+
+    Retorna (linhas, dados da tabela, [dados de cada tabela filha], duração em segundos).
+    """
+    inicio = time.perf_counter()
+    if parser == carga_copy.PARSER_PYARROW:
+        blocos = parser_arrow.blocos_copy(io.BytesIO(dados), 0, layout, descricao, tamanho_bloco=len(dados))
+    else:
+        blocos = carga_copy.blocos_copy(io.BytesIO(dados), 0, layout, sys.maxsize, descricao)
+    linhas, dados_tabela, dados_filhas, _ = next(blocos, (0, None, [None] * len(layout.filhas), 0))
+    return linhas, dados_tabela, dados_filhas, time.perf_counter() - inicio
+
+def colocar(fila, item, falha):
+    """fila.put que desiste se outra etapa falhou. Retorna False nesse caso"""
+    while not falha.is_set():
+        try:
+            fila.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def retirar(fila, falha):
+    """fila.get que desiste se outra etapa falhou. Retorna None nesse caso"""
+    while not falha.is_set():
+        try:
+            return fila.get(timeout=1)
+        except queue.Empty:
+            continue
+    return None
+
+class PipelineCarga:
+    """Carga dos arquivos de uma tabela principal em leitura -> transformação -> escrita"""
+
+    def __init__(self, config, nome_tabela, layout):
+        self.config = config
+        self.nome_tabela = nome_tabela
+        self.layout = layout
+        self.parser = config.get('parser_csv', carga_copy.PARSER_PYTHON)
+        self.transformadores, self.escritores, tamanho_fila, self.tamanho_bloco = calcular_parametros(config)
+
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.ordem = threading.Condition()
+        self.falha = threading.Event()
+        self.erro = None
+        self.arquivos = []
+        self.linhas_inseridas = 0
+
+        self.leitura = MetricasEtapa('leitura', 1, 'thread', 'aguardando fila cheia')
+        self.transformacao = MetricasEtapa('transformação', self.transformadores, 'processos')
+        self.escrita = MetricasEtapa('escrita', self.escritores, 'conexões', 'aguardando blocos')
+
+    def registrar_erro(self, e):
+        with self.ordem:
+            if self.erro is None:
+                self.erro = e
+            self.falha.set()
+            self.ordem.notify_all()
+
+    def ler(self, executor, fontes):
+        """Etapa de leitura: envia cada bloco para o pool e coloca o resultado futuro na fila"""
+        conn = carga_copy.conectar_psycopg2(self.config)
+        try:
+            for fonte in fontes:
+                if not self.ler_arquivo(conn, executor, fonte):
+                    break
+        except Exception as e:
+            self.registrar_erro(e)
+        finally:
+            conn.close()
+            for _ in range(self.escritores):
+                colocar(self.fila, None, self.falha)
+
+    def ler_arquivo(self, conn, executor, fonte):
+        nome_arquivo, tamanho, mtime = fontes_dados.identificar_fonte(fonte)
+        with conn.cursor() as cursor:
+            registro = manifesto_carga.preparar_retomada(cursor, self.nome_tabela, nome_arquivo, tamanho, mtime)
+            conn.commit()
+
+        arquivo = ArquivoPipeline(nome_arquivo, registro['linhas'])
+        self.arquivos.append(arquivo)
+        if registro['status'] == manifesto_carga.STATUS_CONCLUIDO:
+            logger.info(f"✓ {nome_arquivo} já carregado em {self.nome_tabela} ({registro['linhas']:,} linhas), pulando...")
+            arquivo.concluido = True
+            return True
+
+        offset = registro['offset_bytes']
+        if offset:
+            logger.info(f"Retomando {nome_arquivo} a partir do byte {offset:,} ({registro['linhas']:,} linhas já carregadas)")
+
+        with fontes_dados.abrir_fonte(fonte) as f:
+            f.seek(offset)
+            blocos = fontes_dados.ler_blocos(f, self.tamanho_bloco)
+            with self.leitura.medir_ocupado():
+                dados = next(blocos, None)
+
+            if dados is None:
+                with conn.cursor() as cursor:
+                    manifesto_carga.registrar_progresso(cursor, self.nome_tabela, nome_arquivo, offset,
+                                                        arquivo.linhas, manifesto_carga.STATUS_CONCLUIDO)
+                conn.commit()
+                arquivo.concluido = True
+                return True
+
+            numero = 0
+            while dados is not None:
+                # Um bloco à frente para saber qual é o último do arquivo
+                with self.leitura.medir_ocupado():
+                    seguinte = next(blocos, None)
+                futuro = executor.submit(transformar_bloco, dados, self.layout, self.parser,
+                                         f'{nome_arquivo} (bloco a partir do byte {offset:,})')
+                offset += len(dados)
+                with self.leitura.medir_espera():
+                    if not colocar(self.fila, (arquivo, numero, offset, seguinte is None, futuro), self.falha):
+                        return False
+                numero += 1
+                dados = seguinte
+        return True
+
+    def escrever(self):
+        """Etapa de escrita: envia os blocos via COPY e os confirma na ordem de cada arquivo"""
+        try:
+            conn = carga_copy.conectar_psycopg2(self.config)
+        except Exception as e:
+            self.registrar_erro(e)
+            return
+        try:
+            while True:
+                with self.escrita.medir_espera():
+                    item = retirar(self.fila, self.falha)
+                    if item is None:
+                        break
+                    arquivo, numero, offset, ultimo, futuro = item
+                    linhas, dados, dados_filhas, duracao = futuro.result()
+                self.transformacao.somar(ocupado=duracao)
+                self.escrever_bloco(conn, arquivo, numero, offset, ultimo, linhas, dados, dados_filhas)
+        except Exception as e:
+            conn.rollback()
+            self.registrar_erro(e)
+        finally:
+            conn.close()
+
+    def escrever_bloco(self, conn, arquivo, numero, offset, ultimo, linhas, dados, dados_filhas):
+        formato_csv = self.parser == carga_copy.PARSER_PYARROW
+        with conn.cursor() as cursor:
+            with self.escrita.medir_ocupado():
+                if dados:
+                    carga_copy.copiar_dados(cursor, self.nome_tabela, self.layout.colunas_destino, dados, formato_csv)
+                for filha, dados_filha in zip(self.layout.filhas, dados_filhas):
+                    if dados_filha:
+                        carga_copy.copiar_dados(cursor, filha.nome, filha.colunas, dados_filha, formato_csv)
+
+            # Os blocos de um arquivo são confirmados em ordem: a posição no manifesto
+            # só avança quando todos os blocos anteriores já estão na tabela
+            with self.escrita.medir_espera(), self.ordem:
+                self.ordem.wait_for(lambda: arquivo.proximo_bloco == numero or self.falha.is_set())
+            if self.falha.is_set():
+                conn.rollback()
+                return
+
+            with self.escrita.medir_ocupado():
+                status = manifesto_carga.STATUS_CONCLUIDO if ultimo else manifesto_carga.STATUS_CARREGANDO
+                manifesto_carga.registrar_progresso(cursor, self.nome_tabela, arquivo.nome_arquivo, offset,
+                                                    arquivo.linhas + linhas, status)
+                conn.commit()
+
+        with self.ordem:
+            arquivo.linhas += linhas
+            arquivo.proximo_bloco += 1
+            arquivo.concluido = ultimo
+            self.linhas_inseridas += linhas
+            self.ordem.notify_all()
+        if ultimo:
+            logger.info(f"✓ {arquivo.nome_arquivo}: {arquivo.linhas:,} linhas em {self.nome_tabela}")
+
+    def registrar_metricas(self, duracao, prefixo='  '):
+        etapas = (self.leitura, self.transformacao, self.escrita)
+        for etapa in etapas:
+            logger.info(f"{prefixo}{etapa.resumo(duracao)}")
+        gargalo = max(etapas, key=lambda etapa: etapa.ocupacao(duracao))
+        logger.info(f"{prefixo}Gargalo provável: {gargalo.nome} (fila: {self.fila.qsize()}/{self.fila.maxsize} blocos)")
+
+    def executar(self, fontes):
+        """Carrega as fontes e retorna a quantidade de linhas delas presentes na tabela"""
+        logger.info(f"Pipeline {self.nome_tabela}: {self.transformadores} processos de transformação, "
+                    f"{self.escritores} conexões de escrita, fila de {self.fila.maxsize} blocos de "
+                    f"{self.tamanho_bloco / (1024 * 1024):.0f} MB, parser {self.parser}")
+        start_time = time.time()
+        with ProcessPoolExecutor(max_workers=self.transformadores) as executor:
+            leitor = threading.Thread(target=self.ler, args=(executor, fontes), name='leitura', daemon=True)
+            escritores = [threading.Thread(target=self.escrever, name=f'escrita-{i}', daemon=True)
+                          for i in range(self.escritores)]
+            leitor.start()
+            for escritor in escritores:
+                escritor.start()
+
+            proxima_metrica = time.time() + INTERVALO_METRICAS
+            for escritor in escritores:
+                while escritor.is_alive():
+                    escritor.join(timeout=1)
+                    if time.time() >= proxima_metrica:
+                        logger.info(f"  {self.nome_tabela}: {self.linhas_inseridas:,} linhas inseridas")
+                        self.registrar_metricas(time.time() - start_time, prefixo='    ')
+                        proxima_metrica = time.time() + INTERVALO_METRICAS
+            leitor.join()
+            if self.erro is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise self.erro
+
+        duracao = time.time() - start_time
+        logger.info(f"Tabela {self.nome_tabela}: {self.linhas_inseridas:,} linhas inseridas de "
+                    f"{len(fontes)} arquivos em {duracao:.2f}s "
+                    f"({self.linhas_inseridas / max(duracao, 1e-9):,.0f} linhas/s)")
+        if self.linhas_inseridas:
+            self.registrar_metricas(duracao)
+        return sum(arquivo.linhas for arquivo in self.arquivos)
+
+def carregar_arquivos_pipeline(config, arquivos, nome_tabela, layout):
+    """Carrega todos os arquivos de uma tabela em pipeline.
+
+    Retorna a quantidade total de linhas dos arquivos presentes na tabela.
+    """
+    if not arquivos:
+        return 0
+    return PipelineCarga(config, nome_tabela, layout).executar(arquivos)
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Schemas de Carga (Blue/Green)
+=============================
+
+Com schema_publicado no cnpj_config.json (ex.: "cnpj"), a carga não mexe nas
+tabelas lidas pela API: 02_criar_tabelas.py e 03_inserir_dados.py trabalham em
+um schema de carga cnpj_AAAAMM (mês de referência dos arquivos), com tabelas,
+índices e a tabela socios completos.
+
+Depois que a carga é validada, o schema publicado é trocado em uma única
+transação:
+
+    ALTER SCHEMA cnpj RENAME TO cnpj_anterior_AAAAMM;   -- mês que estava no ar
+    ALTER SCHEMA cnpj_AAAAMM RENAME TO cnpj;
+
+Consultas em andamento terminam na geração anterior e as novas já resolvem os
+nomes no schema novo; os leitores nunca veem tabelas vazias. As aplicações devem
+usar search_path = cnpj (ex.: ALTER ROLE api SET search_path = cnpj).
+
+As gerações anteriores (cnpj_anterior_*) são mantidas para rollback, até o
+limite de schemas_mantidos (padrão: 2).
+
+Uso manual:
+    python schema_carga.py --listar
+    python schema_carga.py --publicar     # publica o schema de carga dos arquivos atuais
+    python schema_carga.py --reverter     # volta para a geração anterior mais recente
+
+Configurações opcionais no cnpj_config.json:
+    schema_publicado: schema lido pelas aplicações (ativa o modo blue/green)
+    schemas_mantidos: gerações anteriores mantidas para rollback (padrão: 2)
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+from datetime import datetime
+
+import carga_copy
+import fontes_dados
+
+logger = logging.getLogger(__name__)
+
+SCHEMAS_MANTIDOS = 2
+
+def blue_green_ativo(config):
+    """Indica se a carga deve ser feita em um schema de carga separado"""
+    return bool(config.get('schema_publicado'))
+
+def mes_referencia(data_referencia):
+    """Converte 'dd/mm/aaaa' em 'aaaamm' (mês atual se a data não for reconhecida)"""
+    if re.fullmatch(r'\d{2}/\d{2}/\d{4}', data_referencia or ''):
+        return data_referencia[6:10] + data_referencia[3:5]
+    return datetime.now().strftime('%Y%m')
+
+def nome_schema_carga(config):
+    """Retorna o schema de carga dos arquivos atuais (ex.: cnpj_202409)"""
+    pasta = fontes_dados.pasta_dados(config)
+    return f"{config['schema_publicado']}_{mes_referencia(fontes_dados.obter_data_referencia(pasta))}"
+
+def usar_schema(config, schema):
+    """Faz as conexões abertas com esta configuração usarem apenas o schema informado.
+
+    O search_path não inclui public, para que DROP TABLE IF EXISTS nunca alcance
+    as tabelas de outro schema.
+    """
+    config['search_path'] = schema
+    return config
+
+def opcoes_conexao(config):
+    """Argumentos de conexão (libpq) com o search_path da configuração, se houver"""
+    if config.get('search_path'):
+        return {'options': f"-csearch_path={config['search_path']}"}
+    return {}
+
+def schema_existe(cursor, schema):
+    cursor.execute("SELECT 1 FROM pg_namespace WHERE nspname = %s", (schema,))
+    return cursor.fetchone() is not None
+
+def referencia_schema(cursor, schema):
+    """Retorna a data de referência gravada na _referencia de um schema, ou None"""
+    cursor.execute("SELECT to_regclass(%s)", (f'{schema}._referencia',))
+    if cursor.fetchone()[0] is None:
+        return None
+    cursor.execute(f"SELECT valor FROM {schema}._referencia WHERE referencia = 'CNPJ'")
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def nome_disponivel(cursor, nome):
+    """Retorna o nome, ou o nome com um sufixo de data/hora se já existir um schema com ele"""
+    if not schema_existe(cursor, nome):
+        return nome
+    return f"{nome}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+
+def listar_geracoes(cursor, config):
+    """Lista as gerações anteriores (schema_publicado_anterior_*), mais recentes primeiro"""
+    prefixo = f"{config['schema_publicado']}_anterior_"
+    cursor.execute("SELECT nspname FROM pg_namespace WHERE starts_with(nspname, %s) ORDER BY nspname DESC", (prefixo,))
+    return [row[0] for row in cursor.fetchall()]
+
+def validar_schema(cursor, schema):
+    """Verifica se o schema de carga tem as tabelas finais preenchidas.
+
+    Retorna a lista de problemas encontrados (vazia se válido).
+    """
+    problemas = []
+    for tabela in ['estabelecimento', 'empresas', 'simples', 'socios', '_referencia']:
+        cursor.execute("SELECT to_regclass(%s)", (f'{schema}.{tabela}',))
+        if cursor.fetchone()[0] is None:
+            problemas.append(f"tabela {tabela} não existe")
+            continue
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {schema}.{tabela})")
+        if not cursor.fetchone()[0]:
+            problemas.append(f"tabela {tabela} está vazia")
+    return problemas
+
+def remover_geracoes_antigas(conn, config):
+    """Remove as gerações anteriores além de schemas_mantidos"""
+    mantidos = config.get('schemas_mantidos', SCHEMAS_MANTIDOS)
+    with conn.cursor() as cursor:
+        for schema in listar_geracoes(cursor, config)[mantidos:]:
+            logger.info(f"Removendo geração antiga {schema}...")
+            cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+    conn.commit()
+
+def trocar_schemas(cursor, publicado, novo, nome_anterior):
+    """Renomeia o schema publicado para nome_anterior e o novo para publicado (na transação do cursor)"""
+    if schema_existe(cursor, publicado):
+        cursor.execute(f"ALTER SCHEMA {publicado} RENAME TO {nome_anterior}")
+    cursor.execute(f"ALTER SCHEMA {novo} RENAME TO {publicado}")
+
+def publicar_schema(conn, config, schema):
+    """Publica o schema de carga no lugar do schema_publicado, de forma atômica.
+
+    Retorna o nome dado à geração anterior (ou None se não havia uma).
+    Lança ValueError se o schema de carga não passar na validação.
+    """
+    publicado = config['schema_publicado']
+    try:
+        with conn.cursor() as cursor:
+            if not schema_existe(cursor, schema):
+                raise ValueError(f"Schema de carga {schema} não existe")
+
+            problemas = validar_schema(cursor, schema)
+            if problemas:
+                raise ValueError(f"Schema {schema} não foi publicado: {'; '.join(problemas)}")
+
+            anterior = None
+            if schema_existe(cursor, publicado):
+                mes = mes_referencia(referencia_schema(cursor, publicado))
+                anterior = nome_disponivel(cursor, f"{publicado}_anterior_{mes}")
+
+            trocar_schemas(cursor, publicado, schema, anterior)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    logger.info(f"✓ Schema {schema} publicado como {publicado}" + (f" (anterior mantido como {anterior})" if anterior else ""))
+    remover_geracoes_antigas(conn, config)
+    return anterior
+
+def reverter_schema(conn, config):
+    """Volta o schema_publicado para a geração anterior mais recente.
+
+    A geração retirada do ar volta a ter o nome de schema de carga (schema_publicado_AAAAMM).
+    """
+    publicado = config['schema_publicado']
+    try:
+        with conn.cursor() as cursor:
+            geracoes = listar_geracoes(cursor, config)
+            if not geracoes:
+                raise ValueError("Não há geração anterior para reverter")
+
+            retirado = nome_disponivel(cursor, f"{publicado}_{mes_referencia(referencia_schema(cursor, publicado))}")
+            trocar_schemas(cursor, publicado, geracoes[0], retirado)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    logger.info(f"✓ {geracoes[0]} publicado novamente como {publicado} (versão retirada mantida como {retirado})")
+    return geracoes[0]
+
+def main():
+    """Lista, publica ou reverte os schemas de carga"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Troca blue/green dos schemas da base CNPJ')
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument('--listar', action='store_true', help='Lista o schema publicado, o de carga e as gerações anteriores')
+    grupo.add_argument('--publicar', action='store_true', help='Publica o schema de carga dos arquivos atuais')
+    grupo.add_argument('--reverter', action='store_true', help='Volta para a geração anterior mais recente')
+    args = parser.parse_args()
+
+    if not os.path.exists('cnpj_config.json'):
+        print("❌ Arquivo de configuração 'cnpj_config.json' não encontrado!")
+        sys.exit(1)
+    with open('cnpj_config.json', 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    if not blue_green_ativo(config):
+        print("❌ Defina schema_publicado no cnpj_config.json para usar schemas de carga")
+        sys.exit(1)
+
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        if args.listar:
+            with conn.cursor() as cursor:
+                publicado = config['schema_publicado']
+                schema = nome_schema_carga(config)
+                print(f"Publicado: {publicado} ({referencia_schema(cursor, publicado) if schema_existe(cursor, publicado) else 'não existe'})")
+                print(f"Carga: {schema} ({'existe' if schema_existe(cursor, schema) else 'não existe'})")
+                for geracao in listar_geracoes(cursor, config):
+                    print(f"Anterior: {geracao} ({referencia_schema(cursor, geracao)})")
+        elif args.publicar:
+            publicar_schema(conn, config, nome_schema_carga(config))
+        else:
+            reverter_schema(conn, config)
+    except Exception as e:
+        logger.error(f"✗ {str(e)}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Schema Tipado
+=============
+
+Com schema_tipado no cnpj_config.json, o 02_criar_tabelas.py cria as colunas
+de datas, códigos e CNPJ com tipos nativos em vez de VARCHAR:
+
+    - datas AAAAMMDD (data_*)                      -> DATE
+    - códigos (situação, motivo, país, município,
+      natureza jurídica, qualificação, porte...)   -> SMALLINT
+    - cnae_fiscal, cnae.codigo, cnpj_basico        -> INTEGER
+    - cnpj                                         -> BIGINT
+
+Cada valor ocupa 2 a 8 bytes em vez de 3 a 15 (texto com cabeçalho), o que
+reduz tabelas e índices, e filtros por intervalo de datas usam o índice
+diretamente.
+
+Durante a carga, a transformação do layout (layout_cnpj.py) deixa os valores
+válidos como estão (o COPY converte 'AAAAMMDD' e '0012' para DATE e SMALLINT) e
+troca por NULL os valores que o PostgreSQL recusaria: datas vazias, 00000000 ou
+inexistentes e códigos vazios ou não numéricos.
+
+Os zeros à esquerda não são armazenados: para exibir, use lpad(cnpj::text, 14, '0')
+e lpad(cnpj_basico::text, 8, '0'). Comparações com literais ('1', '00012345')
+continuam funcionando, pois o PostgreSQL converte o literal para o tipo da coluna.
+
+O benchmark_schema.py compara tamanho e latência dos dois schemas com os mesmos
+arquivos.
+
+Configurações opcionais no cnpj_config.json:
+    schema_tipado: cria as colunas com tipos nativos (padrão: false)
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+
+from layout_cnpj import TABELAS_PRINCIPAIS
+
+# Colunas com tipo nativo no schema tipado; as demais continuam VARCHAR
+TIPOS_COLUNAS = {
+    'cnae': {'codigo': 'INTEGER'},
+    'motivo': {'codigo': 'SMALLINT'},
+    'municipio': {'codigo': 'SMALLINT'},
+    'natureza_juridica': {'codigo': 'SMALLINT'},
+    'pais': {'codigo': 'SMALLINT'},
+    'qualificacao_socio': {'codigo': 'SMALLINT'},
+    'empresas': {
+        'cnpj_basico': 'INTEGER',
+        'natureza_juridica': 'SMALLINT',
+        'qualificacao_responsavel': 'SMALLINT',
+        'porte_empresa': 'SMALLINT',
+    },
+    'estabelecimento': {
+        'cnpj_basico': 'INTEGER',
+        'matriz_filial': 'SMALLINT',
+        'situacao_cadastral': 'SMALLINT',
+        'data_situacao_cadastral': 'DATE',
+        'motivo_situacao_cadastral': 'SMALLINT',
+        'pais': 'SMALLINT',
+        'data_inicio_atividades': 'DATE',
+        'cnae_fiscal': 'INTEGER',
+        'municipio': 'SMALLINT',
+        'data_situacao_especial': 'DATE',
+        'cnpj': 'BIGINT',
+    },
+    'estabelecimento_cnae_secundaria': {
+        'cnpj': 'BIGINT',
+        'cnae': 'INTEGER',
+    },
+    'simples': {
+        'cnpj_basico': 'INTEGER',
+        'data_opcao_simples': 'DATE',
+        'data_exclusao_simples': 'DATE',
+        'data_opcao_mei': 'DATE',
+        'data_exclusao_mei': 'DATE',
+    },
+    'socios_original': {
+        'cnpj_basico': 'INTEGER',
+        'identificador_de_socio': 'SMALLINT',
+        'qualificacao_socio': 'SMALLINT',
+        'data_entrada_sociedade': 'DATE',
+        'pais': 'SMALLINT',
+        'qualificacao_representante_legal': 'SMALLINT',
+        'faixa_etaria': 'SMALLINT',
+    },
+}
+
+def tipado_ativo(config):
+    """Indica se as tabelas devem ser criadas com tipos nativos"""
+    return bool(config.get('schema_tipado'))
+
+def tipo_coluna(config, tabela, coluna, padrao='VARCHAR'):
+    """Tipo SQL de uma coluna no schema da configuração"""
+    if tipado_ativo(config):
+        return TIPOS_COLUNAS.get(tabela, {}).get(coluna, padrao)
+    return padrao
+
+def tipar_ddl(sql):
+    """Reescreve o DDL de criação trocando VARCHAR(n) pelos tipos de TIPOS_COLUNAS"""
+    for tabela, tipos in TIPOS_COLUNAS.items():
+        padrao = re.compile(rf'(CREATE TABLE {tabela} \()(.*?)(\n\s*\);)', re.DOTALL)
+
+        def tipar(m, tipos=tipos):
+            corpo = m.group(2)
+            for coluna, tipo in tipos.items():
+                corpo = re.sub(rf'(\n\s+{coluna}) VARCHAR\(\d+\)', rf'\1 {tipo}', corpo)
+            return m.group(1) + corpo + m.group(3)
+
+        sql = padrao.sub(tipar, sql)
+    return sql
+
+@lru_cache(maxsize=None)
+def converter_data(valor):
+    """Retorna a data 'AAAAMMDD' se ela existir; vazio, 00000000 e datas inválidas viram None"""
+    if len(valor) != 8 or not valor.isdigit():
+        return None
+    try:
+        datetime.strptime(valor, '%Y%m%d')
+    except ValueError:
+        return None
+    return valor
+
+def converter_inteiro(valor):
+    """Retorna o código se for numérico; vazio e valores não numéricos viram None"""
+    return valor if valor.isascii() and valor.isdigit() else None
+
+CONVERSORES = {
+    'DATE': converter_data,
+    'SMALLINT': converter_inteiro,
+    'INTEGER': converter_inteiro,
+    'BIGINT': converter_inteiro,
+}
+
+class TransformacaoTipada:
+    """Transformação do layout seguida da limpeza das colunas tipadas.
+
+    É uma classe (e não uma função interna) para poder ser enviada aos
+    processos da carga paralela.
+    """
+
+    def __init__(self, transformar, conversoes):
+        self.transformar = transformar
+        self.conversoes = conversoes
+
+    def __call__(self, campos):
+        campos = self.transformar(campos)
+        for indice, converter in self.conversoes:
+            if campos[indice] is not None:
+                campos[indice] = converter(campos[indice])
+        return campos
+
+def layout_tipado(nome_tabela, layout):
+    """Retorna o layout com a transformação do schema tipado"""
+    tipos = TIPOS_COLUNAS.get(nome_tabela, {})
+    conversoes = [
+        (indice, CONVERSORES[tipos[coluna]])
+        for indice, coluna in enumerate(layout.colunas_destino) if coluna in tipos
+    ]
+    return layout._replace(transformar=TransformacaoTipada(layout.transformar, conversoes))
+
+def obter_layouts(config):
+    """Layouts das tabelas principais para o schema da configuração"""
+    if not tipado_ativo(config):
+        return TABELAS_PRINCIPAIS
+    return {nome_tabela: layout_tipado(nome_tabela, layout) for nome_tabela, layout in TABELAS_PRINCIPAIS.items()}
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Consulta de CNPJs em Lote
+====================================
+
+Camada de consulta reutilizável para serviços que resolvem milhares de CNPJs
+por requisição. Em vez de uma conexão (ou um create_engine) e um SELECT por
+CNPJ, ServicoCNPJ mantém um pool de conexões psycopg2 abertas e resolve um lote
+inteiro em uma única ida ao banco:
+
+    SELECT ... FROM estabelecimento te LEFT JOIN empresas ... LEFT JOIN simples ...
+    WHERE te.cnpj = ANY(%s::VARCHAR[])
+
+Lotes maiores que TAMANHO_LOTE são divididos e resolvidos em paralelo, em
+conexões diferentes do pool.
+
+    with ServicoCNPJ(config) as servico:
+        registros = servico.lookup_many(['00000000000191', '33000167000101'])
+        registros = await servico.lookup_many_async(cnpjs)   # em código asyncio
+
+A variante asyncio executa lookup_many em threads próprias sem bloquear o loop
+de eventos. Quando todas as conexões estão emprestadas, as consultas esperam
+uma conexão livre (o ThreadedConnectionPool sozinho lançaria PoolError).
+
+O benchmark_consulta.py compara consultas individuais com consultas em lote.
+
+Configurações opcionais no cnpj_config.json:
+    consulta_conexoes: conexões do pool (padrão: 10)
+    consulta_timeout_ms: statement_timeout das consultas (padrão: 30000)
+"""
+
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2.pool import ThreadedConnectionPool
+
+import carga_copy
+import schema_tipado
+from consulta_cnpj import SQL_REGISTRO, normalizar_cnpj, linhas_como_dicts
+
+logger = logging.getLogger(__name__)
+
+CONEXOES = 10
+TIMEOUT_MS = 30000
+
+# CNPJs por consulta; lotes maiores são divididos entre as conexões do pool
+TAMANHO_LOTE = 1000
+
+class ServicoCNPJ:
+    """Consultas de CNPJs em lote sobre um pool de conexões"""
+
+    def __init__(self, config, conexoes=None):
+        self.conexoes = conexoes or config.get('consulta_conexoes') or CONEXOES
+        parametros = carga_copy.parametros_conexao(config)
+        timeout = f"-cstatement_timeout={config.get('consulta_timeout_ms', TIMEOUT_MS)}"
+        parametros['options'] = f"{parametros['options']} {timeout}" if parametros['options'] else timeout
+
+        self.pool = ThreadedConnectionPool(1, self.conexoes, **parametros)
+        self.livres = threading.BoundedSemaphore(self.conexoes)
+        # Executores separados: uma chamada assíncrona espera seus lotes sem ocupar as threads deles
+        self.executor_lotes = ThreadPoolExecutor(max_workers=self.conexoes)
+        self.executor_async = ThreadPoolExecutor(max_workers=self.conexoes)
+
+        # No schema tipado cnpj e cnpj_basico são números: o array é convertido para o tipo da coluna
+        tipo_cnpj = schema_tipado.tipo_coluna(config, 'estabelecimento', 'cnpj')
+        tipo_basico = schema_tipado.tipo_coluna(config, 'estabelecimento', 'cnpj_basico')
+        self.sql_registros = SQL_REGISTRO + f'WHERE te.cnpj = ANY(%s::{tipo_cnpj}[])'
+        self.sql_socios = f'SELECT * FROM socios WHERE cnpj_basico = ANY(%s::{tipo_basico}[])'
+
+    def close(self):
+        self.executor_async.shutdown()
+        self.executor_lotes.shutdown()
+        self.pool.closeall()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool (autocommit), esperando se todas estiverem em uso"""
+        with self.livres:
+            conn = self.pool.getconn()
+            try:
+                conn.autocommit = True
+                yield conn
+            finally:
+                self.pool.putconn(conn)
+
+    def consultar_lote(self, cnpjs, socios=False):
+        """Resolve um lote de CNPJs já normalizados em uma ida ao banco (duas, com os sócios)"""
+        with self.conexao() as conn, conn.cursor() as cursor:
+            cursor.execute(self.sql_registros, (cnpjs,))
+            registros = {normalizar_cnpj(registro['cnpj']): registro for registro in linhas_como_dicts(cursor)}
+
+            if socios and registros:
+                basicos = list({str(registro['cnpj_basico']) for registro in registros.values()})
+                cursor.execute(self.sql_socios, (basicos,))
+                por_basico = {}
+                for socio in linhas_como_dicts(cursor):
+                    por_basico.setdefault(str(socio['cnpj_basico']), []).append(socio)
+                for registro in registros.values():
+                    registro['socios'] = por_basico.get(str(registro['cnpj_basico']), [])
+        return registros
+
+    def lookup_many(self, cnpjs, socios=False):
+        """Resolve uma lista de CNPJs (com ou sem pontuação).
+
+        Retorna {cnpj com 14 dígitos: registro}; CNPJs não encontrados ficam de fora.
+        """
+        normalizados = list(dict.fromkeys(normalizar_cnpj(cnpj) for cnpj in cnpjs))
+        lotes = [normalizados[i:i + TAMANHO_LOTE] for i in range(0, len(normalizados), TAMANHO_LOTE)]
+        if len(lotes) <= 1:
+            return self.consultar_lote(lotes[0], socios) if lotes else {}
+
+        registros = {}
+        for resultado in self.executor_lotes.map(lambda lote: self.consultar_lote(lote, socios), lotes):
+            registros.update(resultado)
+        return registros
+
+    def lookup(self, cnpj, socios=False):
+        """Registro de um CNPJ, ou None"""
+        return self.lookup_many([cnpj], socios).get(normalizar_cnpj(cnpj))
+
+    async def lookup_many_async(self, cnpjs, socios=False):
+        """Variante asyncio de lookup_many"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor_async, self.lookup_many, cnpjs, socios)
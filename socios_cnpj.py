@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Montagem da Tabela socios
+=========================
+
+A tabela socios é a socios_original com o cnpj da matriz de cada empresa. Em vez
+de um único CREATE TABLE socios AS SELECT ... JOIN estabelecimento (uma junção
+hash enorme em uma só sessão, que transborda para disco), a montagem é dividida
+em 10 faixas de cnpj_basico pelo primeiro dígito, executadas ao mesmo tempo em
+conexões separadas. Cada faixa junta 1/10 das tabelas, cabendo no work_mem.
+
+A tabela é criada vazia com a estrutura da junção e cada faixa faz seu próprio
+INSERT ... SELECT. A socios_original só é removida se todas as faixas terminarem
+sem erro.
+
+Com particoes_hash (ver particionamento_cnpj.py), a socios é criada particionada
+por HASH (cnpj_basico) com as colunas da junção (cnpj + socios_original), e os
+INSERTs de cada faixa são encaminhados pelo PostgreSQL às partições.
+
+No schema tipado (ver schema_tipado.py) cnpj_basico é INTEGER e as faixas são
+os intervalos numéricos equivalentes (ex.: '1' -> 10000000 a 19999999).
+
+A quantidade de conexões e a memória por conexão seguem indices_conexoes e
+indices_memoria_mb (ver indices_cnpj.py).
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import carga_copy
+import indices_cnpj
+import carga_unlogged
+import particionamento_cnpj
+import schema_tipado
+
+logger = logging.getLogger(__name__)
+
+# Faixas de cnpj_basico [inicio, fim) pelo primeiro dígito; a última não tem fim
+FAIXAS = [(str(digito), str(digito + 1) if digito < 9 else None) for digito in range(10)]
+
+SQL_SELECT_SOCIOS = '''
+    SELECT te.cnpj as cnpj, ts.*
+    FROM socios_original ts
+    LEFT JOIN estabelecimento te ON te.cnpj_basico = ts.cnpj_basico
+    WHERE te.matriz_filial='1'
+'''
+
+def filtro_faixa(inicio, fim, numerico=False):
+    """Condição SQL de uma faixa sobre as duas tabelas (permite filtrar os dois lados da junção).
+
+    Com numerico, o dígito inicial vira o limite inteiro equivalente do cnpj_basico.
+    """
+    def limite(digito):
+        return str(int(digito) * 10**7) if numerico else f"'{digito}'"
+
+    condicao = f"ts.cnpj_basico >= {limite(inicio)} AND te.cnpj_basico >= {limite(inicio)}"
+    if fim is not None:
+        condicao += f" AND ts.cnpj_basico < {limite(fim)} AND te.cnpj_basico < {limite(fim)}"
+    return condicao
+
+def sql_criar_socios(config):
+    """Retorna o SQL que recria a socios vazia (particionada se particoes_hash estiver definido)"""
+    comando_criar = carga_unlogged.comando_criar_tabela(config)
+    particoes = particionamento_cnpj.quantidade_particoes(config)
+    if not particoes:
+        return f"DROP TABLE IF EXISTS socios; {comando_criar} socios AS {SQL_SELECT_SOCIOS} WITH NO DATA"
+    return (f"DROP TABLE IF EXISTS socios; "
+            f"CREATE TABLE socios (cnpj {schema_tipado.tipo_coluna(config, 'estabelecimento', 'cnpj', 'VARCHAR(14)')}, LIKE socios_original) "
+            f"PARTITION BY HASH ({particionamento_cnpj.TABELAS_PARTICIONADAS['socios']});\n"
+            + particionamento_cnpj.sql_particoes('socios', particoes, comando_criar))
+
+def executar(config, sql):
+    """Executa um comando em uma conexão própria"""
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+def inserir_faixa(config, inicio, fim, memoria_mb):
+    """Insere na socios os sócios de uma faixa e retorna (linhas, duração)"""
+    start_time = time.time()
+    conn = carga_copy.conectar_psycopg2(config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SET work_mem = '{memoria_mb}MB'")
+            numerico = schema_tipado.tipado_ativo(config)
+            cursor.execute(f"INSERT INTO socios {SQL_SELECT_SOCIOS} AND {filtro_faixa(inicio, fim, numerico)}")
+            linhas = cursor.rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    return linhas, time.time() - start_time
+
+def construir_socios(config):
+    """Monta a tabela socios em paralelo, por faixas de cnpj_basico.
+
+    Retorna (comandos executados, comandos com erro).
+    """
+    conexoes, memoria_mb, _ = indices_cnpj.calcular_parametros(config, len(FAIXAS))
+    logger.info(f"Montando socios em {len(FAIXAS)} faixas com {conexoes} conexões simultâneas (work_mem={memoria_mb}MB)")
+
+    executar(config, sql_criar_socios(config))
+
+    executados = 1
+    com_erro = 0
+    total_linhas = 0
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=conexoes) as executor:
+        futuros = {
+            executor.submit(inserir_faixa, config, inicio, fim, memoria_mb): (inicio, fim)
+            for inicio, fim in FAIXAS
+        }
+        for concluidas, futuro in enumerate(as_completed(futuros), 1):
+            inicio, fim = futuros[futuro]
+            try:
+                linhas, duracao = futuro.result()
+                executados += 1
+                total_linhas += linhas
+                logger.info(f"✓ [{concluidas}/{len(FAIXAS)}] socios cnpj_basico {inicio}*: "
+                            f"{linhas:,} linhas em {duracao:.2f}s")
+            except Exception as e:
+                com_erro += 1
+                logger.error(f"✗ [{concluidas}/{len(FAIXAS)}] Erro na faixa cnpj_basico {inicio}* de socios: {str(e)}")
+
+    logger.info(f"Tabela socios: {total_linhas:,} linhas em {time.time() - start_time:.2f}s")
+
+    if com_erro:
+        logger.warning("⚠ socios_original mantida por causa dos erros acima")
+        return executados, com_erro
+
+    executar(config, "DROP TABLE IF EXISTS socios_original")
+    return executados + 1, com_erro
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do download retomável contra um servidor HTTP local
+==========================================================
+
+O servidor atende HEAD e GET com Range/If-Range a partir de um conteúdo em
+memória e pode simular uma conexão que cai no meio da resposta, uma resposta
+sem Content-Length e um servidor sem suporte a Range.
+
+Uso:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import json
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import download_retomavel
+
+NOME = 'Empresas0.zip'
+
+class ServidorLocal:
+    """Servidor HTTP de um único arquivo, com as requisições recebidas registradas"""
+
+    def __init__(self, conteudo):
+        self.conteudo = conteudo
+        self.etag = '"v1"'
+        self.aceita_range = True
+        self.cortar_em = None           # encerra a próxima resposta GET após N bytes
+        self.sem_content_length = False  # GET sem Content-Length (fim pelo fechamento da conexão)
+        self.requisicoes = []
+
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def cabecalhos(self, tamanho):
+                if tamanho is not None:
+                    self.send_header('Content-Length', str(tamanho))
+                self.send_header('ETag', servidor.etag)
+                self.send_header('Last-Modified', 'Wed, 11 Sep 2024 10:00:00 GMT')
+                if servidor.aceita_range:
+                    self.send_header('Accept-Ranges', 'bytes')
+
+            def do_HEAD(self):
+                servidor.requisicoes.append(('HEAD', None, None))
+                self.send_response(200)
+                self.cabecalhos(len(servidor.conteudo))
+                self.end_headers()
+
+            def do_GET(self):
+                faixa = self.headers.get('Range')
+                if_range = self.headers.get('If-Range')
+                servidor.requisicoes.append(('GET', faixa, if_range))
+
+                conteudo = servidor.conteudo
+                if faixa and servidor.aceita_range and if_range in (None, servidor.etag):
+                    inicio, fim = faixa.replace('bytes=', '').split('-')
+                    inicio, fim = int(inicio), int(fim) if fim else len(conteudo) - 1
+                    corpo = conteudo[inicio:fim + 1]
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {inicio}-{fim}/{len(conteudo)}')
+                else:
+                    corpo = conteudo
+                    self.send_response(200)
+                self.cabecalhos(None if servidor.sem_content_length else len(corpo))
+                self.end_headers()
+
+                if servidor.cortar_em is not None:
+                    corpo = corpo[:servidor.cortar_em]
+                    servidor.cortar_em = None
+                self.wfile.write(corpo)
+
+        self.httpd = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/{NOME}'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def gets(self):
+        return [requisicao for requisicao in self.requisicoes if requisicao[0] == 'GET']
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorLocal(os.urandom(3 * 1024 * 1024 + 123))
+    servidor.thread.start()
+    yield servidor
+    servidor.httpd.shutdown()
+    servidor.httpd.server_close()
+
+@pytest.fixture(autouse=True)
+def blocos_pequenos(monkeypatch):
+    # Segmentos e blocos pequenos para exercitar a divisão com poucos MB, sem esperar entre tentativas
+    monkeypatch.setattr(download_retomavel, 'TAMANHO_MINIMO_SEGMENTO', 512 * 1024)
+    monkeypatch.setattr(download_retomavel, 'TAMANHO_BLOCO', 64 * 1024)
+    monkeypatch.setattr(download_retomavel, 'INTERVALO_ESTADO', 256 * 1024)
+    monkeypatch.setattr(download_retomavel.time, 'sleep', lambda segundos: None)
+
+def ler(caminho):
+    with open(caminho, 'rb') as f:
+        return f.read()
+
+def test_download_em_segmentos(servidor, tmp_path):
+    destino, baixado = download_retomavel.baixar_arquivo(servidor.url, str(tmp_path), segmentos=4)
+
+    assert ler(destino) == servidor.conteudo
+    assert baixado == len(servidor.conteudo)
+    assert len(servidor.gets()) == 4
+    assert all(faixa and if_range == servidor.etag for _, faixa, if_range in servidor.gets())
+    assert not os.path.exists(destino + '.part')
+    assert download_retomavel.carregar_estado(destino)['concluido']
+
+def test_retoma_apos_queda_na_mesma_execucao(servidor, tmp_path):
+    servidor.cortar_em = 1024 * 1024
+
+    destino, _ = download_retomavel.baixar_arquivo(servidor.url, str(tmp_path), tentativas=2)
+
+    assert ler(destino) == servidor.conteudo
+    primeira, segunda = servidor.gets()
+    assert primeira[1] == f'bytes=0-{len(servidor.conteudo) - 1}'
+    assert int(segunda[1].split('=')[1].split('-')[0]) > 0
+
+def test_retoma_em_nova_execucao(servidor, tmp_path):
+    servidor.cortar_em = 2 * 1024 * 1024
+    with pytest.raises(requests.exceptions.RequestException):
+        download_retomavel.baixar_arquivo(servidor.url, str(tmp_path), tentativas=1)
+
+    destino = os.path.join(str(tmp_path), NOME)
+    assert not os.path.exists(destino)
+    ja_baixado = download_retomavel.carregar_estado(destino)['segmentos'][0]['baixado']
+    assert ja_baixado > 0
+
+    destino, baixado = download_retomavel.baixar_arquivo(servidor.url, str(tmp_path))
+
+    assert ler(destino) == servidor.conteudo
+    assert baixado == len(servidor.conteudo) - ja_baixado
+    assert servidor.gets()[-1][1] == f'bytes={ja_baixado}-{len(servidor.conteudo) - 1}'
+
+def test_pula_arquivo_concluido_e_inalterado(servidor, tmp_path):
+    download_retomavel.baixar_arquivo(servidor.url, str(tmp_path))
+    gets = len(servidor.gets())
+
+    destino, baixado = download_retomavel.baixar_arquivo(servidor.url, str(tmp_path))
+
+    assert baixado == 0
+    assert len(servidor.gets()) == gets
+    assert ler(destino) == servidor.conteudo
+
+def test_baixa_de_novo_arquivo_alterado(servidor, tmp_path):
+    download_retomavel.baixar_arquivo(servidor.url, str(tmp_path))
+    servidor.conteudo = os.urandom(1024 * 1024)
+    servidor.etag = '"v2"'
+
+    destino, baixado = download_retomavel.baixar_arquivo(servidor.url, str(tmp_path))
+
+    assert baixado == len(servidor.conteudo)
+    assert ler(destino) == servidor.conteudo
+    assert download_retomavel.carregar_estado(destino)['etag'] == '"v2"'
+
+def test_descarta_parcial_de_outra_versao(servidor, tmp_path):
+    servidor.cortar_em = 1024 * 1024
+    with pytest.raises(requests.exceptions.RequestException):
+        download_retomavel.baixar_arquivo(servidor.url, str(tmp_path), tentativas=1)
+    servidor.conteudo = os.urandom(2 * 1024 * 1024)
+    servidor.etag = '"v2"'
+
+    destino, baixado = download_retomavel.baixar_arquivo(servidor.url, str(tmp_path))
+
+    assert baixado == len(servidor.conteudo)
+    assert ler(destino) == servidor.conteudo
+    assert servidor.gets()[-1][1] == f'bytes=0-{len(servidor.conteudo) - 1}'
+
+def test_servidor_sem_range(servidor, tmp_path):
+    servidor.aceita_range = False
+
+    destino, baixado = download_retomavel.baixar_arquivo(servidor.url, str(tmp_path), segmentos=4)
+
+    assert ler(destino) == servidor.conteudo
+    assert baixado == len(servidor.conteudo)
+    assert servidor.gets() == [('GET', None, None)]
+
+def test_servidor_sem_range_truncado_nao_conclui(servidor, tmp_path):
+    # Sem Content-Length no GET o cliente não percebe o corte: vale o tamanho do HEAD
+    servidor.aceita_range = False
+    servidor.sem_content_length = True
+    servidor.cortar_em = 1024 * 1024
+
+    with pytest.raises(IOError):
+        download_retomavel.baixar_arquivo(servidor.url, str(tmp_path))
+
+    destino = os.path.join(str(tmp_path), NOME)
+    assert not os.path.exists(destino)
+    with open(download_retomavel.caminho_estado(destino), 'r', encoding='utf-8') as f:
+        assert not json.load(f)['concluido']